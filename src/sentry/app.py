@@ -15,11 +15,15 @@ class State(local):
     request = None
 
 
-def get_buffer(path, options):
+def get_instance(path, options):
     cls = import_string(path)
     if cls is None:
         raise ImportError('Unable to find module %s' % path)
     return cls(**options)
 
-buffer = get_buffer(settings.BUFFER, settings.BUFFER_OPTIONS)
+buffer = get_instance(settings.BUFFER, settings.BUFFER_OPTIONS)
+locks = get_instance(settings.LOCK_BACKEND, settings.LOCK_BACKEND_OPTIONS)
+quotas = get_instance(settings.QUOTAS, settings.QUOTA_OPTIONS)
+tag_sketches = get_instance(settings.TAG_SKETCHES, settings.TAG_SKETCH_OPTIONS)
+uniques = get_instance(settings.UNIQUE_USERS, settings.UNIQUE_USERS_OPTIONS)
 env = State()
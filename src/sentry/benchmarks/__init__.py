@@ -0,0 +1,20 @@
+"""
+sentry.benchmarks
+~~~~~~~~~~~~~~~~~
+
+Benchmarks are run with ``sentry benchmark <name>`` against the configured
+database and cache.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from django.utils.datastructures import SortedDict
+
+BENCHMARKS = SortedDict((
+    ('contention', 'sentry.benchmarks.contention.ContentionBenchmark'),
+    ('codec', 'sentry.benchmarks.codec.CodecBenchmark'),
+    ('ingest', 'sentry.benchmarks.ingest.IngestBenchmark'),
+    ('grouping', 'sentry.benchmarks.grouping.GroupingBenchmark'),
+    ('charts', 'sentry.benchmarks.charts.ChartBenchmark'),
+))
@@ -0,0 +1,157 @@
+"""
+sentry.benchmarks.base
+~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import gc
+import math
+import time
+
+from django.utils.datastructures import SortedDict
+
+
+def percentile(samples, pct):
+    """
+    Returns the nearest-rank percentile of a sorted list of samples.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    """
+    if not samples:
+        return 0
+    idx = int(math.ceil(pct / 100.0 * len(samples))) - 1
+    return samples[max(0, min(idx, len(samples) - 1))]
+
+
+class Result(object):
+    """
+    The timings (in seconds) collected for a single case of a benchmark.
+
+    ``size`` optionally records the size (in bytes) of whatever the case
+    produced, and ``objects`` the average number of (garbage collected)
+    objects each call left allocated. Any other figures worth reporting can
+    be added to ``extra``.
+    """
+    def __init__(self, name, samples, elapsed=None, size=None, objects=None, extra=None):
+        self.name = name
+        self.size = size
+        self.objects = objects
+        self.extra = SortedDict(extra or {})
+        self.samples = sorted(samples)
+        if elapsed is None:
+            elapsed = sum(samples)
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return '<%s: name=%r count=%s>' % (type(self).__name__, self.name, len(self.samples))
+
+    def summary(self):
+        return {
+            'count': len(self.samples),
+            'elapsed': self.elapsed,
+            'min': self.samples[0] if self.samples else 0,
+            'p50': percentile(self.samples, 50),
+            'p95': percentile(self.samples, 95),
+            'p99': percentile(self.samples, 99),
+            'max': self.samples[-1] if self.samples else 0,
+        }
+
+
+class Benchmark(object):
+    """
+    A benchmark times one or more cases and returns a ``Result`` for each.
+    """
+    def __init__(self, iterations=100, **options):
+        self.iterations = iterations
+        self.options = options
+
+    def run(self):
+        raise NotImplementedError
+
+    def time(self, name, func, iterations=None):
+        """
+        Calls ``func`` repeatedly, recording the duration of each call.
+        """
+        if iterations is None:
+            iterations = self.iterations
+
+        return self.time_each(name, lambda _: func(), xrange(iterations))[0]
+
+    def time_each(self, name, func, values):
+        """
+        Calls ``func`` with each of ``values``, recording the duration of each
+        call. Returns a tuple of (result, return values).
+
+        Python doesn't expose an allocation counter, so the garbage collector
+        is paused while timing and its generation 0 count (which is the number
+        of container objects allocated, less those freed) is recorded instead.
+        This includes whatever ``func`` returns, and is enough to spot a stage
+        which suddenly starts holding on to more objects than it used to.
+        """
+        samples = []
+        output = []
+
+        gc.collect()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            count = gc.get_count()[0]
+            start = time.time()
+            for value in values:
+                t = time.time()
+                output.append(func(value))
+                samples.append(time.time() - t)
+            elapsed = time.time() - start
+            objects = gc.get_count()[0] - count
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        if samples:
+            objects = objects / float(len(samples))
+        else:
+            objects = None
+
+        return Result(name, samples, elapsed, objects=objects), output
+
+
+def format_results(results):
+    """
+    Renders a list of results as a plain text table, with timings in
+    milliseconds.
+    """
+    with_size = any(r.size is not None for r in results)
+    with_objects = any(r.objects is not None for r in results)
+    extra_keys = []
+    for result in results:
+        extra_keys.extend(k for k in result.extra if k not in extra_keys)
+
+    header = ('case', 'count', 'total', 'p50', 'p95', 'p99', 'max')
+    if with_objects:
+        header += ('objects',)
+    if with_size:
+        header += ('size',)
+    header += tuple(extra_keys)
+    rows = [header]
+    for result in results:
+        s = result.summary()
+        row = (result.name, str(s['count'])) + tuple(
+            '%.3f' % (s[k] * 1000,) for k in ('elapsed', 'p50', 'p95', 'p99', 'max')
+        )
+        if with_objects:
+            row += (result.objects is not None and '%.1f' % (result.objects,) or '-',)
+        if with_size:
+            row += (result.size is not None and str(result.size) or '-',)
+        row += tuple(str(result.extra.get(k, '-')) for k in extra_keys)
+        rows.append(row)
+
+    widths = [max(len(r[i]) for r in rows) for i in xrange(len(header))]
+    lines = []
+    for row in rows:
+        lines.append('  '.join(
+            (c.ljust(w) if i == 0 else c.rjust(w)) for i, (c, w) in enumerate(zip(row, widths))
+        ))
+    return '\n'.join(lines)
@@ -0,0 +1,80 @@
+"""
+sentry.benchmarks.charts
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import datetime
+import random
+import time
+
+from django.utils import timezone
+
+from sentry.benchmarks.base import Benchmark
+from sentry.utils.charts import build_series
+
+
+def legacy_build_series(rows, today, d_type, points, modifier=1):
+    """
+    Builds chart series the way ``ChartMixin`` used to, a point at a time.
+    """
+    tsdata_by_item = {}
+    for item, date, num in rows:
+        tsdata_by_item.setdefault(item, {})[date] = num
+
+    results = {}
+    for item, tsdata in tsdata_by_item.iteritems():
+        results[item] = []
+        for point in xrange(points, -1, -1):
+            dt = today - datetime.timedelta(**{d_type: point * modifier})
+            results[item].append((int(time.mktime((dt).timetuple())) * 1000, tsdata.get(dt, 0)))
+    return results
+
+
+class ChartBenchmark(Benchmark):
+    """
+    Compares assembling the chart series of ``groups`` groups point by point
+    (as ``ChartMixin`` used to) against ``build_series``, for charts of the
+    last day (hourly points), 30 days and 90 days (daily points).
+
+    Rows are generated in memory, with a count for every point, so only the
+    series assembly is timed.
+    """
+    seed = 0
+    ranges = (
+        ('1d', 1, 'hours', 24, 60 * 60),
+        ('30d', 30, 'days', 30, 24 * 60 * 60),
+        ('90d', 90, 'days', 90, 24 * 60 * 60),
+    )
+
+    def __init__(self, groups=50, **options):
+        super(ChartBenchmark, self).__init__(**options)
+        self.groups = groups
+
+    def run(self):
+        rand = random.Random(self.seed)
+        now = timezone.now().replace(minute=0, second=0, microsecond=0)
+
+        results = []
+        for name, days, d_type, points, step in self.ranges:
+            today = now if d_type == 'hours' else now.replace(hour=0)
+            start = today - datetime.timedelta(**{d_type: points})
+            rows = [
+                (group_id, start + datetime.timedelta(seconds=n * step), rand.randint(1, 1000))
+                for group_id in xrange(self.groups)
+                for n in xrange(points + 1)
+            ]
+
+            expected = legacy_build_series(rows, today, d_type, points)
+            assert build_series(rows, start, step, points + 1) == expected
+
+            result = self.time('legacy:%s' % (name,), lambda: legacy_build_series(rows, today, d_type, points))
+            result.extra['points'] = len(rows)
+            results.append(result)
+
+            result = self.time('series:%s' % (name,), lambda: build_series(rows, start, step, points + 1))
+            result.extra['points'] = len(rows)
+            results.append(result)
+        return results
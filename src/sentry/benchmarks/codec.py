@@ -0,0 +1,49 @@
+"""
+sentry.benchmarks.codec
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import base64
+import zlib
+
+from sentry.benchmarks.base import Benchmark
+from sentry.benchmarks.payloads import make_python_event
+from sentry.utils import codec
+from sentry.utils.compat import pickle
+
+
+def legacy_dumps(value):
+    return base64.b64encode(pickle.dumps(value).encode('zlib'))
+
+
+def legacy_loads(value):
+    return pickle.loads(zlib.decompress(base64.b64decode(value)))
+
+
+class CodecBenchmark(Benchmark):
+    """
+    Compares encoding and decoding event data with the legacy format (base64
+    encoded, zlib compressed pickles) against ``sentry.utils.codec``.
+    """
+    def run(self):
+        data = make_python_event()
+
+        cases = (
+            ('legacy', legacy_dumps, legacy_loads),
+            ('codec', codec.encode, codec.decode),
+            ('codec+base64', lambda v: base64.b64encode(codec.encode(v)), codec.decode),
+        )
+
+        results = []
+        for name, dumps, loads in cases:
+            encoded = dumps(data)
+            assert loads(encoded) == data
+
+            result = self.time('%s:encode' % (name,), lambda: dumps(data))
+            result.size = len(encoded)
+            results.append(result)
+            results.append(self.time('%s:decode' % (name,), lambda: loads(encoded)))
+        return results
@@ -0,0 +1,84 @@
+"""
+sentry.benchmarks.contention
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+import time
+import uuid
+
+from django.db import close_connection
+
+from sentry.benchmarks.base import Benchmark, Result
+
+
+class ContentionBenchmark(Benchmark):
+    """
+    Measures ``get_or_create`` when many workers race to create the same rows,
+    comparing the cache lock against relying on the table's unique constraints.
+
+    Every thread attempts to create the same ``iterations`` filter values, so
+    all but one of them will lose each race.
+    """
+    key = 'sentry:bench'
+
+    def __init__(self, threads=8, **options):
+        super(ContentionBenchmark, self).__init__(**options)
+        self.threads = threads
+
+    def run(self):
+        from sentry.models import FilterValue, Project
+
+        project = Project.objects.all()[0]
+        manager = FilterValue.objects
+
+        results = []
+        original = manager.lock_free
+        try:
+            for lock_free in (False, True):
+                manager.lock_free = lock_free
+                name = lock_free and 'unique-constraint' or 'cache-lock'
+                results.append(self.run_case(name, manager, project))
+        finally:
+            manager.lock_free = original
+            manager.filter(project=project, key=self.key).delete()
+
+        return results
+
+    def run_case(self, name, manager, project):
+        prefix = uuid.uuid4().hex[:8]
+        values = ['%s-%d' % (prefix, n) for n in xrange(self.iterations)]
+
+        samples = []
+        errors = []
+        ready = threading.Event()
+
+        def worker():
+            ready.wait()
+            try:
+                for value in values:
+                    t = time.time()
+                    manager.get_or_create(project=project, key=self.key, value=value)
+                    samples.append(time.time() - t)
+            except Exception, e:
+                errors.append(e)
+            finally:
+                close_connection()
+
+        threads = [threading.Thread(target=worker) for _ in xrange(self.threads)]
+        for thread in threads:
+            thread.start()
+
+        start = time.time()
+        ready.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+
+        if errors:
+            raise errors[0]
+
+        return Result(name, samples, elapsed)
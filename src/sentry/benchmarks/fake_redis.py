@@ -0,0 +1,105 @@
+"""
+sentry.benchmarks.fake_redis
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+An in-memory stand in for a Nydus Redis cluster, implementing just enough
+commands to drive ``RedisBuffer`` without a Redis server.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import random
+
+
+class FakePipeline(object):
+    def __init__(self, conn):
+        self.conn = conn
+        self.commands = []
+
+    def __getattr__(self, name):
+        func = getattr(self.conn, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((func, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        return [func(*args, **kwargs) for func, args, kwargs in commands]
+
+
+class FakeRedis(object):
+    """
+    Values are stored as Redis would return them (strings), but expiry is
+    ignored.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get_conn(self, key):
+        return self
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def flushdb(self):
+        self.data.clear()
+
+    def exists(self, key):
+        return key in self.data
+
+    def delete(self, *keys):
+        return len([self.data.pop(k) for k in keys if k in self.data])
+
+    def expire(self, key, seconds):
+        return key in self.data
+
+    def hincrby(self, key, field, amount=1):
+        value = self.data.setdefault(key, {})
+        value[field] = str(int(value.get(field, 0)) + amount)
+        return int(value[field])
+
+    def hset(self, key, field, value):
+        values = self.data.setdefault(key, {})
+        is_new = field not in values
+        values[field] = str(value)
+        return int(is_new)
+
+    def hsetnx(self, key, field, value):
+        values = self.data.setdefault(key, {})
+        if field in values:
+            return 0
+        values[field] = str(value)
+        return 1
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        count = len(values)
+        values.update(members)
+        return len(values) - count
+
+    def srem(self, key, *members):
+        values = self.data.get(key, set())
+        count = len(values)
+        values.difference_update(members)
+        return count - len(values)
+
+    def scard(self, key):
+        return len(self.data.get(key, ()))
+
+    def smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def srandmember(self, key, number=None):
+        values = list(self.data.get(key, ()))
+        if number is None:
+            return values and random.choice(values) or None
+        return random.sample(values, min(number, len(values)))
@@ -0,0 +1,69 @@
+"""
+sentry.benchmarks.grouping
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import random
+
+from sentry.benchmarks.base import Benchmark
+from sentry.benchmarks.payloads import make_framework_event
+from sentry.utils import json
+
+
+def load_corpus(path):
+    """
+    Loads recorded events from a file containing one JSON encoded event (as
+    sent by a client) per line.
+    """
+    results = []
+    with open(path) as fp:
+        for line in fp:
+            line = line.strip()
+            if line:
+                results.append(json.loads(line))
+    return results
+
+
+class GroupingBenchmark(Benchmark):
+    """
+    Compares the cost of hashing events with each grouping strategy, and how
+    many distinct groups each of them produces.
+
+    Events are read from ``corpus`` (see ``load_corpus``) if given, otherwise
+    ``iterations`` events are generated.
+    """
+    seed = 0
+
+    def __init__(self, corpus=None, **options):
+        super(GroupingBenchmark, self).__init__(**options)
+        self.corpus = corpus
+
+    def get_events(self):
+        if self.corpus:
+            return load_corpus(self.corpus)
+        rand = random.Random(self.seed)
+        return [make_framework_event(rand=rand) for _ in xrange(self.iterations)]
+
+    def run(self):
+        from sentry.coreapi import validate_data
+        from sentry.grouping import strategies
+        from sentry.interfaces import InterfaceMap
+
+        events = []
+        for data in self.get_events():
+            data.pop('checksum', None)
+            data = validate_data(None, data)
+            interfaces = InterfaceMap(data)
+            # we're only interested in the cost of hashing
+            interfaces.values()
+            events.append((interfaces, data['message']))
+
+        results = []
+        for name, strategy in strategies.iteritems():
+            result, checksums = self.time_each(name, lambda e: strategy.get_checksum(*e), events)
+            result.extra['groups'] = len(set(checksums))
+            results.append(result)
+        return results
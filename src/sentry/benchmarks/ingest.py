@@ -0,0 +1,137 @@
+"""
+sentry.benchmarks.ingest
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import random
+import uuid
+
+from django.utils import timezone
+
+from sentry.benchmarks.base import Benchmark
+from sentry.benchmarks.fake_redis import FakeRedis
+from sentry.benchmarks.payloads import PAYLOADS, encode_payload
+
+
+class IngestBenchmark(Benchmark):
+    """
+    Times each stage an event goes through on its way in, from decoding the
+    request body to buffering its counters, without going through HTTP or the
+    queue.
+
+    Every stage is fed ``iterations`` synthetic events of each platform, so the
+    results show latency percentiles and object counts per stage. Events are
+    stored in a scratch project in the configured database, which is deleted
+    (along with every row that was written for it) afterwards, and the Redis
+    buffer runs against an in-memory fake. Nothing is queued while the
+    benchmark runs, so that no counters are left pending for the project.
+    """
+    seed = 0
+
+    def run(self):
+        from sentry.conf import settings
+        from sentry.models import Project
+
+        name = 'sentry.benchmark.%s' % (uuid.uuid4().hex[:8],)
+        project = Project.objects.create(name=name, slug=name.replace('.', '-'))
+
+        use_queue = settings.USE_QUEUE
+        settings.USE_QUEUE = False
+
+        results = []
+        group_ids = set()
+        try:
+            for platform, generator in PAYLOADS.iteritems():
+                rand = random.Random(self.seed)
+                payloads = []
+                for _ in xrange(self.iterations):
+                    data = generator(rand=rand)
+                    data['logger'] = name
+                    payloads.append(encode_payload(data))
+
+                stage_results, events = self.run_pipeline(project, payloads)
+                for result in stage_results:
+                    result.name = '%s:%s' % (platform, result.name)
+                results.extend(stage_results)
+                group_ids.update(e.group_id for e in events if e is not None)
+
+            results.extend(self.run_buffers(sorted(group_ids)))
+        finally:
+            settings.USE_QUEUE = use_queue
+            project.delete()
+
+        return results
+
+    def run_pipeline(self, project, payloads):
+        from sentry.coreapi import decode_and_decompress_data, safely_load_json_string, \
+          validate_data
+        from sentry.manager import get_checksum_from_event
+        from sentry.models import Event, Group
+
+        results = []
+
+        result, raw = self.time_each('decode', decode_and_decompress_data, payloads)
+        results.append(result)
+
+        result, data_list = self.time_each('load', safely_load_json_string, raw)
+        results.append(result)
+
+        result, data_list = self.time_each('validate', lambda d: validate_data(project, d), data_list)
+        results.append(result)
+
+        unsaved = [Event(project=project, message=d['message'], data=d) for d in data_list]
+        result, _ = self.time_each('checksum', get_checksum_from_event, unsaved)
+        results.append(result)
+
+        result, events = self.time_each('from_kwargs', lambda d: Group.objects.from_kwargs(**d), data_list)
+        results.append(result)
+
+        return results, events
+
+    def run_buffers(self, group_ids):
+        from sentry.buffer.base import Buffer
+        from sentry.buffer.inprocess import InProcessBuffer
+        from sentry.buffer.redis import RedisBuffer
+        from sentry.conf import settings
+        from sentry.models import Group
+
+        if not group_ids:
+            return []
+
+        now = timezone.now()
+        group_ids = [group_ids[n % len(group_ids)] for n in xrange(self.iterations)]
+
+        def incr(buf):
+            return lambda group_id: buf.incr(Group, {'times_seen': 1}, {'pk': group_id}, {'last_seen': now})
+
+        results = []
+
+        # Without the queue, every increment is written straight away
+        result, _ = self.time_each('buffer:base', incr(Buffer()), group_ids)
+        results.append(result)
+
+        buf = InProcessBuffer(interval=3600, max_keys=self.iterations + 1)
+        try:
+            result, _ = self.time_each('buffer:inprocess', incr(buf), group_ids)
+            results.append(result)
+            result, _ = self.time_each('buffer:inprocess:flush', lambda _: buf.flush(), [None])
+            results.append(result)
+        finally:
+            buf.close()
+
+        buf = RedisBuffer()
+        buf.conn = FakeRedis()
+        # only the sweeper is queued, so that increments are left pending
+        settings.USE_QUEUE = ['sentry.tasks.process_buffer.process_pending']
+        try:
+            result, _ = self.time_each('buffer:redis', incr(buf), group_ids)
+            results.append(result)
+        finally:
+            settings.USE_QUEUE = False
+        result, _ = self.time_each('buffer:redis:flush', lambda _: buf.process_pending(), [None])
+        results.append(result)
+
+        return results
@@ -0,0 +1,181 @@
+"""
+sentry.benchmarks.payloads
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Generates synthetic events, shaped like those sent by the Python and
+JavaScript clients.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import base64
+import random
+import uuid
+
+from django.utils.datastructures import SortedDict
+
+from sentry.utils import json
+
+EXCEPTIONS = (
+    ('ValueError', 'invalid literal for int() with base 10: \'foo\''),
+    ('KeyError', '\'user_id\''),
+    ('TypeError', '\'NoneType\' object is not iterable'),
+)
+
+JS_EXCEPTIONS = (
+    ('TypeError', 'undefined is not a function'),
+    ('ReferenceError', 'foo is not defined'),
+    ('SyntaxError', 'Unexpected token <'),
+)
+
+
+def make_tags(count, rand=random):
+    return [
+        ('tag_%d' % (n,), 'value_%d' % (rand.randint(0, 9),))
+        for n in xrange(count)
+    ]
+
+
+def make_http(rand=random):
+    return {
+        'url': 'http://example.com/foo/%d/' % (rand.randint(0, 100),),
+        'method': rand.choice(('GET', 'POST')),
+        'query_string': 'page=foo&sort=desc',
+        'data': {'username': 'foo', 'password': '********'},
+        'cookies': {'sessionid': '********'},
+        'headers': {
+            'User-Agent': ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_8_2) AppleWebKit/537.17 '
+                           '(KHTML, like Gecko) Chrome/24.0.1312.57 Safari/537.17'),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.8',
+        },
+        'env': {'REMOTE_ADDR': '10.0.0.%d' % (rand.randint(1, 254),), 'SERVER_NAME': 'example.com'},
+    }
+
+
+def make_user(rand=random):
+    user_id = rand.randint(1, 1000)
+    return {
+        'id': user_id,
+        'username': 'user_%d' % (user_id,),
+        'email': 'user_%d@example.com' % (user_id,),
+        'is_authenticated': True,
+    }
+
+
+def make_python_event(frames=20, tags=10, rand=random):
+    exc_type, exc_value = rand.choice(EXCEPTIONS)
+    return {
+        'event_id': uuid.uuid4().hex,
+        'message': '%s: %s' % (exc_type, exc_value),
+        'culprit': 'app.views.module_%d.handler' % (frames - 1,),
+        'logger': 'django.request',
+        'level': 'error',
+        'platform': 'python',
+        'server_name': 'web-%d.example.com' % (rand.randint(1, 4),),
+        'tags': make_tags(tags, rand),
+        'extra': {'sys.argv': ['manage.py', 'runserver'], 'foo': u'bar'},
+        'modules': {'django': '1.4.2', 'raven': '3.0.0'},
+        'sentry.interfaces.Exception': {
+            'type': exc_type,
+            'value': exc_value,
+            'module': 'exceptions',
+        },
+        'sentry.interfaces.Stacktrace': {
+            'frames': [{
+                'abs_path': '/srv/app/src/app/views/module_%d.py' % (n,),
+                'filename': 'app/views/module_%d.py' % (n,),
+                'module': 'app.views.module_%d' % (n,),
+                'function': 'handler',
+                'lineno': 100 + n,
+                'context_line': '    value = int(request.GET[\'page\'])',
+                'pre_context': ['', 'def handler(request):', '    """Does things."""'],
+                'post_context': ['    return render(request, value)', '', ''],
+                'vars': {'request': '<WSGIRequest: GET \'/foo/\'>', 'value': None, 'n': n},
+                'in_app': n % 2 == 0,
+            } for n in xrange(frames)],
+        },
+        'sentry.interfaces.Http': make_http(rand),
+        'sentry.interfaces.User': make_user(rand),
+    }
+
+
+def make_javascript_event(frames=20, tags=10, rand=random):
+    exc_type, exc_value = rand.choice(JS_EXCEPTIONS)
+    return {
+        'event_id': uuid.uuid4().hex,
+        'message': '%s: %s' % (exc_type, exc_value),
+        'culprit': 'http://example.com/static/js/app.js',
+        'logger': 'javascript',
+        'level': 'error',
+        'platform': 'javascript',
+        'tags': make_tags(tags, rand),
+        'sentry.interfaces.Exception': {
+            'type': exc_type,
+            'value': exc_value,
+        },
+        'sentry.interfaces.Stacktrace': {
+            'frames': [{
+                'abs_path': 'http://example.com/static/js/file_%d.min.js' % (n,),
+                'filename': 'http://example.com/static/js/file_%d.min.js' % (n,),
+                'function': 'fn%d' % (n,),
+                'lineno': 1,
+                'colno': 1000 + n * 37,
+                'in_app': True,
+            } for n in xrange(frames)],
+        },
+        'sentry.interfaces.Http': make_http(rand),
+        'sentry.interfaces.User': make_user(rand),
+    }
+
+
+FRAMEWORK_FRAMES = (
+    ('django.core.handlers.base', 'get_response', '                response = callback(request, *callback_args, **callback_kwargs)'),
+    ('django.contrib.sessions.middleware', 'process_request', '        request.session = engine.SessionStore(session_key)'),
+    ('django.middleware.common', 'process_request', '        if settings.APPEND_SLASH and (not old_url[1].endswith(\'/\')):'),
+    ('django.middleware.csrf', 'process_view', '        if getattr(callback, \'csrf_exempt\', False):'),
+    ('django.views.generic.base', 'view', '            return self.dispatch(request, *args, **kwargs)'),
+    ('django.utils.decorators', '_wrapped_view', '                    response = view_func(request, *args, **kwargs)'),
+)
+
+
+def make_framework_event(rand=random):
+    """
+    Returns a Python event whose stack passes through a varying set of
+    framework frames (some of which include memory addresses) before
+    reaching one of a handful of application errors.
+    """
+    data = make_python_event(frames=rand.randint(2, 4), tags=2, rand=rand)
+    app_frames = data['sentry.interfaces.Stacktrace']['frames']
+    for frame in app_frames:
+        frame['in_app'] = True
+
+    framework_frames = []
+    for module, function, context_line in rand.sample(FRAMEWORK_FRAMES, rand.randint(1, len(FRAMEWORK_FRAMES))):
+        if rand.random() < 0.3:
+            context_line += '  # <object at 0x%x>' % (rand.randint(0x7f0000000000, 0x7fffffffffff),)
+        framework_frames.append({
+            'filename': module.replace('.', '/') + '.py',
+            'module': module,
+            'function': function,
+            'context_line': context_line,
+            'lineno': rand.randint(1, 500),
+            'in_app': False,
+        })
+
+    data['sentry.interfaces.Stacktrace']['frames'] = framework_frames + app_frames
+    return data
+
+
+PAYLOADS = SortedDict((
+    ('python', make_python_event),
+    ('javascript', make_javascript_event),
+))
+
+
+def encode_payload(data):
+    """
+    Encodes an event the way the clients send it to the store endpoint.
+    """
+    return base64.b64encode(json.dumps(data).encode('zlib'))
@@ -6,9 +6,17 @@ sentry.buffer.base
 :license: BSD, see LICENSE for more details.
 """
 
-from django.db.models import F
+from __future__ import with_statement
+
+import operator
+
+from django.db import connections, router, transaction
+from django.db.models import AutoField, F, Model, Q
+from django.utils.datastructures import SortedDict
+from hashlib import md5
 from sentry.signals import buffer_incr_complete
-from sentry.tasks.process_buffer import process_incr
+from sentry.tasks.process_buffer import process_incr, process_incr_many
+from sentry.utils.db import get_db_engine
 from sentry.utils.queue import maybe_async
 
 
@@ -28,6 +36,22 @@ class Buffer(object):
     def __init__(self, delay=5, **options):
         self.delay = delay
 
+    def _map_column(self, model, column, value):
+        if isinstance(value, Model):
+            value = value.pk
+        else:
+            value = unicode(value)
+        return value
+
+    def _make_filters_key(self, model, filters):
+        """
+        Returns a hash which uniquely identifies the row matched by ``filters``.
+        """
+        return md5('&'.join(
+            '%s=%s' % (k, self._map_column(model, k, v))
+            for k, v in sorted(filters.iteritems())
+        )).hexdigest()
+
     def incr(self, model, columns, filters, extra=None):
         """
         >>> incr(Group, columns={'times_seen': 1}, filters={'pk': group.pk})
@@ -39,6 +63,27 @@ class Buffer(object):
             'extra': extra,
         }, countdown=self.delay)
 
+    def incr_many(self, model, rows):
+        """
+        Increments several rows of ``model`` at once, where ``rows`` is a list
+        of ``(columns, filters, extra)`` tuples.
+
+        >>> incr_many(Group, [({'times_seen': 1}, {'pk': group.pk}, None)])
+        """
+        if not rows:
+            return
+        maybe_async(process_incr_many, kwargs={
+            'model': model,
+            'rows': rows,
+        }, countdown=self.delay)
+
+    def process_pending(self):
+        """
+        Processes any increments which the buffer is holding on to. This is
+        called periodically by the ``process_pending`` task.
+        """
+        pass
+
     def process(self, model, columns, filters, extra=None):
         update_kwargs = dict((c, F(c) + v) for c, v in columns.iteritems())
         if extra:
@@ -57,3 +102,195 @@ class Buffer(object):
             created=created,
             sender=model,
         )
+
+    def process_many(self, model, rows):
+        """
+        Applies a batch of increments to ``model``, where ``rows`` is a list of
+        ``(columns, filters, extra)`` tuples.
+
+        Rows which share the same filters are combined first. If the filters
+        match one of the model's unique constraints, PostgreSQL (9.5 or newer)
+        and MySQL apply the whole batch with a single multi-row upsert;
+        otherwise each row is applied in turn.
+        """
+        batch = self._merge_rows(rows)
+        if not batch:
+            return
+
+        using = router.db_for_write(model)
+        engine = get_db_engine(using)
+
+        created = None
+        if len(batch) > 1 and self._can_upsert(using, engine):
+            unique_fields = self._get_upsert_fields(model, batch)
+            if unique_fields:
+                created = self._upsert(model, batch, unique_fields, using, engine)
+
+        if created is None:
+            for columns, filters, extra in batch:
+                # We call the base implementation explicitly, as subclasses
+                # use process() to fetch the values they're holding on to
+                Buffer.process(self, model, columns, filters, extra)
+            return
+
+        for (columns, filters, extra), was_created in zip(batch, created):
+            buffer_incr_complete.send_robust(
+                model=model,
+                columns=columns,
+                filters=filters,
+                extra=extra,
+                created=was_created,
+                sender=model,
+            )
+
+    def _can_upsert(self, using, engine):
+        if engine.startswith('mysql'):
+            return True
+        if engine.startswith('postgres'):
+            connection = connections[using]
+            # the server's version is only known once we're connected
+            connection.cursor()
+            # ON CONFLICT was added in PostgreSQL 9.5
+            return connection.pg_version >= 90500
+        return False
+
+    def _merge_rows(self, rows):
+        """
+        Combines rows with identical filters, summing their columns and
+        keeping the most recent value of each extra.
+        """
+        merged = SortedDict()
+        for columns, filters, extra in rows:
+            key = tuple(sorted(
+                (k, v.pk if isinstance(v, Model) else v)
+                for k, v in filters.iteritems()
+            ))
+            if key not in merged:
+                merged[key] = (dict(columns), filters, dict(extra or {}))
+                continue
+
+            m_columns, _, m_extra = merged[key]
+            for column, amount in columns.iteritems():
+                m_columns[column] = m_columns.get(column, 0) + amount
+            if extra:
+                m_extra.update(extra)
+
+        return [(c, f, e or None) for c, f, e in merged.itervalues()]
+
+    def _get_upsert_fields(self, model, batch):
+        """
+        Returns the fields of the unique constraint which the batch's filters
+        correspond to, or None if the batch can't be applied as an upsert.
+        """
+        filter_keys = set(batch[0][1])
+        extra_keys = set(batch[0][2] or ())
+
+        for columns, filters, extra in batch:
+            if set(filters) != filter_keys or set(extra or ()) != extra_keys:
+                return None
+            # NULLs never conflict, so they would always be inserted
+            if any(v is None for v in filters.itervalues()):
+                return None
+            # query expressions can only be applied by create_or_update
+            if extra and any(hasattr(v, 'evaluate') or hasattr(v, 'prepare_database_save')
+                             for v in extra.itervalues()):
+                return None
+
+        opts = model._meta
+        for field_names in opts.unique_together:
+            if set(field_names) == filter_keys:
+                return [opts.get_field(n) for n in field_names]
+        return None
+
+    def _get_upsert_sql(self, model, batch, unique_fields, connection, engine):
+        """
+        Returns the (sql, params) of a multi-row upsert for ``batch``.
+
+        New rows get the model's defaults plus each increment, and existing rows
+        are incremented in place.
+        """
+        qn = connection.ops.quote_name
+        opts = model._meta
+        table = qn(opts.db_table)
+
+        column_names = sorted(set(c for columns, _, _ in batch for c in columns))
+        extra_names = sorted(batch[0][2] or ())
+
+        fields = [f for f in opts.local_fields if not isinstance(f, AutoField)]
+
+        params = []
+        for columns, filters, extra in batch:
+            kwargs = dict(filters)
+            if extra:
+                kwargs.update(extra)
+            obj = model(**kwargs)
+            for name in column_names:
+                setattr(obj, name, getattr(obj, name) + columns.get(name, 0))
+            params.extend(
+                f.get_db_prep_save(f.pre_save(obj, True), connection=connection)
+                for f in fields
+            )
+
+        sql = 'INSERT INTO %s (%s) VALUES %s' % (
+            table,
+            ', '.join(qn(f.column) for f in fields),
+            ', '.join(['(%s)' % ', '.join(['%s'] * len(fields))] * len(batch)),
+        )
+
+        counters = [qn(opts.get_field(n).column) for n in column_names]
+        extras = [qn(opts.get_field(n).column) for n in extra_names]
+
+        if engine.startswith('postgres'):
+            updates = ['%s = %s.%s + EXCLUDED.%s' % (c, table, c, c) for c in counters]
+            updates.extend('%s = EXCLUDED.%s' % (c, c) for c in extras)
+            unique_columns = ', '.join(qn(f.column) for f in unique_fields)
+            # xmax is only zero for rows which were freshly inserted
+            sql += ' ON CONFLICT (%s) DO UPDATE SET %s RETURNING %s, (xmax = 0)' % (
+                unique_columns,
+                ', '.join(updates),
+                unique_columns,
+            )
+        else:
+            updates = ['%s = %s + VALUES(%s)' % (c, c, c) for c in counters]
+            updates.extend('%s = VALUES(%s)' % (c, c) for c in extras)
+            sql += ' ON DUPLICATE KEY UPDATE %s' % (', '.join(updates),)
+
+        return sql, params
+
+    def _upsert(self, model, batch, unique_fields, using, engine):
+        """
+        Applies ``batch`` in a single statement, returning a list describing
+        whether each row was created.
+        """
+        connection = connections[using]
+        sql, params = self._get_upsert_sql(model, batch, unique_fields, connection, engine)
+
+        def make_key(values):
+            return tuple(
+                f.get_db_prep_value(v.pk if isinstance(v, Model) else v, connection=connection)
+                for f, v in zip(unique_fields, values)
+            )
+
+        names = [f.name for f in unique_fields]
+        keys = [make_key([filters[n] for n in names]) for _, filters, _ in batch]
+
+        with transaction.commit_on_success(using=using):
+            cursor = connection.cursor()
+            if engine.startswith('postgres'):
+                # RETURNING doesn't guarantee any order, so the rows are
+                # matched up by their unique fields
+                cursor.execute(sql, params)
+                created = dict((make_key(r[:-1]), bool(r[-1])) for r in cursor.fetchall())
+                return [created.get(k, False) for k in keys]
+
+            # MySQL can't tell us which rows were inserted, so we look up the
+            # ones which already exist beforehand. Locking them (and, with
+            # InnoDB, the gaps where missing ones would go) stops a concurrent
+            # flush from inserting them in the meantime.
+            existing = set(make_key(v) for v in model.objects.using(using).select_for_update().filter(
+                reduce(operator.or_, [Q(**filters) for _, filters, _ in batch])
+            ).values_list(*names))
+
+            cursor.execute(sql, params)
+
+            return [k not in existing for k in keys]
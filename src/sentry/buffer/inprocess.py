@@ -0,0 +1,131 @@
+"""
+sentry.buffer.inprocess
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import with_statement
+
+import atexit
+import logging
+import os
+import threading
+
+from django.utils.datastructures import SortedDict
+from sentry.buffer import Buffer
+
+logger = logging.getLogger('sentry.errors')
+
+
+class InProcessBuffer(Buffer):
+    """
+    Coalesces increments in memory, and flushes the combined totals from a
+    background thread every ``interval`` seconds, or as soon as ``max_keys``
+    distinct counters are pending. Anything left over is flushed when the
+    process exits.
+
+    Each process keeps its own buffer, so this is best suited to single node
+    deployments which don't have Redis available.
+    """
+    def __init__(self, interval=5, max_keys=1000, **options):
+        super(InProcessBuffer, self).__init__(**options)
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = SortedDict()
+        self._pid = os.getpid()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def _make_key(self, model, filters):
+        return '%s:%s' % (model._meta, self._make_filters_key(model, filters))
+
+    def incr(self, model, columns, filters, extra=None):
+        key = self._make_key(model, filters)
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # We've been forked, and whatever is pending belongs to our parent
+                self._pid = os.getpid()
+                self._pending = SortedDict()
+                self._thread = None
+
+            if key not in self._pending:
+                self._pending[key] = (model, dict(columns), filters, dict(extra or {}))
+            else:
+                _, m_columns, _, m_extra = self._pending[key]
+                for column, amount in columns.iteritems():
+                    m_columns[column] = m_columns.get(column, 0) + amount
+                if extra:
+                    m_extra.update(extra)
+
+            num_pending = len(self._pending)
+
+        self._ensure_thread()
+
+        if num_pending >= self.max_keys:
+            self._wakeup.set()
+
+    def incr_many(self, model, rows):
+        for columns, filters, extra in rows:
+            self.incr(model, columns, filters, extra)
+
+    def flush(self):
+        """
+        Writes every pending counter to the database.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, SortedDict()
+
+        rows_by_model = SortedDict()
+        for model, columns, filters, extra in pending.itervalues():
+            rows_by_model.setdefault(model, []).append((columns, filters, extra or None))
+
+        for model, rows in rows_by_model.iteritems():
+            try:
+                self.process_many(model, rows)
+            except Exception, e:
+                logger.exception(u'Unable to process buffer: %s', e)
+
+    def close(self):
+        """
+        Stops the background thread and flushes anything still pending.
+        """
+        self._closed = True
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(self.interval)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._closed:
+            return
+
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='sentry.buffer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._closed:
+                # close() takes care of the final flush
+                return
+            try:
+                self.flush()
+            except Exception, e:
+                logger.exception(u'Unable to flush buffer: %s', e)
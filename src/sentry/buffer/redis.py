@@ -8,15 +8,33 @@ sentry.buffer.redis
 
 from __future__ import with_statement
 
+import logging
+
 from django.db import models
-from hashlib import md5
+from django.db.models.fields import FieldDoesNotExist
+from django.utils.datastructures import SortedDict
 from nydus.db import create_cluster
 from sentry.buffer import Buffer
-from sentry.utils.compat import pickle
+from sentry.tasks.process_buffer import process_pending
+from sentry.utils import codec
+from sentry.utils.queue import can_queue
+
+logger = logging.getLogger('sentry.errors')
 
 
 class RedisBuffer(Buffer):
+    """
+    Stores pending increments in Redis.
+
+    When the queue is enabled, each counter which is incremented is recorded in
+    a set of pending keys rather than firing off a task for every increment.
+    The ``process_pending`` task (run by celerybeat) drains that set, so queue
+    traffic scales with the number of distinct counters rather than the number
+    of events.
+    """
     key_expire = 60 * 60  # 1 hour
+    pending_key = 'sentry.buffer:pending'
+    pending_batch_size = 100
 
     def __init__(self, hosts=None, router='nydus.db.routers.keyvalue.PartitionRouter', **options):
         super(RedisBuffer, self).__init__(**options)
@@ -30,65 +48,177 @@ class RedisBuffer(Buffer):
             'hosts': hosts,
         })
 
-    def _map_column(self, model, column, value):
-        if isinstance(value, models.Model):
-            value = value.pk
+    def _make_key(self, model, filters):
+        """
+        Returns the key of the Redis hash which holds the pending columns and
+        extra values for the model given filters.
+        """
+        return '%s:%s' % (model._meta, self._make_filters_key(model, filters))
+
+    def _pipe_incr(self, pipe, key, model, columns, filters, extra=None):
+        # Counters and extra values share a single hash, whose fields are
+        # prefixed by their type. The hash also carries the (serialized)
+        # filters, so that the sweeper can tell which row it belongs to. The
+        # pipeline must be a transaction, otherwise the sweeper could drain
+        # the counters without the filters and discard them.
+        pipe.hsetnx(key, 'm', self._dump_filters(model, filters))
+        for column, amount in columns.iteritems():
+            pipe.hincrby(key, 'i+' + column, amount)
+        if extra:
+            for column, value in extra.iteritems():
+                pipe.hset(key, 'e+' + column, codec.encode(value))
+        pipe.expire(key, self.key_expire)
+
+    def incr(self, model, columns, filters, extra=None):
+        key = self._make_key(model, filters)
+
+        pipe = self.conn.get_conn(key).pipeline(transaction=True)
+        self._pipe_incr(pipe, key, model, columns, filters, extra)
+        pipe.execute()
+
+        if can_queue(process_pending):
+            self.conn.sadd(self.pending_key, key)
         else:
-            value = unicode(value)
-        return value
+            super(RedisBuffer, self).incr(model, columns, filters, extra)
 
-    def _make_key(self, model, filters, column):
+    def incr_many(self, model, rows):
+        if not rows:
+            return
+
+        if not can_queue(process_pending):
+            # without the sweeper the rows are applied by a single task
+            super(RedisBuffer, self).incr_many(model, rows)
+            return
+
+        # one pipeline for each of the hosts the keys are routed to
+        pipes = SortedDict()
+        keys = []
+        for columns, filters, extra in rows:
+            key = self._make_key(model, filters)
+            conn = self.conn.get_conn(key)
+            if conn not in pipes:
+                pipes[conn] = conn.pipeline(transaction=True)
+            self._pipe_incr(pipes[conn], key, model, columns, filters, extra)
+            keys.append(key)
+
+        for pipe in pipes.itervalues():
+            pipe.execute()
+
+        self.conn.sadd(self.pending_key, *keys)
+
+    def _dump_filters(self, model, filters):
         """
-        Returns a Redis-compatible key for the model given filters.
+        Serializes the model and filters, reducing related instances to their
+        primary keys.
         """
-        return '%s:%s:%s' % (model._meta,
-            md5('&'.join('%s=%s' % (k, self._map_column(model, k, v)) for k, v in sorted(filters.iteritems()))).hexdigest(),
-            column)
+        values = []
+        for key, value in sorted(filters.iteritems()):
+            if isinstance(value, models.Model):
+                value = value.pk
+            values.append((key, value))
 
-    def _make_extra_key(self, model, filters):
-        return '%s:extra:%s' % (model._meta,
-            md5('&'.join('%s=%s' % (k, self._map_column(model, k, v)) for k, v in sorted(filters.iteritems()))).hexdigest())
+        return codec.encode((
+            model._meta.app_label,
+            model._meta.object_name,
+            tuple(values),
+        ))
 
-    def incr(self, model, columns, filters, extra=None):
-        with self.conn.map() as conn:
-            for column, amount in columns.iteritems():
-                key = self._make_key(model, filters, column)
-                conn.incr(key, amount)
-                conn.expire(key, self.key_expire)
-
-            # Store extra in a hashmap so it can easily be removed
-            if extra:
-                key = self._make_extra_key(model, filters)
-                for column, value in extra.iteritems():
-                    conn.hset(key, column, pickle.dumps(value))
-                    conn.expire(key, self.key_expire)
-        super(RedisBuffer, self).incr(model, columns, filters, extra)
+    def _load_filters(self, value):
+        """
+        The inverse of ``_dump_filters``. Returns a tuple of (model, filters).
 
-    def process(self, model, columns, filters, extra=None):
+        Related instances are rebuilt as unsaved stubs holding only their
+        primary key.
+        """
+        app_label, object_name, values = codec.decode(value)
+
+        model = models.get_model(app_label, object_name)
+
+        filters = {}
+        for key, value in values:
+            try:
+                field = model._meta.get_field(key)
+            except FieldDoesNotExist:
+                pass
+            else:
+                if isinstance(field, models.ForeignKey) and value is not None:
+                    rel_model = field.rel.to
+                    value = rel_model(**{rel_model._meta.pk.attname: value})
+            filters[key] = value
+
+        return model, filters
+
+    def _drain(self, key):
+        """
+        Atomically fetches and removes the hash stored at ``key``.
+        """
+        pipe = self.conn.get_conn(key).pipeline(transaction=True)
+        pipe.hgetall(key)
+        pipe.delete(key)
+        values, _ = pipe.execute()
+        return values
+
+    def _parse_values(self, values, extra=None):
+        """
+        Splits a drained hash into a tuple of (columns, extra).
+        """
         results = {}
-        with self.conn.map() as conn:
-            for column, amount in columns.iteritems():
-                key = self._make_key(model, filters, column)
-                results[column] = conn.getset(key, 0)
-                conn.expire(key, 60)  # drop expiration as it was just emptied
-
-            hash_key = self._make_extra_key(model, filters)
-            extra_results = conn.hgetall(hash_key)
-            conn.delete(hash_key)
-
-        # We combine the stored extra values with whatever was passed.
-        # This ensures that static values get updated to their latest value,
-        # and dynamic values (usually query expressions) are still dynamic.
-        if extra_results:
-            if not extra:
-                extra = {}
-            for key, value in extra_results.iteritems():
+        for field, value in values.iteritems():
+            if field.startswith('i+'):
+                # Filter out empty or zero'd results to avoid a potentially unnescesary update
+                if int(value or 0) > 0:
+                    results[field[2:]] = int(value)
+            elif field.startswith('e+'):
+                # We combine the stored extra values with whatever was passed.
+                # This ensures that static values get updated to their latest value,
+                # and dynamic values (usually query expressions) are still dynamic.
                 if not value:
                     continue
-                extra[key] = pickle.loads(str(value))
+                if extra is None:
+                    extra = {}
+                extra[field[2:]] = codec.decode(value)
+        return results, extra
+
+    def process_pending(self):
+        conn = self.conn.get_conn(self.pending_key)
+
+        # Only drain what is pending right now, so a steady stream of new
+        # increments can't keep us running forever
+        remaining = conn.scard(self.pending_key)
+        while remaining > 0:
+            keys = conn.srandmember(self.pending_key, min(remaining, self.pending_batch_size))
+            if not keys:
+                break
+            remaining -= len(keys)
+
+            # Remove the keys before processing them; anything incremented
+            # after this point is re-added and picked up by the next run
+            conn.srem(self.pending_key, *keys)
 
-        # Filter out empty or zero'd results to avoid a potentially unnescesary update
-        results = dict((k, int(v)) for k, v in results.iteritems() if int(v or 0) > 0)
+            rows_by_model = SortedDict()
+            for key in keys:
+                try:
+                    values = self._drain(key)
+                    if 'm' not in values:
+                        # already processed
+                        continue
+                    model, filters = self._load_filters(values['m'])
+                    results, extra = self._parse_values(values)
+                except Exception, e:
+                    logger.exception(u'Unable to process buffer: %s', e)
+                    continue
+                if results:
+                    rows_by_model.setdefault(model, []).append((results, filters, extra))
+
+            for model, rows in rows_by_model.iteritems():
+                try:
+                    self.process_many(model, rows)
+                except Exception, e:
+                    logger.exception(u'Unable to process buffer: %s', e)
+
+    def process(self, model, columns, filters, extra=None):
+        values = self._drain(self._make_key(model, filters))
+        results, extra = self._parse_values(values, extra)
         if not results:
             return
         super(RedisBuffer, self).process(model, results, filters, extra)
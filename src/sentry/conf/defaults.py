@@ -88,6 +88,12 @@ MAIL_EXCLUDE_LOGGERS = []
 # accuracy provided.
 MINUTE_NORMALIZATION = 15
 
+# The number of days per-minute counts are kept for by the cleanup task (if
+# it's run with more days), as older counts are covered by hourly and daily
+# rollups (0 keeps them as long as everything else). The stream's date range
+# filter still reads per-minute counts, so it won't match older events.
+MINUTE_COUNT_DAYS = 0
+
 # The number of events to display per page
 MESSAGES_PER_PAGE = 15
 
@@ -102,6 +108,20 @@ WEB_OPTIONS = {
 UDP_HOST = 'localhost'
 UDP_PORT = 9001
 
+# The size (in bytes) of the UDP socket's receive buffer, or None to use the
+# system default. Datagrams which arrive while it's full are dropped.
+UDP_RECV_BUFFER = None
+
+# Queue accepted events in batches of up to this many events (0 queues each
+# event as it arrives)
+UDP_BATCH_SIZE = 0
+
+# The longest (in seconds) an accepted event waits for its batch to fill
+UDP_BATCH_INTERVAL = 1
+
+# The number of processes which share the UDP port (requires SO_REUSEPORT)
+UDP_PROCESSES = 1
+
 # Queue (Kombu)
 QUEUE = {
     'transport': 'kombu.transport.django.Transport',
@@ -131,10 +151,13 @@ ALLOW_REGISTRATION = True
 # selectively enable the queue:
 # USE_QUEUE = (
 #     'sentry.tasks.store.store_event',
+#     'sentry.tasks.store.store_events',
 #     'sentry.tasks.cleanup.cleanup',
 #     'sentry.tasks.index.index_event',
 #     'sentry.tasks.post_process.post_process_group',
 #     'sentry.tasks.process_buffer.process_incr',
+#     'sentry.tasks.process_buffer.process_incr_many',
+#     'sentry.tasks.process_buffer.process_pending',
 # )
 USE_QUEUE = False
 
@@ -166,10 +189,61 @@ CACHE_BACKEND = 'dummy://'
 # The maximum number of events which can be requested as JSON
 MAX_JSON_RESULTS = 1000
 
+# The maximum number of events which can be submitted in a single batch
+MAX_BATCH_SIZE = 100
+
 # Buffer backend to use
 BUFFER = 'sentry.buffer.Buffer'
 BUFFER_OPTIONS = {}
 
+# Lock backend to use
+LOCK_BACKEND = 'sentry.locks.CacheLockBackend'
+LOCK_BACKEND_OPTIONS = {}
+
+# Quota backend to use
+QUOTAS = 'sentry.quotas.Quota'
+QUOTA_OPTIONS = {}
+
+# Tag sketch backend to use (see sentry.sketches)
+TAG_SKETCHES = 'sentry.sketches.TagSketches'
+TAG_SKETCH_OPTIONS = {}
+
+# Tag keys whose values are only counted approximately by the tag sketch
+# backend, rather than stored exactly, which can be overridden by each project
+SKETCHED_TAGS = ()
+
+# Unique user counting backend to use (see sentry.uniques)
+UNIQUE_USERS = 'sentry.uniques.UniqueUserCounter'
+UNIQUE_USERS_OPTIONS = {}
+
+# The number of events a project may store per minute (0 is unlimited), which
+# can be overridden by each project
+PROJECT_RATE_LIMIT = 0
+
+# The number of events which may be stored with a single key per minute (0 is
+# unlimited)
+KEY_RATE_LIMIT = 0
+
+# How long (in seconds) event ids are remembered so that resent events can be
+# dropped before they're stored (0 disables this)
+DEDUPE_TIMEOUT = 300
+
+# The grouping strategy used for projects which haven't chosen one (see
+# sentry.grouping)
+GROUPING_STRATEGY = 'default'
+
+# Interfaces which events may contain (additional interfaces can also be
+# registered with ``sentry.interfaces.register``)
+INTERFACES = (
+    'sentry.interfaces.Message',
+    'sentry.interfaces.Query',
+    'sentry.interfaces.Stacktrace',
+    'sentry.interfaces.Exception',
+    'sentry.interfaces.Http',
+    'sentry.interfaces.Template',
+    'sentry.interfaces.User',
+)
+
 # Auth engines and the settings required for them to be listed
 AUTH_PROVIDERS = {
     'twitter': ('TWITTER_CONSUMER_KEY', 'TWITTER_CONSUMER_SECRET'),
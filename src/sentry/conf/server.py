@@ -16,6 +16,7 @@ import os.path
 import socket
 import sys
 import urlparse
+from datetime import timedelta
 
 DEBUG = False
 TEMPLATE_DEBUG = True
@@ -262,6 +263,14 @@ CELERY_SEND_EVENTS = False
 CELERY_RESULT_BACKEND = None
 CELERY_TASK_RESULT_EXPIRES = 1
 
+# Periodic tasks, which are run by celerybeat (``sentry celeryd -B``)
+CELERYBEAT_SCHEDULE = {
+    'process-pending-buffers': {
+        'task': 'sentry.tasks.process_buffer.process_pending',
+        'schedule': timedelta(seconds=5),
+    },
+}
+
 # Sentry and Raven configuration
 
 SENTRY_PUBLIC = False
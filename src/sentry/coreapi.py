@@ -12,20 +12,27 @@ sentry.coreapi
 from datetime import datetime
 import base64
 import logging
+import math
 import uuid
 import zlib
 
 from django.contrib.auth.models import User
+from django.utils.datastructures import SortedDict
 from django.utils.encoding import smart_str
+from django.utils.functional import SimpleLazyObject
 
+from sentry import app
 from sentry.conf import settings
 from sentry.exceptions import InvalidInterface, InvalidData, InvalidTimestamp
+from sentry.grouping import get_strategy_for_project
+from sentry.interfaces import registry as interfaces
+from sentry.manager import get_checksum_from_interfaces
 from sentry.models import Project, ProjectKey, TeamMember, Team
 from sentry.plugins import plugins
-from sentry.tasks.store import store_event
-from sentry.utils import is_float, json
+from sentry.tasks.store import store_event, store_events
+from sentry.utils import is_float, json, metrics
 from sentry.utils.auth import parse_auth_header
-from sentry.utils.imports import import_string
+from sentry.utils.cache import cache
 from sentry.utils.queue import maybe_delay
 
 logger = logging.getLogger('sentry.errors.coreapi')
@@ -74,6 +81,21 @@ class APITimestampExpired(APIError):
     http_status = 410
 
 
+class APIBatchTooLarge(APIError):
+    http_status = 413
+    msg = 'Too many events in batch for the rate limit'
+
+
+class APIRateLimited(APIError):
+    http_status = 429
+    msg = 'Creation of this event was denied due to rate limiting'
+
+    def __init__(self, retry_after, msg=None):
+        super(APIRateLimited, self).__init__(msg)
+        # Retry-After only allows whole seconds
+        self.retry_after = int(math.ceil(retry_after))
+
+
 def extract_auth_vars(request):
     if request.META.get('HTTP_X_SENTRY_AUTH', '').startswith('Sentry'):
         return parse_auth_header(request.META['HTTP_X_SENTRY_AUTH'])
@@ -87,33 +109,53 @@ def project_from_auth_vars(auth_vars):
     api_key = auth_vars.get('sentry_key')
     if not api_key:
         raise APIForbidden('Invalid api key')
-    try:
-        pk = ProjectKey.objects.get_from_cache(public_key=api_key)
-    except ProjectKey.DoesNotExist:
+
+    # everything but the project is resolved (and cached) up front, so that
+    # this doesn't hit the database once the cache is warm
+    context = ProjectKey.objects.get_auth_context(api_key)
+    if context is None:
         raise APIForbidden('Invalid api key')
 
-    if pk.secret_key != auth_vars.get('sentry_secret', pk.secret_key):
+    if context['secret_key'] != auth_vars.get('sentry_secret', context['secret_key']):
         raise APIForbidden('Invalid api key')
 
-    project = Project.objects.get_from_cache(pk=pk.project_id)
+    project = Project.objects.get_from_cache(pk=context['project_id'])
 
-    if pk.user:
-        try:
-            team = Team.objects.get_from_cache(pk=project.team_id)
-        except Team.DoesNotExist:
-            raise APIUnauthorized('Member does not have access to project')
+    if context['error']:
+        raise APIUnauthorized(context['error'])
 
-        try:
-            TeamMember.objects.get(team=team, user=pk.user, is_active=True)
-        except TeamMember.DoesNotExist:
-            raise APIUnauthorized('Member does not have access to project')
+    if not context['user_id']:
+        return project, None
 
-        # We have to refetch this as it may have been catched
-        pk.user = User.objects.get(id=pk.user_id)
-        if not pk.user.is_active:
-            raise APIUnauthorized('Account is not active')
+    if not context['is_active']:
+        raise APIUnauthorized('Account is not active')
+
+    # most requests never look at the user, so only fetch it if they do
+    user_id = context['user_id']
+    return project, SimpleLazyObject(lambda: User.objects.get(id=user_id))
+
+
+def check_rate_limit(project, key=None, count=1):
+    """
+    Raises ``APIRateLimited`` if ``count`` more events would put ``project``
+    (or the public key ``key``) over its quota, recording the dropped events.
 
-    return project, pk.user
+    Raises ``APIBatchTooLarge`` if the quota can never allow ``count`` events
+    at once, as retrying them later wouldn't help.
+    """
+    if count > 1:
+        capacity = app.quotas.get_capacity(project, key)
+        if capacity and count > capacity:
+            raise APIBatchTooLarge('Too many events in batch for the rate limit (%d > %d)' % (count, capacity))
+
+    retry_after = app.quotas.is_rate_limited(project, key, count)
+    if not retry_after:
+        app.quotas.maybe_flush_dropped()
+        return
+
+    metrics.incr('quota.dropped', count)
+    app.quotas.record_dropped(project, count)
+    raise APIRateLimited(retry_after)
 
 
 def project_from_api_key_and_id(api_key, project_id):
@@ -219,6 +261,32 @@ def safely_load_json_string(json_string):
     return dict((smart_str(k), v) for k, v in obj.iteritems())
 
 
+def safely_load_json_batch(json_string):
+    """
+    Loads a list of events from a batch payload.
+
+    Entries which are not mappings are passed through untouched so the caller
+    can reject them individually rather than failing the whole batch.
+    """
+    try:
+        obj = json.loads(json_string)
+    except Exception, e:
+        # This error should be caught as it suggests that there's a
+        # bug somewhere in the client's code.
+        logger.exception('Bad data received')
+        raise APIForbidden('Bad data reconstructing object (%s, %s)' % (
+            e.__class__.__name__, e))
+
+    if not isinstance(obj, list):
+        raise APIForbidden('Bad data reconstructing object (expected a list of events)')
+
+    # XXX: ensure keys are coerced to strings
+    return [
+        dict((smart_str(k), v) for k, v in o.iteritems()) if isinstance(o, dict) else o
+        for o in obj
+    ]
+
+
 def ensure_valid_project_id(desired_project, data):
     # Confirm they're using either the master key, or their specified project
     # matches with the signed project.
@@ -280,6 +348,7 @@ def validate_data(project, data, client=None):
     if data.get('modules') and type(data['modules']) != dict:
         raise InvalidData('Invalid type for \'modules\': must be a mapping')
 
+    interface_list = []
     for k, v in data.items():
         if k in RESERVED_FIELDS:
             continue
@@ -293,14 +362,16 @@ def validate_data(project, data, client=None):
             continue
 
         try:
-            interface = import_string(k)
-        except (ImportError, AttributeError), e:
-            raise InvalidInterface('%r is not a valid interface name: %s' % (k, e))
+            interface = interfaces.get(k)
+        except KeyError:
+            raise InvalidInterface('%r is not a valid interface name' % (k,))
 
         try:
-            data[k] = interface(**v).serialize()
+            inst = interface(**v)
+            data[k] = inst.serialize()
         except Exception, e:
             raise InvalidData('Unable to validate interface, %r: %s' % (k, e))
+        interface_list.append((k, inst))
 
     level = data.get('level') or settings.DEFAULT_LOG_LEVEL
     if isinstance(level, basestring) and not level.isdigit():
@@ -310,8 +381,68 @@ def validate_data(project, data, client=None):
         except KeyError:
             raise InvalidData('Invalid logging level specified: %r' % level)
 
+    # Compute the grouping checksum while we still have the interfaces at
+    # hand, rather than having the worker rebuild them
+    if not data.get('checksum'):
+        interface_map = SortedDict(sorted(interface_list, key=lambda x: x[1].get_score(), reverse=True))
+        try:
+            data['checksum'] = get_checksum_from_interfaces(
+                interface_map, data['message'], get_strategy_for_project(project))
+        except Exception:
+            # leave it to the worker
+            logger.exception('Unable to compute checksum')
+
     return data
 
 
+def _get_dedupe_key(data):
+    return 'sentry:event:%s:%s' % (data['project'], data['event_id'])
+
+
+def is_duplicate_event(data):
+    """
+    Records the event's id, returning True if the same project already sent an
+    event with that id in the last ``DEDUPE_TIMEOUT`` seconds (e.g. a client
+    retrying a request which timed out).
+    """
+    if not settings.DEDUPE_TIMEOUT:
+        return False
+
+    if cache.add(_get_dedupe_key(data), 1, settings.DEDUPE_TIMEOUT):
+        return False
+
+    metrics.incr('events.duplicate')
+    logger.info('Dropped duplicate event from project %s (id=%s)', data['project'], data['event_id'])
+    return True
+
+
+def forget_events(data_list):
+    """
+    Forgets the ids recorded by ``is_duplicate_event``, so that the events are
+    accepted if they're sent again (e.g. because they couldn't be queued).
+    """
+    if not settings.DEDUPE_TIMEOUT:
+        return
+
+    cache.delete_many([_get_dedupe_key(d) for d in data_list])
+
+
 def insert_data_to_database(data):
-    maybe_delay(store_event, data=data)
+    if is_duplicate_event(data):
+        return
+    try:
+        maybe_delay(store_event, data=data)
+    except Exception:
+        forget_events([data])
+        raise
+
+
+def insert_batch_to_database(data_list):
+    data_list = [d for d in data_list if not is_duplicate_event(d)]
+    if not data_list:
+        return
+    try:
+        maybe_delay(store_events, data_list=data_list)
+    except Exception:
+        forget_events(data_list)
+        raise
@@ -0,0 +1,166 @@
+"""
+sentry.grouping
+~~~~~~~~~~~~~~~
+
+Grouping strategies decide which parts of an event make up the checksum
+that events are grouped by.
+
+The strategy used for a project is chosen with its ``sentry:grouping_strategy``
+option, falling back to ``SENTRY_GROUPING_STRATEGY``.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import hashlib
+import logging
+import re
+
+from django.utils.datastructures import SortedDict
+from django.utils.translation import ugettext_lazy as _
+from raven.utils.encoding import to_string
+
+from sentry.conf import settings
+from sentry.utils.cache import cache
+
+OPTION_KEY = 'sentry:grouping_strategy'
+
+STRATEGY_CACHE_TTL = 60 * 60
+
+# Memory addresses (e.g. in reprs) differ between processes
+_address_re = re.compile(r'\b0x[0-9a-fA-F]+\b')
+_whitespace_re = re.compile(r'\s+')
+
+
+class GroupingStrategy(object):
+    """
+    The default strategy, which hashes the composite hash of the highest
+    scoring interface that provides one, or otherwise the message.
+    """
+    name = 'default'
+    title = _('Default')
+
+    def get_interface_hash(self, interface, interfaces):
+        return interface.get_composite_hash(interfaces=interfaces)
+
+    def get_hash(self, interfaces, message):
+        """
+        Returns the list of values which identify the event, given a mapping
+        of its interfaces (ordered by score) and its message.
+        """
+        for interface in interfaces.itervalues():
+            result = self.get_interface_hash(interface, interfaces)
+            if result:
+                return result
+        return [message]
+
+    def get_checksum(self, interfaces, message):
+        hash = hashlib.md5()
+        for r in self.get_hash(interfaces, message):
+            hash.update(to_string(r))
+        return hash.hexdigest()
+
+
+class InAppGroupingStrategy(GroupingStrategy):
+    """
+    Only considers the frames of a stacktrace which are in the application
+    (unless there are none), and at most ``max_frames`` of the most recent
+    ones. Whitespace and memory addresses are ignored in each frame's source.
+
+    Events which only differ by framework or library frames (for example, a
+    different set of middleware) end up in the same group.
+    """
+    name = 'in_app'
+    title = _('Application frames only')
+    max_frames = 10
+
+    def get_interface_hash(self, interface, interfaces):
+        from sentry.interfaces import Stacktrace
+
+        if not isinstance(interface, Stacktrace):
+            return super(InAppGroupingStrategy, self).get_interface_hash(interface, interfaces)
+
+        frames = [f for f in interface.frames if f.get('in_app')] or interface.frames
+
+        output = []
+        # frames are ordered oldest first
+        for frame in frames[-self.max_frames:]:
+            output.extend(self.get_frame_hash(frame))
+        if output and 'sentry.interfaces.Exception' in interfaces:
+            output.append(interfaces['sentry.interfaces.Exception'].type)
+        return output
+
+    def get_frame_hash(self, frame):
+        output = [frame.get('module') or frame['filename']]
+
+        context_line = frame.get('context_line')
+        if context_line:
+            context_line = _address_re.sub('0x', context_line)
+            context_line = _whitespace_re.sub(' ', context_line).strip()
+        if context_line:
+            output.append(context_line)
+        elif frame.get('function'):
+            output.append(frame['function'])
+        elif frame.get('lineno'):
+            output.append(frame['lineno'])
+        return output
+
+
+strategies = SortedDict()
+
+
+def register(cls):
+    strategies[cls.name] = cls()
+    return cls
+
+
+def unregister(cls):
+    strategies.pop(cls.name, None)
+    return cls
+
+
+def get_choices():
+    return [(name, strategy.title) for name, strategy in strategies.iteritems()]
+
+
+def get_strategy(name=None):
+    """
+    Returns the strategy registered as ``name``, or the default strategy if
+    it's unknown.
+    """
+    if name is None:
+        name = settings.GROUPING_STRATEGY
+
+    try:
+        return strategies[name]
+    except KeyError:
+        logger = logging.getLogger('sentry.errors')
+        logger.error('Unknown grouping strategy: %r', name)
+        return strategies[GroupingStrategy.name]
+
+
+def get_strategy_cache_key(project_id):
+    return 'projectgrouping:%s' % (project_id,)
+
+
+def get_strategy_for_project(project):
+    """
+    Returns the strategy chosen for ``project``, whose name is cached until
+    the option changes.
+    """
+    from sentry.models import ProjectOption
+
+    if project is None:
+        return get_strategy()
+
+    cache_key = get_strategy_cache_key(project.pk)
+    name = cache.get(cache_key)
+    if name is None:
+        # projects without the option are cached as '' so they're remembered too
+        name = ProjectOption.objects.get_value(project, OPTION_KEY, None) or ''
+        cache.set(cache_key, name, STRATEGY_CACHE_TTL)
+    return get_strategy(name or None)
+
+
+register(GroupingStrategy)
+register(InAppGroupingStrategy)
@@ -10,13 +10,17 @@ validated and rendered.
 """
 
 import itertools
+import logging
 import urlparse
 
 from django.http import QueryDict
 from django.utils.translation import ugettext as _
 
 from sentry.app import env
+from sentry.conf import settings
 from sentry.models import UserOption
+from sentry.utils.imports import import_string
+from sentry.utils.managers import InstanceManager
 from sentry.web.helpers import render_to_string
 
 
@@ -775,3 +779,122 @@ class User(Interface):
         return {
             'text': tokens
         }
+
+
+class InterfaceMap(object):
+    """
+    A read-only mapping of the interfaces contained in an event's data.
+
+    Each interface is only instantiated the first time it's accessed, and
+    iterating the map yields interfaces ordered by their score (highest
+    first), which is also only worked out on request. The order is based on
+    the ``score`` of each interface's class, so that it can be determined
+    without instantiating every interface.
+    """
+    def __init__(self, data, mapping=None):
+        if mapping is None:
+            mapping = registry.get_mapping()
+        self._data = data
+        self._classes = dict((k, mapping[k]) for k in data if k in mapping)
+        self._instances = {}
+        self._keys = None
+
+    def __repr__(self):
+        return '<%s: %r>' % (type(self).__name__, self.keys())
+
+    def __contains__(self, key):
+        return key in self._classes
+
+    def __len__(self):
+        return len(self._classes)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        try:
+            return self._instances[key]
+        except KeyError:
+            pass
+        value = self._instances[key] = self._classes[key](**self._data[key])
+        return value
+
+    def get(self, key, default=None):
+        if key not in self._classes:
+            return default
+        return self[key]
+
+    def keys(self):
+        if self._keys is None:
+            self._keys = sorted(self._classes, key=lambda k: self._classes[k].score, reverse=True)
+        return list(self._keys)
+
+    def iterkeys(self):
+        return iter(self.keys())
+
+    def itervalues(self):
+        for key in self.keys():
+            yield self[key]
+
+    def iteritems(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+
+class InterfaceManager(InstanceManager):
+    """
+    Maps the names interfaces are sent under (their import path) to their
+    class.
+
+    Every class is imported once, the first time an interface is looked up,
+    so that unknown names can be rejected without going through the import
+    machinery for each event.
+    """
+    def __init__(self, class_list=None):
+        super(InterfaceManager, self).__init__(class_list, instances=False)
+
+    def __contains__(self, path):
+        return path in self.get_mapping()
+
+    def get_mapping(self):
+        mapping = self.cache
+        if mapping is None:
+            mapping = {}
+            for path in self.get_class_list():
+                try:
+                    mapping[path] = import_string(path)
+                except ImportError:
+                    logger = logging.getLogger('sentry.errors')
+                    logger.exception('Unable to import %s', path)
+            self.cache = mapping
+        return mapping
+
+    def all(self):
+        mapping = self.get_mapping()
+        return [mapping[p] for p in self.get_class_list() if p in mapping]
+
+    def get(self, path):
+        """
+        Returns the class for the given interface name, or raises ``KeyError``
+        if it's not a registered interface.
+        """
+        return self.get_mapping()[path]
+
+    def register(self, cls):
+        self.add('%s.%s' % (cls.__module__, cls.__name__))
+        return cls
+
+    def unregister(self, cls):
+        self.remove('%s.%s' % (cls.__module__, cls.__name__))
+        return cls
+
+
+registry = InterfaceManager(list(settings.INTERFACES))
+register = registry.register
+unregister = registry.unregister
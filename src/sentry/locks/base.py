@@ -0,0 +1,78 @@
+"""
+sentry.locks.base
+~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import time
+import uuid
+
+from sentry.utils.cache import UnableToGetLock
+
+
+class LockBackend(object):
+    """
+    Lock backends hand out short lived, named locks which are shared between
+    every Sentry process. Each acquired lock is identified by a token, so that
+    a holder whose lock has expired can't release somebody else's.
+    """
+    def __init__(self, **options):
+        pass
+
+    def make_token(self):
+        return uuid.uuid4().hex
+
+    def acquire(self, key, timeout):
+        """
+        Blocks for up to ``timeout`` seconds waiting for the lock, which is then
+        held for at most ``timeout`` seconds.
+
+        Returns a tuple of (token, was_locked), where ``was_locked`` indicates
+        that we had to wait for another holder. Raises ``UnableToGetLock`` if
+        the lock could not be acquired in time.
+        """
+        raise NotImplementedError
+
+    def release(self, key, token):
+        """
+        Releases the lock, assuming it is still held with ``token``.
+        """
+        raise NotImplementedError
+
+
+class CacheLockBackend(LockBackend):
+    """
+    Implements locks on top of ``cache.add``.
+
+    The cache can't notify us when a lock is released, so waiters poll with an
+    exponential backoff between ``min_delay`` and ``max_delay`` seconds.
+    """
+    def __init__(self, cache=None, min_delay=0.01, max_delay=0.1, **options):
+        if cache is None:
+            from sentry.utils.cache import cache
+        self.cache = cache
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        super(CacheLockBackend, self).__init__(**options)
+
+    def acquire(self, key, timeout):
+        token = self.make_token()
+        start = time.time()
+        delay = self.min_delay
+        was_locked = False
+        while not self.cache.add(key, token, timeout):
+            was_locked = True
+            remaining = start + timeout - time.time()
+            if remaining <= 0:
+                raise UnableToGetLock('Unable to fetch lock after %.2fs' % (time.time() - start,))
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.max_delay)
+        return token, was_locked
+
+    def release(self, key, token):
+        # XXX: this isn't atomic, but it still stops us from releasing a lock
+        # which expired and was acquired by somebody else
+        if self.cache.get(key) == token:
+            self.cache.delete(key)
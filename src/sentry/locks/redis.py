@@ -0,0 +1,73 @@
+"""
+sentry.locks.redis
+~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+import time
+
+from nydus.db import create_cluster
+from sentry.locks.base import LockBackend
+from sentry.utils.cache import UnableToGetLock
+
+
+class RedisLockBackend(LockBackend):
+    """
+    Implements locks using ``SET NX``. Releasing a lock pushes onto a list
+    which waiters block on with ``BLPOP``, so a waiter wakes up as soon as the
+    lock is free rather than polling for it.
+
+    Requires Redis 2.6.12 or newer.
+    """
+    # Deletes the lock only if we still own it, and wakes up a waiter
+    release_script = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        redis.call('del', KEYS[1])
+        redis.call('lpush', KEYS[2], 1)
+        redis.call('pexpire', KEYS[2], ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    # How long (in seconds) a waiter blocks before checking whether the lock
+    # expired without being released
+    poll_interval = 1
+
+    def __init__(self, hosts=None, router='nydus.db.routers.keyvalue.PartitionRouter', **options):
+        super(RedisLockBackend, self).__init__(**options)
+        if hosts is None:
+            hosts = {
+                0: {}  # localhost / default
+            }
+        self.conn = create_cluster({
+            'engine': 'nydus.db.backends.redis.Redis',
+            'router': router,
+            'hosts': hosts,
+        })
+
+    def _make_release_key(self, key):
+        return '%s:release' % (key,)
+
+    def acquire(self, key, timeout):
+        # the release list must live on the same node as the lock
+        conn = self.conn.get_conn(key)
+        release_key = self._make_release_key(key)
+        token = self.make_token()
+        start = time.time()
+        was_locked = False
+        while not conn.set(key, token, nx=True, px=int(timeout * 1000)):
+            was_locked = True
+            if time.time() - start >= timeout:
+                raise UnableToGetLock('Unable to fetch lock after %.2fs' % (time.time() - start,))
+            conn.blpop([release_key], timeout=self.poll_interval)
+        return token, was_locked
+
+    def release(self, key, token):
+        conn = self.conn.get_conn(key)
+        # the wakeup only needs to outlive anyone still waiting on the lock
+        conn.eval(self.release_script, 2, key, self._make_release_key(key), token, 10 * 1000)
@@ -0,0 +1,44 @@
+"""
+sentry.management.commands.benchmark
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from optparse import make_option
+
+
+class Command(BaseCommand):
+    args = '<benchmark benchmark ...>'
+    help = 'Runs the named benchmarks (or all of them) and reports their timings'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--iterations', '-n', type=int, default=100,
+            help='Number of iterations for each case.'),
+        make_option('--threads', type=int, default=8,
+            help='Number of concurrent workers, for benchmarks which use them.'),
+        make_option('--corpus',
+            help='File of recorded events (one JSON event per line), for benchmarks which use them.'),
+    )
+
+    def handle(self, *names, **options):
+        from sentry.benchmarks import BENCHMARKS
+        from sentry.benchmarks.base import format_results
+        from sentry.utils.imports import import_string
+
+        if not names:
+            names = BENCHMARKS.keys()
+
+        for name in names:
+            if name not in BENCHMARKS:
+                raise CommandError('Unknown benchmark: %s (choices are %s)' % (
+                    name, ', '.join(BENCHMARKS.keys())))
+
+        for name in names:
+            cls = import_string(BENCHMARKS[name])
+            benchmark = cls(iterations=options['iterations'], threads=options['threads'],
+                corpus=options['corpus'])
+
+            self.stdout.write('%s\n' % (name,))
+            self.stdout.write('%s\n\n' % (format_results(benchmark.run()),))
@@ -29,6 +29,11 @@ class Command(BaseCommand):
             dest='workers',
             type=int,
             default=None),
+        make_option('--processes',
+            dest='processes',
+            type=int,
+            default=None,
+            help='The number of processes to run (udp only).'),
     )
 
     def handle(self, service_name='http', address=None, upgrade=True, **options):
@@ -62,11 +67,18 @@ class Command(BaseCommand):
         except KeyError:
             raise CommandError('%r is not a valid service' % service_name)
 
+        service_options = {}
+        if options.get('processes'):
+            if service_name != 'udp':
+                raise CommandError('--processes is only supported by the udp service')
+            service_options['processes'] = options['processes']
+
         service = service_class(
             debug=options.get('debug'),
             host=host,
             port=port,
             workers=options.get('workers'),
+            **service_options
         )
 
         # remove command line arguments to avoid optparse failures with service code
@@ -16,12 +16,11 @@ import logging
 import re
 import warnings
 import weakref
-import time
 
 from celery.signals import task_postrun
 from django.conf import settings as dj_settings
 from django.core.signals import request_finished
-from django.db import models, transaction, IntegrityError
+from django.db import models, router, transaction, IntegrityError
 from django.db.models import Sum
 from django.db.models.expressions import ExpressionNode
 from django.db.models.signals import post_save, post_delete, post_init, class_prepared
@@ -29,35 +28,44 @@ from django.utils import timezone
 from django.utils.datastructures import SortedDict
 from django.utils.encoding import force_unicode, smart_str
 
-from raven.utils.encoding import to_string
 from sentry import app
 from sentry.conf import settings
 from sentry.constants import STATUS_RESOLVED, STATUS_UNRESOLVED
+from sentry.grouping import get_strategy, get_strategy_for_project
 from sentry.processors.base import send_group_processors
 from sentry.signals import regression_signal
 from sentry.tasks.index import index_event
 from sentry.tasks.fetch_source import fetch_javascript_source
-from sentry.utils.cache import cache, Lock
-from sentry.utils.dates import get_sql_date_trunc
+from sentry.utils.cache import cache, KnownKeyCache, Lock
+from sentry.utils.charts import build_series
+from sentry.utils.dates import ROLLUPS, ROLLUP_DAY, ROLLUP_HOUR, normalize_datetime
 from sentry.utils.db import get_db_engine, has_charts, resolve_expression_node
 from sentry.utils.queue import maybe_delay
+from sentry.utils.safe import safe_execute
 
 logger = logging.getLogger('sentry.errors')
 
 UNSAVED = dict()
 MAX_TAG_LENGTH = 200
 
+# (project_id, key) and (project_id, key, value) pairs which already have a
+# FilterKey and FilterValue
+known_tags = KnownKeyCache('knowntags')
+
+
+def get_checksum_from_interfaces(interfaces, message, strategy=None):
+    """
+    Returns the checksum events are grouped by, given a mapping of their
+    interfaces (ordered by score) and their message.
+    """
+    if strategy is None:
+        strategy = get_strategy()
+    return strategy.get_checksum(interfaces, message)
+
 
 def get_checksum_from_event(event):
-    interfaces = event.interfaces
-    for interface in interfaces.itervalues():
-        result = interface.get_composite_hash(interfaces=event.interfaces)
-        if result:
-            hash = hashlib.md5()
-            for r in result:
-                hash.update(to_string(r))
-            return hash.hexdigest()
-    return hashlib.md5(to_string(event.message)).hexdigest()
+    strategy = get_strategy_for_project(event.project if event.project_id else None)
+    return get_checksum_from_interfaces(event.interfaces, event.message, strategy)
 
 
 class BaseManager(models.Manager):
@@ -68,6 +76,7 @@ class BaseManager(models.Manager):
     def __init__(self, *args, **kwargs):
         self.cache_fields = kwargs.pop('cache_fields', [])
         self.cache_ttl = kwargs.pop('cache_ttl', 60 * 5)
+        self.lock_free = kwargs.pop('lock_free', False)
         self.__cache = weakref.WeakKeyDictionary()
         super(BaseManager, self).__init__(*args, **kwargs)
 
@@ -226,10 +235,24 @@ class BaseManager(models.Manager):
         else:
             return self.get(**kwargs)
 
+    def __use_lock(self, kwargs):
+        """
+        Returns True if creating a row matching ``kwargs`` must be guarded by a
+        lock rather than by the table's unique constraints.
+        """
+        if not self.lock_free:
+            return True
+        # unique constraints don't apply to NULL columns
+        return any(v is None for v in kwargs.itervalues())
+
     def get_or_create(self, _cache=False, **kwargs):
         """
         A modified version of Django's get_or_create which will create a distributed
         lock (using the cache backend) whenever it hits the create clause.
+
+        If the manager was created with ``lock_free=True`` no lock is taken, and
+        instead we rely on the model's unique constraints: the insert is attempted
+        optimistically and the row is re-read if it fails with an IntegrityError.
         """
         defaults = kwargs.pop('defaults', {})
 
@@ -240,6 +263,12 @@ class BaseManager(models.Manager):
             return self.get(**kwargs), False
         except self.model.DoesNotExist:
             pass
+
+        if not self.__use_lock(kwargs):
+            # Django's get_or_create already recovers from an IntegrityError
+            # raised by a concurrent insert
+            return super(BaseManager, self).get_or_create(defaults=defaults, **kwargs)
+
         lock_key = self.__make_key('lock', kwargs)
 
         # instance not found, lets grab a lock and attempt to create it
@@ -258,6 +287,8 @@ class BaseManager(models.Manager):
 
         The result will be (rows affected, False), if the row was not created,
         or (instance, True) if the object is new.
+
+        See ``get_or_create`` for the behavior of ``lock_free`` managers.
         """
         defaults = kwargs.pop('defaults', {})
 
@@ -265,6 +296,21 @@ class BaseManager(models.Manager):
         affected = self.filter(**kwargs).update(**defaults)
         if affected:
             return affected, False
+
+        if not self.__use_lock(kwargs):
+            create_kwargs = self.__get_create_kwargs(kwargs, defaults)
+
+            sid = transaction.savepoint(using=self.db)
+            try:
+                instance = self.create(**create_kwargs)
+            except IntegrityError:
+                # someone else created the row since our update
+                transaction.savepoint_rollback(sid, using=self.db)
+                affected = self.filter(**kwargs).update(**defaults)
+                return affected, False
+            transaction.savepoint_commit(sid, using=self.db)
+            return instance, True
+
         lock_key = self.__make_key('lock', kwargs)
 
         # instance not found, lets grab a lock and attempt to create it
@@ -273,10 +319,14 @@ class BaseManager(models.Manager):
                 affected = self.filter(**kwargs).update(**defaults)
                 return affected, False
 
-            for k, v in defaults.iteritems():
-                if isinstance(v, ExpressionNode):
-                    kwargs[k] = resolve_expression_node(self.model(), v)
-            return self.create(**kwargs), True
+            return self.create(**self.__get_create_kwargs(kwargs, defaults)), True
+
+    def __get_create_kwargs(self, kwargs, defaults):
+        create_kwargs = kwargs.copy()
+        for k, v in defaults.iteritems():
+            if isinstance(v, ExpressionNode):
+                create_kwargs[k] = resolve_expression_node(self.model(), v)
+        return create_kwargs
 
 
 class ScoreClause(object):
@@ -330,13 +380,7 @@ class ChartMixin(object):
         else:
             db = 'default'
 
-        field = self.model.messagecountbyminute_set.related
-        column = field.field.name
-        queryset = field.model.objects.filter(**{
-            '%s__in' % column: instances,
-        })
-
-        return self._get_chart_data(queryset, max_days, db, key=key)
+        return self._get_chart_data(instances, max_days, db, key=key)
 
     def get_chart_data(self, instance, max_days=90, key=None):
         if hasattr(instance, '_state'):
@@ -344,11 +388,19 @@ class ChartMixin(object):
         else:
             db = 'default'
 
-        queryset = instance.messagecountbyminute_set
+        return self._get_chart_data([instance], max_days, db, key=key)
+
+    def get_chart_queryset(self, rollup=None):
+        """
+        Returns a queryset of the counts charted for this model, along with
+        the name of the column which relates them to it.
 
-        return self._get_chart_data(queryset, max_days, db, key=key)
+        ``rollup`` is the resolution of the counts: ``None`` for every
+        ``MINUTE_NORMALIZATION`` minutes, or ``ROLLUP_HOUR`` or ``ROLLUP_DAY``.
+        """
+        raise NotImplementedError
 
-    def _get_chart_data(self, queryset, max_days=90, db='default', key=None):
+    def _get_chart_data(self, instances, max_days=90, db='default', key=None):
         if not has_charts(db):
             if key is None:
                 return []
@@ -361,61 +413,55 @@ class ChartMixin(object):
         # and not have ~inaccurate data for up to MINUTE_NORMALIZATION
         today -= datetime.timedelta(minutes=settings.MINUTE_NORMALIZATION)
 
+        # read the coarsest counts which still give us a point per interval
         if max_days >= 30:
-            g_type = 'date'
+            rollup = ROLLUP_DAY
             d_type = 'days'
             points = max_days
             modifier = 1
-            today = today.replace(hour=0)
         elif max_days >= 1:
-            g_type = 'hour'
+            rollup = ROLLUP_HOUR
             d_type = 'hours'
             points = max_days * 24
             modifier = 1
-            today = today.replace(minute=0)
         else:
-            g_type = 'minute'
+            rollup = None
             d_type = 'minutes'
             modifier = settings.MINUTE_NORMALIZATION
             points = max_days * 24 * (60 / modifier)
 
+        today = normalize_datetime(today, rollup)
         min_date = today - datetime.timedelta(days=max_days)
 
-        method = get_sql_date_trunc('date', db, grouper=g_type)
+        queryset, column = self.get_chart_queryset(rollup)
 
-        chart_qs = queryset.filter(
-            date__gte=min_date,
-        ).extra(
-            select={'grouper': method},
-        )
+        chart_qs = queryset.using(db).filter(**{
+            '%s__in' % column: instances,
+            'date__gte': min_date,
+        })
         if key:
-            chart_qs = chart_qs.values('grouper', key)
+            chart_qs = chart_qs.values(key, 'date')
         else:
-            chart_qs = chart_qs.values('grouper')
+            chart_qs = chart_qs.values('date')
 
         chart_qs = chart_qs.annotate(
             num=Sum('times_seen'),
         )
         if key:
-            chart_qs = chart_qs.values_list(key, 'grouper', 'num').order_by(key, 'grouper')
+            chart_qs = chart_qs.values_list(key, 'date', 'num').order_by(key, 'date')
         else:
-            chart_qs = chart_qs.values_list('grouper', 'num').order_by('grouper')
+            chart_qs = chart_qs.values_list('date', 'num').order_by('date')
 
         if key is None:
-            rows = {None: dict(chart_qs)}
+            chart_qs = ((None, date, num) for date, num in chart_qs)
+
+        if rollup is None:
+            step = modifier * 60
         else:
-            rows = {}
-            for item, grouper, num in chart_qs:
-                if item not in rows:
-                    rows[item] = {}
-                rows[item][grouper] = num
-
-        results = {}
-        for item, tsdata in rows.iteritems():
-            results[item] = []
-            for point in xrange(points, -1, -1):
-                dt = today - datetime.timedelta(**{d_type: point * modifier})
-                results[item].append((int(time.mktime((dt).timetuple())) * 1000, tsdata.get(dt, 0)))
+            step = rollup
+        start = today - datetime.timedelta(**{d_type: points * modifier})
+
+        results = build_series(chart_qs, start, step, points + 1, items=[None] if key is None else ())
 
         if key is None:
             return results[None]
@@ -425,15 +471,131 @@ class ChartMixin(object):
 class GroupManager(BaseManager, ChartMixin):
     use_for_related_fields = True
 
+    def get_chart_queryset(self, rollup=None):
+        from sentry.models import MessageCountByMinute, MessageCountRollup
+
+        if rollup is None:
+            return MessageCountByMinute.objects.all(), 'group'
+        return MessageCountRollup.objects.filter(rollup=rollup), 'group'
+
+    def get_unique_user_chart_data(self, group, max_days=7):
+        """
+        Returns the number of unique users affected by ``group`` on each of
+        the last ``max_days`` days, as ``(timestamp, value)`` points.
+        """
+        today = normalize_datetime(timezone.now(), ROLLUP_DAY)
+        start = today - datetime.timedelta(days=max_days - 1)
+
+        rows = []
+        for day in xrange(max_days):
+            date = start + datetime.timedelta(days=day)
+            num = app.uniques.get_unique_users(group, date, date + datetime.timedelta(days=1))
+            rows.append((None, date, num))
+
+        return build_series(rows, start, ROLLUP_DAY, max_days, items=[None])[None]
+
     @transaction.commit_on_success
     def from_kwargs(self, project, **kwargs):
-        # TODO: this function is way too damn long and needs refactored
-        # the inner imports also suck so let's try to move it away from
-        # the objects manager
-        from sentry.models import Event, Project
+        from sentry.models import Project
 
         project = Project.objects.get_from_cache(pk=project)
 
+        event, tags, group_kwargs = self._build_event(project, kwargs)
+
+        try:
+            group, is_new, is_sample = self._create_group(event, tags=tags, **group_kwargs)
+        except Exception, exc:
+            # TODO: should we mail admins when there are failures?
+            try:
+                logger.exception(u'Unable to process log entry: %s', exc)
+            except Exception, exc:
+                warnings.warn(u'Unable to process log entry: %s', exc)
+
+            return
+
+        event.group = group
+
+        # save the event unless its been sampled
+        if not is_sample:
+            try:
+                event.save()
+            except IntegrityError:
+                transaction.rollback_unless_managed(using=group._state.db)
+                return event
+
+        transaction.commit_unless_managed(using=group._state.db)
+
+        self._post_process_event(event, is_new, is_sample)
+
+        return event
+
+    @transaction.commit_on_success
+    def from_kwargs_bulk(self, data_list):
+        """
+        Stores a batch of already validated events.
+
+        Events are bucketed by (project, logger, culprit, checksum) so that
+        each group is resolved once per batch and has its counters incremented
+        once with the combined totals. Every event which isn't sampled is then
+        written with a single bulk insert.
+
+        Returns the list of events which were processed.
+        """
+        from sentry.models import Project
+
+        buckets = SortedDict()
+        for kwargs in data_list:
+            kwargs = kwargs.copy()
+            project = Project.objects.get_from_cache(pk=kwargs.pop('project'))
+
+            event, tags, group_kwargs = self._build_event(project, kwargs)
+
+            key = (project.pk, event.logger, event.culprit, event.checksum)
+            buckets.setdefault(key, []).append((event, tags, group_kwargs))
+
+        processed = []
+        for items in buckets.itervalues():
+            # a failed query aborts the whole transaction on PostgreSQL, so
+            # each bucket is rolled back on its own
+            sid = transaction.savepoint(using=self.db)
+            try:
+                group, results = self._create_group_bulk(items)
+            except Exception, exc:
+                transaction.savepoint_rollback(sid, using=self.db)
+                try:
+                    logger.exception(u'Unable to process log entries: %s', exc)
+                except Exception, exc:
+                    warnings.warn(u'Unable to process log entries: %s', exc)
+                continue
+            transaction.savepoint_commit(sid, using=self.db)
+
+            for event, is_new, is_sample in results:
+                event.group = group
+                processed.append((event, is_new, is_sample))
+
+        self._bulk_save_events([e for e, _, is_sample in processed if not is_sample])
+
+        transaction.commit_unless_managed(using=self.db)
+
+        events = []
+        for event, is_new, is_sample in processed:
+            # events without a primary key collided with an existing event_id
+            if not is_sample and event.pk is None:
+                continue
+            self._post_process_event(event, is_new, is_sample)
+            events.append(event)
+
+        return events
+
+    def _build_event(self, project, kwargs):
+        """
+        Constructs an (unsaved) ``Event`` from a validated payload.
+
+        Returns a tuple of the event, its tags, and the keyword arguments used
+        when creating its group.
+        """
+        from sentry.models import Event
+
         # First we pull out our top-level (non-data attr) kwargs
         event_id = kwargs.pop('event_id', None)
         message = kwargs.pop('message', None)
@@ -483,6 +645,7 @@ class GroupManager(BaseManager, ChartMixin):
         )
 
         # Calculcate the checksum from the first highest scoring interface
+        # (this is usually done by validate_data already)
         if not checksum:
             checksum = get_checksum_from_event(event)
 
@@ -496,28 +659,69 @@ class GroupManager(BaseManager, ChartMixin):
             'time_spent_count': time_spent and 1 or 0,
         })
 
-        try:
-            group, is_new, is_sample = self._create_group(event, tags=tags, **group_kwargs)
-        except Exception, exc:
-            # TODO: should we mail admins when there are failures?
-            try:
-                logger.exception(u'Unable to process log entry: %s', exc)
-            except Exception, exc:
-                warnings.warn(u'Unable to process log entry: %s', exc)
+        return event, tags, group_kwargs
+
+    def _bulk_save_events(self, events):
+        """
+        Inserts ``events`` using a single query, falling back to saving them
+        one at a time if any of them collide with an existing ``event_id``.
 
+        Events which could not be stored are left without a primary key.
+        """
+        from sentry.models import Event
+
+        if not events:
             return
 
-        event.group = group
+        using = router.db_for_write(Event)
 
-        # save the event unless its been sampled
-        if not is_sample:
-            try:
-                event.save()
-            except IntegrityError:
-                transaction.rollback_unless_managed(using=group._state.db)
-                return event
+        # Events without an id can't be matched back up to their row
+        # after a bulk insert
+        pending = [e for e in events if e.event_id]
+        for event in events:
+            if not event.event_id:
+                event.save(using=using)
 
-        transaction.commit_unless_managed(using=group._state.db)
+        for event in pending:
+            event.truncate_fields()
+
+        sid = transaction.savepoint(using=using)
+        try:
+            Event.objects.using(using).bulk_create(pending)
+        except IntegrityError:
+            transaction.savepoint_rollback(sid, using=using)
+
+            for event in pending:
+                sid = transaction.savepoint(using=using)
+                try:
+                    event.save(using=using)
+                except IntegrityError:
+                    transaction.savepoint_rollback(sid, using=using)
+                else:
+                    transaction.savepoint_commit(sid, using=using)
+            return
+
+        transaction.savepoint_commit(sid, using=using)
+
+        # bulk_create doesn't hand back primary keys, so we fetch them
+        by_project = defaultdict(dict)
+        for event in pending:
+            by_project[event.project_id][event.event_id] = event
+
+        for project_id, event_map in by_project.iteritems():
+            id_list = Event.objects.using(using).filter(
+                project=project_id,
+                event_id__in=event_map.keys(),
+            ).values_list('event_id', 'id')
+            for event_id, pk in id_list:
+                event = event_map[event_id]
+                event.pk = pk
+                event._state.adding = False
+                event._state.db = using
+                post_save.send(sender=Event, instance=event, created=True, raw=False, using=using)
+
+    def _post_process_event(self, event, is_new, is_sample):
+        group = event.group
 
         if settings.USE_SEARCH:
             try:
@@ -542,22 +746,50 @@ class GroupManager(BaseManager, ChartMixin):
 
         send_group_processors(group=group, event=event, is_new=is_new, is_sample=is_sample)
 
-        return event
-
     def _create_group(self, event, tags=None, **kwargs):
-        from sentry.models import ProjectCountByMinute, MessageCountByMinute
+        group, results = self._create_group_bulk([(event, tags, kwargs)])
+        _, is_new, is_sample = results[0]
+        return group, is_new, is_sample
+
+    def _create_group_bulk(self, items):
+        """
+        Resolves the group shared by a list of ``(event, tags, group_kwargs)``
+        tuples and records their combined counts against it.
+
+        Returns the group along with an ``(event, is_new, is_sample)`` tuple
+        for each event, in chronological order.
+        """
+        from sentry.models import ProjectCountByMinute, MessageCountByMinute, \
+          ProjectCountRollup, MessageCountRollup
+
+        items = sorted(items, key=lambda x: x[0].datetime)
 
+        event = items[0][0]
         date = event.datetime
-        time_spent = event.time_spent
         project = event.project
 
+        last_seen = items[-1][0].datetime
+        messages = [k['message'] for _, _, k in items if k.get('message')]
+        time_spent_total = sum(e.time_spent or 0 for e, _, _ in items)
+        time_spent_count = len([e for e, _, _ in items if e.time_spent])
+
+        defaults = items[0][2].copy()
+        defaults.update({
+            'last_seen': last_seen,
+            'times_seen': len(items),
+            'time_spent_total': time_spent_total,
+            'time_spent_count': time_spent_count,
+        })
+        if messages:
+            defaults['message'] = messages[-1]
+
         try:
             group, is_new = self.get_or_create(
                 project=project,
                 culprit=event.culprit,
                 logger=event.logger,
                 checksum=event.checksum,
-                defaults=kwargs
+                defaults=defaults
             )
         except self.model.MultipleObjectsReturned:
             # Fix for multiple groups existing due to a race
@@ -573,23 +805,24 @@ class GroupManager(BaseManager, ChartMixin):
         else:
             transaction.commit_unless_managed(using=group._state.db)
 
+        is_created = is_new
+
         update_kwargs = {
-            'times_seen': 1,
+            'times_seen': len(items),
         }
-        if time_spent:
+        if time_spent_count:
             update_kwargs.update({
-                'time_spent_total': time_spent,
-                'time_spent_count': 1,
+                'time_spent_total': time_spent_total,
+                'time_spent_count': time_spent_count,
             })
 
         if not is_new:
             extra = {
-                'last_seen': max(event.datetime, group.last_seen),
+                'last_seen': max(last_seen, group.last_seen),
                 'score': ScoreClause(group),
             }
-            message = kwargs.get('message')
-            if message:
-                extra['message'] = message
+            if messages:
+                extra['message'] = messages[-1]
 
             if group.status == STATUS_RESOLVED:
                 # Group has changed from resolved -> unresolved
@@ -616,97 +849,160 @@ class GroupManager(BaseManager, ChartMixin):
             # an issue with the group not existing before the buffers run
             transaction.commit_unless_managed(using=group._state.db)
 
-        # Determine if we've sampled enough data to store this event
-        if is_new:
-            is_sample = False
-        elif not settings.SAMPLE_DATA or group.times_seen % min(count_limit(group.times_seen), time_limit(silence)) == 0:
-            is_sample = False
-        else:
-            is_sample = True
+        results = []
+        counts = SortedDict()
+        all_tags = []
+        user_idents = SortedDict()
+        tag_plugins = self._get_tag_plugins(project)
+        for idx, (event, tags, _) in enumerate(items):
+            # Determine if we've sampled enough data to store this event
+            if is_new and idx == 0:
+                is_sample = False
+            elif not settings.SAMPLE_DATA:
+                is_sample = False
+            else:
+                # the number of times the group had been seen prior to this event
+                times_seen = (0 if is_created else group.times_seen) + idx
+                is_sample = times_seen % min(count_limit(times_seen), time_limit(silence)) != 0
 
-        # Rounded down to the nearest interval
-        if settings.MINUTE_NORMALIZATION:
-            minutes = (date.minute - (date.minute % settings.MINUTE_NORMALIZATION))
-        else:
-            minutes = date.minute
-        normalized_datetime = date.replace(second=0, microsecond=0, minute=minutes)
+            results.append((event, is_new and idx == 0, is_sample))
 
-        app.buffer.incr(MessageCountByMinute, update_kwargs, {
-            'group': group,
-            'project': project,
-            'date': normalized_datetime,
-        })
+            date = event.datetime
 
-        app.buffer.incr(ProjectCountByMinute, update_kwargs, {
-            'project': project,
-            'date': normalized_datetime,
-        })
+            # Rounded down to the nearest interval
+            normalized_datetime = normalize_datetime(date)
 
-        if not tags:
-            tags = []
-        else:
-            tags = list(tags)
+            if normalized_datetime not in counts:
+                counts[normalized_datetime] = defaultdict(int)
+            counts[normalized_datetime]['times_seen'] += 1
+            if event.time_spent:
+                counts[normalized_datetime]['time_spent_total'] += event.time_spent
+                counts[normalized_datetime]['time_spent_count'] += 1
+
+            if tags:
+                all_tags.extend(tags)
 
-        tags += [
-            ('logger', event.logger),
-            ('level', event.get_level_display()),
-        ]
+            all_tags.extend([
+                ('logger', event.logger),
+                ('level', event.get_level_display()),
+            ])
 
-        user_ident = event.user_ident
-        if user_ident:
-            self.record_affected_user(group, user_ident)
+            for plugin in tag_plugins:
+                all_tags.extend(safe_execute(plugin.get_tags, event) or ())
+
+            user_ident = event.user_ident
+            if user_ident:
+                user_idents[user_ident] = user_idents.get(user_ident, 0) + 1
+
+        for normalized_datetime, update_kwargs in counts.iteritems():
+            update_kwargs = dict(update_kwargs)
+
+            app.buffer.incr(MessageCountByMinute, update_kwargs, {
+                'group': group,
+                'project': project,
+                'date': normalized_datetime,
+            })
+
+            app.buffer.incr(ProjectCountByMinute, update_kwargs, {
+                'project': project,
+                'date': normalized_datetime,
+            })
+
+        # hourly and daily totals, so that charts of long periods read less
+        rollups = SortedDict()
+        for normalized_datetime, update_kwargs in counts.iteritems():
+            for rollup in ROLLUPS:
+                key = (rollup, normalize_datetime(normalized_datetime, rollup))
+                if key not in rollups:
+                    rollups[key] = defaultdict(int)
+                for column, value in update_kwargs.iteritems():
+                    rollups[key][column] += value
+
+        group_rows = []
+        project_rows = []
+        for (rollup, rollup_date), update_kwargs in rollups.iteritems():
+            update_kwargs = dict(update_kwargs)
+            group_rows.append((update_kwargs, {
+                'group': group,
+                'project': project,
+                'rollup': rollup,
+                'date': rollup_date,
+            }, None))
+            project_rows.append((update_kwargs, {
+                'project': project,
+                'rollup': rollup,
+                'date': rollup_date,
+            }, None))
+
+        app.buffer.incr_many(MessageCountRollup, group_rows)
+        app.buffer.incr_many(ProjectCountRollup, project_rows)
 
         try:
-            self.add_tags(group, tags)
+            app.uniques.record(group, user_idents, group.last_seen)
         except Exception, e:
-            logger.exception('Unable to record tags: %s' % (e,))
+            logger.exception('Unable to record affected users: %s' % (e,))
 
-        return group, is_new, is_sample
+        try:
+            self.add_tags(group, all_tags)
+        except Exception, e:
+            logger.exception('Unable to record tags: %s' % (e,))
 
-    def record_affected_user(self, group, user_ident):
-        from sentry.models import AffectedUserByGroup
+        return group, results
 
-        project = group.project
-        date = group.last_seen
+    def _get_tag_plugins(self, project):
+        from sentry.plugins import plugins
 
-        app.buffer.incr(AffectedUserByGroup, {
-            'times_seen': 1,
-        }, {
-            'group': group,
-            'project': project,
-            'ident': user_ident,
-        }, {
-            'last_seen': date,
-        })
+        return [p for p in plugins.all() if safe_execute(p.is_enabled, project)]
 
     def add_tags(self, group, tags):
+        """
+        Records a list of ``(key, value)`` pairs against ``group``.
+
+        Repeated pairs are only written once, and any keys and values which
+        aren't known yet are created together, so each table is written to in
+        a single batch.
+        """
         from sentry.models import FilterValue, FilterKey, MessageFilterValue
 
         project = group.project
         date = group.last_seen
 
+        # collapse repeated pairs so each is only written once
+        counts = SortedDict()
         for key, value in itertools.ifilter(lambda x: bool(x[1]), tags):
-            if not value:
-                continue
-
             value = unicode(value)
             if len(value) > MAX_TAG_LENGTH:
                 continue
 
-            # TODO: FilterKey and FilterValue queries should be create's under a try/except
-            FilterKey.objects.get_or_create(
-                project=project,
-                key=key,
-            )
+            counts[(key, value)] = counts.get((key, value), 0) + 1
 
-            FilterValue.objects.get_or_create(
-                project=project,
-                key=key,
-                value=value,
-            )
+        if not counts:
+            return
+
+        # only new tags need to touch the database
+        keys = set(k for k, _ in counts)
+        self._create_missing(FilterKey, project, ('key',), [
+            (k,) for k in keys if (project.pk, k) not in known_tags
+        ])
+
+        # the values of sketched tags are only counted approximately
+        sketched_keys = app.tag_sketches.get_sketched_keys(project)
+        if sketched_keys:
+            sketched = SortedDict()
+            for (key, value), count in counts.items():
+                if key in sketched_keys:
+                    sketched[(key, value)] = count
+                    del counts[(key, value)]
+            app.tag_sketches.incr(group, sketched)
+
+        self._create_missing(FilterValue, project, ('key', 'value'), [
+            kv for kv in counts if (project.pk,) + kv not in known_tags
+        ])
 
-            app.buffer.incr(MessageFilterValue, {
-                'times_seen': 1,
+        rows = []
+        for (key, value), count in counts.iteritems():
+            rows.append(({
+                'times_seen': count,
             }, {
                 'group': group,
                 'project': project,
@@ -714,7 +1010,41 @@ class GroupManager(BaseManager, ChartMixin):
                 'value': value,
             }, {
                 'last_seen': date,
-            })
+            }))
+        app.buffer.incr_many(MessageFilterValue, rows)
+
+    def _create_missing(self, model, project, fields, values):
+        """
+        Ensures a row of ``model`` exists in ``project`` for each tuple in
+        ``values`` (of ``fields``), creating those which are missing with a
+        single insert.
+        """
+        if not values:
+            return
+
+        using = router.db_for_write(model)
+        manager = model.objects.using(using)
+
+        lookup = dict(('%s__in' % (f,), set(v[n] for v in values)) for n, f in enumerate(fields))
+        existing = set(manager.filter(project=project, **lookup).values_list(*fields))
+        missing = [v for v in values if v not in existing]
+
+        if missing:
+            sid = transaction.savepoint(using=using)
+            try:
+                manager.bulk_create([
+                    model(project=project, **dict(zip(fields, v)))
+                    for v in missing
+                ])
+            except IntegrityError:
+                # someone else created some of them in the meantime
+                transaction.savepoint_rollback(sid, using=using)
+                for v in missing:
+                    model.objects.get_or_create(project=project, **dict(zip(fields, v)))
+            else:
+                transaction.savepoint_commit(sid, using=using)
+
+        known_tags.add_many([(project.pk,) + tuple(v) for v in values])
 
     def get_by_natural_key(self, project, logger, culprit, checksum):
         return self.get(project=project, logger=logger, view=culprit, checksum=checksum)
@@ -805,7 +1135,12 @@ class RawQuerySet(object):
 
 
 class ProjectManager(BaseManager, ChartMixin):
-    pass
+    def get_chart_queryset(self, rollup=None):
+        from sentry.models import ProjectCountByMinute, ProjectCountRollup
+
+        if rollup is None:
+            return ProjectCountByMinute.objects.all(), 'project'
+        return ProjectCountRollup.objects.filter(rollup=rollup), 'project'
 
 
 class MetaManager(BaseManager):
@@ -1154,3 +1489,61 @@ class TeamManager(BaseManager):
             results[team.slug] = team
 
         return results
+
+
+class ProjectKeyManager(BaseManager):
+    def _get_auth_cache_key(self, public_key):
+        return 'projectkey:auth:%s' % (hashlib.md5(smart_str(public_key)).hexdigest(),)
+
+    def get_auth_context(self, public_key):
+        """
+        Returns what's needed to authenticate a request made with ``public_key``
+        as a dictionary of the key's ``project_id`` and ``secret_key``, the
+        ``user_id`` it belongs to (if any) and whether that user
+        ``is_active``, and an ``error`` if the user isn't a member of the
+        project's team. Returns None if there's no such key.
+
+        Results are cached until the key, its project, its user or the user's
+        membership of the project's team change.
+        """
+        cache_key = self._get_auth_cache_key(public_key)
+        result = cache.get(cache_key)
+        if result is None:
+            result = self._get_auth_context(public_key)
+            cache.set(cache_key, result, self.cache_ttl)
+        # unknown keys are cached as an empty dictionary
+        return result or None
+
+    def _get_auth_context(self, public_key):
+        from django.contrib.auth.models import User
+        from sentry.models import Project, TeamMember
+
+        try:
+            pk = self.get(public_key=public_key)
+        except self.model.DoesNotExist:
+            return {}
+
+        result = {
+            'project_id': pk.project_id,
+            'secret_key': pk.secret_key,
+            'user_id': pk.user_id,
+            'is_active': True,
+            'error': None,
+        }
+        if not pk.user_id:
+            return result
+
+        # the user itself isn't cached, as it carries their password
+        try:
+            result['is_active'] = User.objects.filter(id=pk.user_id).values_list('is_active', flat=True)[0]
+        except IndexError:
+            result['error'] = 'Member does not have access to project'
+            return result
+
+        project = Project.objects.get_from_cache(pk=pk.project_id)
+        if not TeamMember.objects.filter(team=project.team_id, user=pk.user_id, is_active=True).exists():
+            result['error'] = 'Member does not have access to project'
+        return result
+
+    def clear_auth_context(self, public_keys):
+        cache.delete_many([self._get_auth_cache_key(k) for k in public_keys])
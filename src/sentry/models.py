@@ -26,7 +26,7 @@ from django.core.urlresolvers import reverse
 from django.db import models
 from django.db.models import F, Sum
 from django.db.models.signals import (post_syncdb, post_save, pre_delete,
-    class_prepared)
+    post_delete, class_prepared)
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 from django.utils.datastructures import SortedDict
@@ -39,11 +39,10 @@ from sentry.constants import (STATUS_LEVELS, MEMBER_TYPES,  # NOQA
     STATUS_VISIBLE, STATUS_HIDDEN)  # NOQA
 from sentry.manager import (GroupManager, ProjectManager,
     MetaManager, InstanceMetaManager, SearchDocumentManager, BaseManager,
-    UserOptionManager, FilterKeyManager, TeamManager)
+    UserOptionManager, FilterKeyManager, TeamManager, ProjectKeyManager)
 from sentry.signals import buffer_incr_complete
 from sentry.utils import cached_property, MockDjangoRequest
-from sentry.utils.models import Model, GzippedDictField, update
-from sentry.utils.imports import import_string
+from sentry.utils.models import Model, BinaryDictField, update
 from sentry.utils.strings import truncatechars
 
 __all__ = ('Event', 'Group', 'Project', 'SearchDocument')
@@ -184,7 +183,7 @@ class Project(Model):
                 )
             except Group.DoesNotExist:
                 group.update(project=project)
-                for model in (Event, MessageFilterValue, MessageCountByMinute):
+                for model in (Event, MessageFilterValue, MessageCountByMinute, MessageCountRollup):
                     model.objects.filter(project=self, group=group).update(project=project)
             else:
                 Event.objects.filter(group=group).update(group=other)
@@ -192,7 +191,7 @@ class Project(Model):
                 for obj in MessageFilterValue.objects.filter(group=group):
                     obj2, created = MessageFilterValue.objects.get_or_create(
                         project=project,
-                        group=group,
+                        group=other,
                         key=obj.key,
                         value=obj.value,
                         defaults={'times_seen': obj.times_seen}
@@ -200,29 +199,42 @@ class Project(Model):
                     if not created:
                         obj2.update(times_seen=F('times_seen') + obj.times_seen)
 
-                for obj in MessageCountByMinute.objects.filter(group=group):
-                    obj2, created = MessageCountByMinute.objects.get_or_create(
-                        project=project,
-                        group=group,
-                        date=obj.date,
-                        defaults={
-                            'times_seen': obj.times_seen,
-                            'time_spent_total': obj.time_spent_total,
-                            'time_spent_count': obj.time_spent_count,
-                        }
-                    )
-                    if not created:
-                        obj2.update(
-                            times_seen=F('times_seen') + obj.times_seen,
-                            time_spent_total=F('time_spent_total') + obj.time_spent_total,
-                            time_spent_count=F('time_spent_count') + obj.time_spent_count,
-                        )
+                self._merge_counts(MessageCountByMinute.objects.filter(group=group),
+                    ('times_seen', 'time_spent_total', 'time_spent_count'),
+                    project=project, group=other)
+                self._merge_counts(MessageCountRollup.objects.filter(group=group),
+                    ('times_seen', 'time_spent_total', 'time_spent_count'),
+                    project=project, group=other)
+
+        self._merge_counts(ProjectCountByMinute.objects.filter(project=self),
+            ('times_seen', 'time_spent_total', 'time_spent_count', 'times_dropped'),
+            project=project)
+        self._merge_counts(ProjectCountRollup.objects.filter(project=self),
+            ('times_seen', 'time_spent_total', 'time_spent_count', 'times_dropped'),
+            project=project)
 
         for fv in FilterValue.objects.filter(project=self):
             FilterValue.objects.get_or_create(project=project, key=fv.key, value=fv.value)
             fv.delete()
         self.delete()
 
+    def _merge_counts(self, queryset, columns, **kwargs):
+        """
+        Adds the ``columns`` of each counter in ``queryset`` to the counter
+        which has the same unique fields, other than those in ``kwargs``.
+        """
+        model = queryset.model
+        unique_fields = model._meta.unique_together[0]
+        for obj in queryset:
+            lookup = dict((f, getattr(obj, f)) for f in unique_fields)
+            lookup.update(kwargs)
+            obj2, created = model.objects.get_or_create(
+                defaults=dict((c, getattr(obj, c)) for c in columns),
+                **lookup
+            )
+            if not created:
+                obj2.update(**dict((c, F(c) + getattr(obj, c)) for c in columns))
+
     def is_default_project(self):
         return str(self.id) == str(settings.PROJECT) or str(self.slug) == str(settings.PROJECT)
 
@@ -245,7 +257,7 @@ class ProjectKey(Model):
     user_added = models.ForeignKey(User, null=True, related_name='keys_added_set')
     date_added = models.DateTimeField(default=timezone.now, null=True)
 
-    objects = BaseManager(cache_fields=(
+    objects = ProjectKeyManager(cache_fields=(
         'public_key',
         'secret_key',
     ))
@@ -367,16 +379,19 @@ class MessageBase(Model):
     message = models.TextField()
     culprit = models.CharField(max_length=200, blank=True, null=True, db_column='view')
     checksum = models.CharField(max_length=32, db_index=True)
-    data = GzippedDictField(blank=True, null=True)
+    data = BinaryDictField(blank=True, null=True)
     platform = models.CharField(max_length=64, null=True)
 
     class Meta:
         abstract = True
 
     def save(self, *args, **kwargs):
+        self.truncate_fields()
+        super(MessageBase, self).save(*args, **kwargs)
+
+    def truncate_fields(self):
         if len(self.logger) > 64:
             self.logger = self.logger[0:61] + u"..."
-        super(MessageBase, self).save(*args, **kwargs)
 
     def error(self):
         if self.message:
@@ -450,7 +465,7 @@ class Group(MessageBase):
     score = models.IntegerField(default=0)
     is_public = models.NullBooleanField(default=False, null=True)
 
-    objects = GroupManager()
+    objects = GroupManager(lock_free=True)
 
     class Meta:
         unique_together = (('project', 'logger', 'culprit', 'checksum'),)
@@ -507,6 +522,15 @@ class Group(MessageBase):
         return module, self.data['version']
 
     def get_unique_tags(self, tag):
+        from sentry import app
+
+        if tag in app.tag_sketches.get_sketched_keys(self.project):
+            # sketches don't know when values were first or last seen
+            return [
+                (value, times_seen, None, None)
+                for value, times_seen in app.tag_sketches.get_top_values(self, tag)
+            ]
+
         return self.messagefiltervalue_set.filter(
             key=tag,
         ).values_list(
@@ -522,7 +546,11 @@ class Group(MessageBase):
 
     def get_tags(self):
         if not hasattr(self, '_tag_cache'):
-            tags = sorted(self.messagefiltervalue_set.values_list('key', flat=True).distinct())
+            from sentry import app
+
+            tags = set(self.messagefiltervalue_set.values_list('key', flat=True).distinct())
+            tags.update(app.tag_sketches.get_keys(self))
+            tags = sorted(tags)
             self._tag_cache = tags
         return self._tag_cache
 
@@ -601,20 +629,11 @@ class Event(MessageBase):
 
     @cached_property
     def interfaces(self):
-        result = []
-        for key, data in self.data.iteritems():
-            if '.' not in key:
-                continue
+        from sentry.interfaces import InterfaceMap
 
-            try:
-                cls = import_string(key)
-            except ImportError:
-                pass  # suppress invalid interfaces
-
-            value = cls(**data)
-            result.append((key, value))
-
-        return SortedDict((k, v) for k, v in sorted(result, key=lambda x: x[1].get_score(), reverse=True))
+        # unknown interfaces are ignored, and the rest are only created once
+        # they're accessed
+        return InterfaceMap(self.data)
 
     def get_version(self):
         if not self.data:
@@ -664,7 +683,7 @@ class FilterKey(Model):
     project = models.ForeignKey(Project)
     key = models.CharField(max_length=32)
 
-    objects = FilterKeyManager()
+    objects = FilterKeyManager(lock_free=True)
 
     class Meta:
         unique_together = (('project', 'key'),)
@@ -681,7 +700,7 @@ class FilterValue(Model):
     key = models.CharField(max_length=32)
     value = models.CharField(max_length=200)
 
-    objects = BaseManager()
+    objects = BaseManager(lock_free=True)
 
     class Meta:
         unique_together = (('project', 'key', 'value'),)
@@ -703,7 +722,7 @@ class MessageFilterValue(Model):
     last_seen = models.DateTimeField(default=timezone.now, db_index=True, null=True)
     first_seen = models.DateTimeField(default=timezone.now, db_index=True, null=True)
 
-    objects = BaseManager()
+    objects = BaseManager(lock_free=True)
 
     class Meta:
         unique_together = (('project', 'key', 'value', 'group'),)
@@ -753,6 +772,8 @@ class ProjectCountByMinute(Model):
     times_seen = models.PositiveIntegerField(default=0)
     time_spent_total = models.FloatField(default=0)
     time_spent_count = models.IntegerField(default=0)
+    # events rejected because the project was over its quota
+    times_dropped = models.PositiveIntegerField(default=0)
 
     objects = BaseManager()
 
@@ -760,6 +781,53 @@ class ProjectCountByMinute(Model):
         unique_together = (('project', 'date'),)
 
 
+class MessageCountRollup(Model):
+    """
+    Stores the total number of messages seen by a group in each hour or day,
+    where ``rollup`` is the length of the interval in seconds.
+
+    These mirror ``MessageCountByMinute``, so that charts covering long
+    periods read a row per hour or day rather than per N minutes.
+    """
+
+    project = models.ForeignKey(Project, null=True)
+    group = models.ForeignKey(Group)
+    rollup = models.PositiveIntegerField()
+    date = models.DateTimeField(db_index=True)  # normalized to the start of the interval
+    times_seen = models.PositiveIntegerField(default=0)
+    time_spent_total = models.FloatField(default=0)
+    time_spent_count = models.IntegerField(default=0)
+
+    objects = BaseManager()
+
+    class Meta:
+        unique_together = (('project', 'group', 'rollup', 'date'),)
+
+    def __unicode__(self):
+        return u'group_id=%s, times_seen=%s, rollup=%s, date=%s' % (
+            self.group_id, self.times_seen, self.rollup, self.date)
+
+
+class ProjectCountRollup(Model):
+    """
+    Stores the total number of messages seen by a project in each hour or day,
+    where ``rollup`` is the length of the interval in seconds.
+    """
+
+    project = models.ForeignKey(Project, null=True)
+    rollup = models.PositiveIntegerField()
+    date = models.DateTimeField(db_index=True)  # normalized to the start of the interval
+    times_seen = models.PositiveIntegerField(default=0)
+    time_spent_total = models.FloatField(default=0)
+    time_spent_count = models.IntegerField(default=0)
+    times_dropped = models.PositiveIntegerField(default=0)
+
+    objects = BaseManager()
+
+    class Meta:
+        unique_together = (('project', 'rollup', 'date'),)
+
+
 class SearchDocument(Model):
     project = models.ForeignKey(Project)
     group = models.ForeignKey(Group)
@@ -991,6 +1059,63 @@ def remove_key_for_team_member(instance, **kwargs):
         ).delete()
 
 
+def clear_auth_context_for_key(instance, **kwargs):
+    ProjectKey.objects.clear_auth_context([instance.public_key])
+
+
+def clear_auth_context_for_project(instance, created=False, **kwargs):
+    if created:
+        return
+
+    ProjectKey.objects.clear_auth_context(ProjectKey.objects.filter(
+        project=instance,
+    ).values_list('public_key', flat=True))
+
+
+def clear_auth_context_for_team_member(instance, **kwargs):
+    ProjectKey.objects.clear_auth_context(ProjectKey.objects.filter(
+        project__team=instance.team_id,
+        user=instance.user_id,
+    ).values_list('public_key', flat=True))
+
+
+def clear_auth_context_for_user(instance, created=False, **kwargs):
+    if created:
+        return
+
+    ProjectKey.objects.clear_auth_context(ProjectKey.objects.filter(
+        user=instance,
+    ).values_list('public_key', flat=True))
+
+
+def clear_origins_cache(instance, **kwargs):
+    from sentry.utils.cache import cache
+    from sentry.utils.http import get_origins_cache_key
+
+    if instance.key == 'sentry:origins':
+        cache.delete(get_origins_cache_key(instance.project_id))
+
+
+def clear_grouping_strategy_cache(instance, **kwargs):
+    from sentry.grouping import OPTION_KEY, get_strategy_cache_key
+    from sentry.utils.cache import cache
+
+    if instance.key == OPTION_KEY:
+        cache.delete(get_strategy_cache_key(instance.project_id))
+
+
+def forget_filter_key(instance, **kwargs):
+    from sentry.manager import known_tags
+
+    known_tags.discard((instance.project_id, instance.key))
+
+
+def forget_filter_value(instance, **kwargs):
+    from sentry.manager import known_tags
+
+    known_tags.discard((instance.project_id, instance.key, instance.value))
+
+
 # Set user language if set
 def set_language_on_logon(request, user, **kwargs):
     language = UserOption.objects.get_value(
@@ -1054,6 +1179,90 @@ pre_delete.connect(
     dispatch_uid="remove_key_for_team_member",
     weak=False,
 )
+post_save.connect(
+    clear_auth_context_for_key,
+    sender=ProjectKey,
+    dispatch_uid="clear_auth_context_for_key_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_auth_context_for_key,
+    sender=ProjectKey,
+    dispatch_uid="clear_auth_context_for_key_on_delete",
+    weak=False,
+)
+post_save.connect(
+    clear_auth_context_for_project,
+    sender=Project,
+    dispatch_uid="clear_auth_context_for_project_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_auth_context_for_project,
+    sender=Project,
+    dispatch_uid="clear_auth_context_for_project_on_delete",
+    weak=False,
+)
+post_save.connect(
+    clear_auth_context_for_team_member,
+    sender=TeamMember,
+    dispatch_uid="clear_auth_context_for_team_member_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_auth_context_for_team_member,
+    sender=TeamMember,
+    dispatch_uid="clear_auth_context_for_team_member_on_delete",
+    weak=False,
+)
+post_save.connect(
+    clear_auth_context_for_user,
+    sender=User,
+    dispatch_uid="clear_auth_context_for_user_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_auth_context_for_user,
+    sender=User,
+    dispatch_uid="clear_auth_context_for_user_on_delete",
+    weak=False,
+)
+post_save.connect(
+    clear_origins_cache,
+    sender=ProjectOption,
+    dispatch_uid="clear_origins_cache_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_origins_cache,
+    sender=ProjectOption,
+    dispatch_uid="clear_origins_cache_on_delete",
+    weak=False,
+)
+post_save.connect(
+    clear_grouping_strategy_cache,
+    sender=ProjectOption,
+    dispatch_uid="clear_grouping_strategy_cache_on_save",
+    weak=False,
+)
+post_delete.connect(
+    clear_grouping_strategy_cache,
+    sender=ProjectOption,
+    dispatch_uid="clear_grouping_strategy_cache_on_delete",
+    weak=False,
+)
+post_delete.connect(
+    forget_filter_key,
+    sender=FilterKey,
+    dispatch_uid="forget_filter_key",
+    weak=False,
+)
+post_delete.connect(
+    forget_filter_value,
+    sender=FilterValue,
+    dispatch_uid="forget_filter_value",
+    weak=False,
+)
 user_logged_in.connect(
     set_language_on_logon,
     dispatch_uid="set_language_on_logon",
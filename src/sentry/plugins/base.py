@@ -462,6 +462,20 @@ class IPlugin(local):
         >>>     print 'New event created:', event.id
         """
 
+    def get_tags(self, event, **kwargs):
+        """
+        Returns a list of ``(key, value)`` tag pairs to record for an event.
+
+        Tags from every enabled plugin are collected as the event is saved,
+        and written along with the event's own tags.
+
+        :param event: an instance of ``Event``
+
+        >>> def get_tags(self, event, **kwargs):
+        >>>     return [('server_name', event.server_name)]
+        """
+        return []
+
     def get_filters(self, project=None, **kwargs):
         """
         Provides additional filters to the builtins.
@@ -5,7 +5,6 @@ sentry.plugins.bases.tag
 :copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
 :license: BSD, see LICENSE for more details.
 """
-from sentry.models import Group
 from sentry.plugins import Plugin
 
 
@@ -23,5 +22,5 @@ class TagPlugin(Plugin):
         """
         raise NotImplementedError
 
-    def post_process(self, group, event, is_new, is_sample, **kwargs):
-        Group.objects.add_tags(group, [(self.tag, v) for v in self.get_tag_values(event)])
+    def get_tags(self, event, **kwargs):
+        return [(self.tag, v) for v in self.get_tag_values(event)]
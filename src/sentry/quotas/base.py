@@ -0,0 +1,212 @@
+"""
+sentry.quotas.base
+~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import threading
+import time
+
+from django.utils import timezone
+
+from sentry.conf import settings
+from sentry.utils.dates import ROLLUPS, normalize_datetime
+
+OPTION_KEY = 'sentry:project_rate_limit'
+
+
+def consume_token(tokens, last, now, rate, capacity, count=1):
+    """
+    Refills a token bucket holding ``tokens`` (as of ``last``) at ``rate``
+    tokens per second up to ``capacity``, and attempts to take ``count``
+    tokens from it.
+
+    Returns a tuple of the remaining tokens, and the number of seconds until
+    ``count`` tokens will be available (0 if they were taken).
+    """
+    tokens = min(capacity, tokens + max(0, now - last) * rate)
+    if tokens >= count:
+        return tokens - count, 0
+    return tokens, (count - tokens) / rate
+
+
+class Quota(object):
+    """
+    Quotas limit the number of events a project, and each of its keys, may
+    store per minute, so that a single misbehaving client can't starve every
+    other project.
+
+    The base backend doesn't enforce any limits.
+
+    Events which are dropped are tallied in process, and only written to the
+    project's counters every ``dropped_flush_interval`` seconds, so that
+    turning events away stays cheap.
+    """
+    dropped_flush_interval = 10
+
+    def __init__(self, **options):
+        self._dropped = {}
+        self._dropped_lock = threading.Lock()
+        self._last_flush = time.time()
+
+    def get_project_quota(self, project):
+        """
+        Returns the number of events ``project`` may store per minute, or 0
+        if it's unlimited.
+        """
+        from sentry.models import ProjectOption
+
+        value = ProjectOption.objects.get_value(project, OPTION_KEY, None)
+        if value is None:
+            value = settings.PROJECT_RATE_LIMIT
+        return int(value or 0)
+
+    def get_key_quota(self, key):
+        """
+        Returns the number of events the public key ``key`` may store per
+        minute, or 0 if it's unlimited.
+        """
+        return settings.KEY_RATE_LIMIT
+
+    def get_capacity(self, project, key=None):
+        """
+        Returns the most events ``project`` (sent with the public key ``key``)
+        may store at once, or 0 if it's unlimited.
+        """
+        return 0
+
+    def is_rate_limited(self, project, key=None, count=1):
+        """
+        Records ``count`` events for ``project`` (sent with the public key
+        ``key``).
+
+        Returns the number of seconds the client should wait before sending
+        the events again if they're over its quota, otherwise 0.
+        """
+        return 0
+
+    def record_dropped(self, project, count=1):
+        """
+        Tallies ``count`` events from ``project`` which were dropped for being
+        over its quota.
+        """
+        key = (project, normalize_datetime(timezone.now()))
+        with self._dropped_lock:
+            self._dropped[key] = self._dropped.get(key, 0) + count
+        self.maybe_flush_dropped()
+
+    def maybe_flush_dropped(self):
+        if self._dropped and time.time() - self._last_flush >= self.dropped_flush_interval:
+            self.flush_dropped()
+
+    def flush_dropped(self):
+        """
+        Hands every tally of dropped events to the buffer.
+        """
+        from sentry import app
+        from sentry.models import ProjectCountByMinute, ProjectCountRollup
+
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, {}
+            self._last_flush = time.time()
+
+        if not dropped:
+            return
+
+        rows = []
+        rollups = {}
+        for (project, date), count in dropped.iteritems():
+            rows.append(({'times_dropped': count}, {
+                'project': project,
+                'date': date,
+            }, None))
+            for rollup in ROLLUPS:
+                key = (project, rollup, normalize_datetime(date, rollup))
+                rollups[key] = rollups.get(key, 0) + count
+
+        app.buffer.incr_many(ProjectCountByMinute, rows)
+        app.buffer.incr_many(ProjectCountRollup, [({'times_dropped': count}, {
+            'project': project,
+            'rollup': rollup,
+            'date': date,
+        }, None) for (project, rollup, date), count in rollups.iteritems()])
+
+
+class TokenBucketQuota(Quota):
+    """
+    Enforces quotas with a token bucket per project and per key, which refills
+    at the quota's rate and holds up to a minute's worth of events.
+    """
+    def consume(self, key, limit, count=1):
+        """
+        Takes ``count`` tokens from the bucket ``key`` which allows ``limit``
+        events per minute, returning the number of seconds until they're
+        available (0 if they were taken).
+
+        More than ``limit`` tokens are never available at once, so larger
+        batches are always rejected (see ``get_capacity``).
+        """
+        raise NotImplementedError
+
+    def refund(self, key, limit, count=1):
+        """
+        Returns ``count`` tokens taken by ``consume`` to the bucket ``key``.
+        """
+        raise NotImplementedError
+
+    def get_buckets(self, project, key=None):
+        # the key's bucket comes first, so a key which is over its own quota
+        # doesn't spend the tokens of every other key of the project
+        buckets = []
+        if key:
+            buckets.append(('quota:k:%s' % (key,), self.get_key_quota(key)))
+        buckets.append(('quota:p:%s' % (project.pk,), self.get_project_quota(project)))
+        return [(bucket, limit) for bucket, limit in buckets if limit > 0]
+
+    def get_capacity(self, project, key=None):
+        limits = [limit for _, limit in self.get_buckets(project, key)]
+        return min(limits) if limits else 0
+
+    def is_rate_limited(self, project, key=None, count=1):
+        consumed = []
+        for bucket, limit in self.get_buckets(project, key):
+            retry_after = self.consume(bucket, limit, count)
+            if retry_after:
+                # the events are dropped, so they shouldn't count against
+                # the buckets which did have room for them
+                for bucket, limit in consumed:
+                    self.refund(bucket, limit, count)
+                return retry_after
+            consumed.append((bucket, limit))
+        return 0
+
+
+class CacheQuota(TokenBucketQuota):
+    """
+    Stores buckets in the cache.
+
+    Reading and writing the bucket isn't atomic, so concurrent requests may
+    let a few more events through than the quota allows.
+    """
+    def __init__(self, cache=None, **options):
+        if cache is None:
+            from sentry.utils.cache import cache
+        self.cache = cache
+        super(CacheQuota, self).__init__(**options)
+
+    def consume(self, key, limit, count=1):
+        now = time.time()
+        tokens, last = self.cache.get(key) or (limit, now)
+        tokens, retry_after = consume_token(tokens, last, now, limit / 60.0, limit, count)
+        self.cache.set(key, (tokens, now), 60)
+        return retry_after
+
+    def refund(self, key, limit, count=1):
+        state = self.cache.get(key)
+        if state is None:
+            # an expired bucket is full again
+            return
+        tokens, last = state
+        self.cache.set(key, (min(limit, tokens + count), last), 60)
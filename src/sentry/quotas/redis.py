@@ -0,0 +1,72 @@
+"""
+sentry.quotas.redis
+~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+import time
+
+from nydus.db import create_cluster
+from sentry.quotas.base import TokenBucketQuota
+
+
+class RedisQuota(TokenBucketQuota):
+    """
+    Stores buckets in Redis, updating them atomically with a script (the same
+    arithmetic as ``consume_token``).
+
+    Requires Redis 2.6 or newer.
+    """
+    consume_script = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local count = tonumber(ARGV[4])
+    local state = redis.call('hmget', KEYS[1], 't', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local last = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+    local retry_after = 0
+    if tokens >= count then
+        tokens = tokens - count
+    else
+        retry_after = (count - tokens) / rate
+    end
+    redis.call('hmset', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+    redis.call('expire', KEYS[1], 60)
+    return tostring(retry_after)
+    """
+
+    refund_script = """
+    local capacity = tonumber(ARGV[1])
+    local count = tonumber(ARGV[2])
+    local tokens = tonumber(redis.call('hget', KEYS[1], 't'))
+    if tokens then
+        redis.call('hset', KEYS[1], 't', tostring(math.min(capacity, tokens + count)))
+    end
+    """
+
+    def __init__(self, hosts=None, router='nydus.db.routers.keyvalue.PartitionRouter', **options):
+        super(RedisQuota, self).__init__(**options)
+        if hosts is None:
+            hosts = {
+                0: {}  # localhost / default
+            }
+        self.conn = create_cluster({
+            'engine': 'nydus.db.backends.redis.Redis',
+            'router': router,
+            'hosts': hosts,
+        })
+
+    def consume(self, key, limit, count=1):
+        conn = self.conn.get_conn(key)
+        result = conn.eval(self.consume_script, 1, key, limit, limit / 60.0, repr(time.time()), count)
+        return float(result)
+
+    def refund(self, key, limit, count=1):
+        conn = self.conn.get_conn(key)
+        conn.eval(self.refund_script, 1, key, limit, count)
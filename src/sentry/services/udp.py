@@ -6,10 +6,14 @@ sentry.services.udp
 :license: BSD, see LICENSE for more details.
 """
 
+import os
+import signal
 import socket
 import logging
+import time
 
 from sentry.services.base import Service
+from sentry.utils import metrics
 
 logger = logging.getLogger(__file__)
 
@@ -18,10 +22,70 @@ class CommandError(Exception):
     pass
 
 
-def handle_sentry(data, address):
+class EventBatcher(object):
+    """
+    Coalesces accepted events, so that they're queued in batches of up to
+    ``size`` events rather than one at a time.
+
+    Events never wait much longer than ``interval`` seconds for their batch to
+    fill, as long as somebody calls ``maybe_flush``.
+    """
+    def __init__(self, size, interval):
+        self.size = size
+        self.interval = interval
+        self.pending = []
+        self.last_flush = time.time()
+
+    def add(self, data):
+        self.pending.append(data)
+        if len(self.pending) >= self.size:
+            self.flush()
+
+    def maybe_flush(self):
+        if self.pending and time.time() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        from sentry.coreapi import insert_batch_to_database
+
+        # swap the list out first, as queueing may yield to other workers
+        pending, self.pending = self.pending, []
+        self.last_flush = time.time()
+        if not pending:
+            return
+
+        metrics.incr('udp.batches')
+        try:
+            insert_batch_to_database(pending)
+        except Exception:
+            metrics.incr('udp.dropped', len(pending))
+            logger.exception('Unable to queue batch of %d events', len(pending))
+
+
+def get_socket_drops(sock):
+    """
+    Returns the number of datagrams the kernel dropped because the socket's
+    receive buffer was full, or None if that isn't known (it's only reported
+    by Linux).
+    """
+    inode = str(os.fstat(sock.fileno()).st_ino)
+    for path in ('/proc/net/udp', '/proc/net/udp6'):
+        try:
+            with open(path) as fp:
+                lines = fp.readlines()[1:]
+        except IOError:
+            continue
+        for line in lines:
+            bits = line.split()
+            if bits[9] == inode:
+                return int(bits[-1])
+    return None
+
+
+def handle_sentry(data, address, batcher=None):
     from sentry.coreapi import project_from_auth_vars, decode_and_decompress_data, \
-        safely_load_json_string, validate_data, insert_data_to_database, APIError, \
-        APIForbidden
+        safely_load_json_string, validate_data, insert_data_to_database, check_rate_limit, \
+        APIError, APIForbidden, APIRateLimited
     from sentry.exceptions import InvalidData
     from sentry.plugins import plugins
     from sentry.utils.auth import parse_auth_header
@@ -39,6 +103,8 @@ def handle_sentry(data, address):
 
         project, user = project_from_auth_vars(auth_vars)
 
+        check_rate_limit(project, auth_vars.get('sentry_key'))
+
         result = plugins.first('has_perm', user, 'create_event', project)
         if result is False:
             raise APIForbidden('Creation of this event was blocked')
@@ -54,7 +120,12 @@ def handle_sentry(data, address):
         except InvalidData, e:
             raise APIError(u'Invalid data: %s (%s)' % (unicode(e), type(e)))
 
+        if batcher is not None:
+            return batcher.add(data)
         return insert_data_to_database(data)
+    except APIRateLimited, error:
+        # there's nobody to tell, and logging every dropped event won't help
+        return error
     except APIError, error:
         logger.exception('bad message from %s' % (address,))
         return error
@@ -64,40 +135,165 @@ class BaseUDPServer(Service):
 
     BUF_SIZE = 2 ** 16
     POOL_SIZE = 1000
+    # How often (in seconds) each process logs what it has received
+    STATS_INTERVAL = 60
 
     _socket = None
     _spawn = None
-
-    def __init__(self, host=None, port=None, debug=False, workers=None):
+    # spawns a worker outside of the pool
+    _spawn_background = None
+    _sleep = None
+    # returns the number of idle workers in the pool
+    _free = None
+
+    def __init__(self, host=None, port=None, debug=False, workers=None, batch_size=None,
+                 batch_interval=None, recv_buffer=None, processes=None):
         super(BaseUDPServer, self).__init__(debug=debug)
         from sentry.conf import settings
 
         self.host = host or settings.UDP_HOST
         self.port = port or settings.UDP_PORT
         self.workers = workers or self.POOL_SIZE
+        self.recv_buffer = recv_buffer or settings.UDP_RECV_BUFFER
+        self.processes = processes or settings.UDP_PROCESSES
+        # identifies this process amongst the others sharing the port
+        self.process_num = 0
+
+        if batch_size is None:
+            batch_size = settings.UDP_BATCH_SIZE
+        if batch_size:
+            self.batcher = EventBatcher(batch_size, batch_interval or settings.UDP_BATCH_INTERVAL)
+        else:
+            self.batcher = None
 
     def setup(self):
         assert self._socket and self._spawn, \
             'Base class cannot be used to run the udp service.'
 
     def handle(self, data, address):
-        return handle_sentry(data, address)
+        return handle_sentry(data, address, batcher=self.batcher)
+
+    def flush_batches(self):
+        while True:
+            self._sleep(self.batcher.interval)
+            self.batcher.maybe_flush()
+
+    def report_stats(self, sock):
+        while True:
+            self._sleep(self.STATS_INTERVAL)
+            logger.info('UDP process %d (pid %d): received=%d backpressure=%d dropped=%d kernel_dropped=%s',
+                self.process_num, os.getpid(), metrics.get_counter('udp.received'),
+                metrics.get_counter('udp.backpressure'), metrics.get_counter('udp.dropped'),
+                get_socket_drops(sock))
+
+    def make_socket(self):
+        sock = self._socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.processes > 1:
+            # every process binds its own socket to the port, and the kernel
+            # spreads datagrams between them
+            if not hasattr(socket, 'SO_REUSEPORT'):
+                raise CommandError('Running multiple udp processes requires SO_REUSEPORT.')
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if self.recv_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer)
+            # the kernel may cap (or on Linux, double) the requested size
+            logger.info('Using a receive buffer of %d bytes',
+                sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+        sock.bind((self.host, self.port))
+        return sock
 
     def run(self):
+        if self.processes > 1:
+            return self.run_processes()
+        return self.serve()
+
+    def run_processes(self):
+        """
+        Forks ``processes`` copies of the server, and restarts any of them
+        which exit until we're asked to stop.
+        """
+        from django.db import close_connection
+
+        # children mustn't share the connection used to upgrade
+        close_connection()
+
+        def stop(signum, frame):
+            raise SystemExit
+
+        children = {}
+
+        def spawn(process_num):
+            pid = os.fork()
+            if pid == 0:
+                # never return into the parent's loop
+                status = 0
+                try:
+                    self.process_num = process_num
+                    self.serve()
+                except (SystemExit, KeyboardInterrupt):
+                    pass
+                except Exception:
+                    logger.exception('UDP process %d failed', process_num)
+                    status = 1
+                os._exit(status)
+            children[pid] = process_num
+
+        signal.signal(signal.SIGTERM, stop)
+        for process_num in xrange(self.processes):
+            spawn(process_num)
+
+        try:
+            while children:
+                pid, status = os.wait()
+                process_num = children.pop(pid, None)
+                if process_num is None:
+                    continue
+                logger.error('UDP process %d (pid %d) exited with status %d, restarting',
+                    process_num, pid, status)
+                # avoid spinning if it can't start at all
+                time.sleep(1)
+                spawn(process_num)
+        except (SystemExit, KeyboardInterrupt):
+            pass
+        finally:
+            # don't let a second ^C orphan anything
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+            for pid in children:
+                try:
+                    os.waitpid(pid, 0)
+                except OSError:
+                    pass
+
+    def serve(self):
         try:
             self.setup()
         except ImportError:
             raise CommandError(
                 'It seems that you don\'t have the ``%s`` package installed, '
                 'which is required to run the udp service.' % (self.name,))
-        sock = self._socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.bind((self.host, self.port))
+        sock = self.make_socket()
+        if self.batcher is not None:
+            self._spawn_background(self.flush_batches)
+        self._spawn_background(self.report_stats, sock)
         while True:
             try:
-                self._spawn(self.handle, *sock.recvfrom(self.BUF_SIZE))
+                data, address = sock.recvfrom(self.BUF_SIZE)
+                metrics.incr('udp.received')
+                if not self._free():
+                    # we'll block until a worker is free, while datagrams
+                    # queue up in (and overflow) the receive buffer
+                    metrics.incr('udp.backpressure')
+                self._spawn(self.handle, data, address)
             except (SystemExit, KeyboardInterrupt):
                 break
+        if self.batcher is not None:
+            self.batcher.flush()
 
 
 class EventletUDPServer(BaseUDPServer):
@@ -110,6 +306,9 @@ class EventletUDPServer(BaseUDPServer):
         self._socket = socket.socket
         self._pool = eventlet.GreenPool(size=self.workers)
         self._spawn = self._pool.spawn_n
+        self._spawn_background = eventlet.spawn_n
+        self._sleep = eventlet.sleep
+        self._free = self._pool.free
 
 
 class GeventUDPServer(BaseUDPServer):
@@ -117,10 +316,14 @@ class GeventUDPServer(BaseUDPServer):
     name = 'gevent'
 
     def setup(self):
+        import gevent
         from gevent import socket, pool
         self._socket = socket.socket
         self._pool = pool.Pool(size=self.workers)
         self._spawn = self._pool.spawn
+        self._spawn_background = gevent.spawn
+        self._sleep = gevent.sleep
+        self._free = self._pool.free_count
 
 
 default_servers = {
@@ -0,0 +1,9 @@
+"""
+sentry.sketches
+~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from sentry.sketches.base import TagSketches  # NOQA
@@ -0,0 +1,66 @@
+"""
+sentry.sketches.base
+~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from sentry.conf import settings
+
+OPTION_KEY = 'sentry:sketched_tags'
+
+
+class TagSketches(object):
+    """
+    Tag sketches keep approximate counts of the most common values of a tag
+    within each group, in a bounded amount of space (``capacity`` values per
+    group and tag), using the Space-Saving algorithm.
+
+    The values of sketched tags are only counted in the sketch, rather than
+    as a ``MessageFilterValue`` row per value. Which tags are sketched is
+    decided by each project's ``sentry:sketched_tags`` option, falling back to
+    ``SENTRY_SKETCHED_TAGS``.
+
+    The base backend doesn't keep any sketches, so every tag is stored
+    exactly.
+    """
+    enabled = False
+
+    def __init__(self, capacity=100, **options):
+        self.capacity = capacity
+
+    def get_sketched_keys(self, project):
+        """
+        Returns the set of tag keys which are sketched for ``project``.
+        """
+        from sentry.models import ProjectOption
+
+        if not self.enabled:
+            return frozenset()
+
+        value = ProjectOption.objects.get_value(project, OPTION_KEY, None)
+        if value is None:
+            value = settings.SKETCHED_TAGS
+        return frozenset(value or ())
+
+    def incr(self, group, counts):
+        """
+        Counts tags seen in ``group``, where ``counts`` maps ``(key, value)``
+        pairs to the number of times they were seen.
+        """
+
+    def get_keys(self, group):
+        """
+        Returns the tag keys which have been sketched for ``group``.
+        """
+        return []
+
+    def get_top_values(self, group, key, limit=None):
+        """
+        Returns a list of ``(value, times_seen)`` tuples for the most common
+        values of ``key`` in ``group``, ordered by ``times_seen``.
+
+        Counts are approximate, and may overestimate rarer values.
+        """
+        return []
@@ -0,0 +1,97 @@
+"""
+sentry.sketches.redis
+~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+from collections import defaultdict
+from hashlib import md5
+
+from django.utils.encoding import force_unicode, smart_str
+from nydus.db import create_cluster
+from sentry.sketches.base import TagSketches
+
+
+class RedisTagSketches(TagSketches):
+    """
+    Stores each sketch as a sorted set in Redis, which is updated atomically
+    with a script. Sketches expire once a group hasn't been seen for
+    ``ttl`` seconds.
+
+    Requires Redis 2.6 or newer.
+    """
+    enabled = True
+
+    # Space-Saving: values already counted (or which fit) are incremented,
+    # otherwise the least common value is replaced by the new one, which
+    # inherits its count.
+    incr_script = """
+    local capacity = tonumber(ARGV[1])
+    local ttl = tonumber(ARGV[2])
+    for i = 3, #ARGV, 2 do
+        local value = ARGV[i]
+        local count = tonumber(ARGV[i + 1])
+        if redis.call('zscore', KEYS[1], value) or redis.call('zcard', KEYS[1]) < capacity then
+            redis.call('zincrby', KEYS[1], count, value)
+        else
+            local min = redis.call('zrange', KEYS[1], 0, 0, 'withscores')
+            redis.call('zrem', KEYS[1], min[1])
+            redis.call('zadd', KEYS[1], tonumber(min[2]) + count, value)
+        end
+    end
+    redis.call('expire', KEYS[1], ttl)
+    return redis.call('zcard', KEYS[1])
+    """
+
+    def __init__(self, hosts=None, router='nydus.db.routers.keyvalue.PartitionRouter',
+                 ttl=30 * 24 * 60 * 60, **options):
+        super(RedisTagSketches, self).__init__(**options)
+        if hosts is None:
+            hosts = {
+                0: {}  # localhost / default
+            }
+        self.conn = create_cluster({
+            'engine': 'nydus.db.backends.redis.Redis',
+            'router': router,
+            'hosts': hosts,
+        })
+        self.ttl = ttl
+
+    def _get_conn(self, group):
+        # every sketch of a group lives on the same host
+        return self.conn.get_conn('sketch:%s' % (group.pk,))
+
+    def _make_key(self, group, key):
+        return 'sketch:%s:%s' % (group.pk, md5(smart_str(key)).hexdigest())
+
+    def _make_keys_key(self, group):
+        return 'sketch:%s:keys' % (group.pk,)
+
+    def incr(self, group, counts):
+        if not counts:
+            return
+
+        values_by_key = defaultdict(list)
+        for (key, value), count in counts.iteritems():
+            values_by_key[key].extend((smart_str(value), count))
+
+        keys_key = self._make_keys_key(group)
+
+        pipe = self._get_conn(group).pipeline(transaction=False)
+        for key, args in values_by_key.iteritems():
+            pipe.eval(self.incr_script, 1, self._make_key(group, key), self.capacity, self.ttl, *args)
+        pipe.sadd(keys_key, *[smart_str(k) for k in values_by_key])
+        pipe.expire(keys_key, self.ttl)
+        pipe.execute()
+
+    def get_keys(self, group):
+        return sorted(force_unicode(k) for k in self._get_conn(group).smembers(self._make_keys_key(group)))
+
+    def get_top_values(self, group, key, limit=None):
+        end = -1 if limit is None else limit - 1
+        results = self._get_conn(group).zrevrange(self._make_key(group, key), 0, end, withscores=True)
+        return [(force_unicode(value), int(count)) for value, count in results]
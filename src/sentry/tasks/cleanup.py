@@ -23,27 +23,35 @@ def cleanup(days=30, project=None, **kwargs):
 
     from django.utils import timezone
 
+    from sentry.conf import settings
     from sentry.models import (Group, Event, MessageCountByMinute,
         MessageFilterValue, FilterKey, FilterValue, ProjectCountByMinute,
-        SearchDocument)
+        SearchDocument, MessageCountRollup, ProjectCountRollup)
     from sentry.utils.query import RangeQuerySetWrapper
 
+    # per-minute counts are also kept in hourly and daily rollups, so they
+    # can be removed sooner
+    minute_days = days
+    if settings.MINUTE_COUNT_DAYS:
+        minute_days = min(days, settings.MINUTE_COUNT_DAYS)
+
     GENERIC_DELETES = (
-        (SearchDocument, 'date_changed'),
-        (MessageCountByMinute, 'date'),
-        (ProjectCountByMinute, 'date'),
-        (Event, 'datetime'),
-        (Group, 'last_seen'),
-        (MessageFilterValue, 'last_seen'),
+        (SearchDocument, 'date_changed', days),
+        (MessageCountByMinute, 'date', minute_days),
+        (ProjectCountByMinute, 'date', minute_days),
+        (MessageCountRollup, 'date', days),
+        (ProjectCountRollup, 'date', days),
+        (Event, 'datetime', days),
+        (Group, 'last_seen', days),
+        (MessageFilterValue, 'last_seen', days),
     )
 
     log = cleanup.get_logger()
 
-    ts = timezone.now() - datetime.timedelta(days=days)
-
     # Remove types which can easily be bound to project + date
-    for model, date_col in GENERIC_DELETES:
-        log.info("Removing %r for days=%s project=%r" % (model, days, project))
+    for model, date_col, model_days in GENERIC_DELETES:
+        log.info("Removing %r for days=%s project=%r" % (model, model_days, project))
+        ts = timezone.now() - datetime.timedelta(days=model_days)
         qs = model.objects.filter(**{'%s__lte' % (date_col,): ts})
         if project:
             qs = qs.filter(project=project)
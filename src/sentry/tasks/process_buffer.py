@@ -17,3 +17,23 @@ def process_incr(**kwargs):
     from sentry import app
 
     app.buffer.process(**kwargs)
+
+
+@task(ignore_result=True)
+def process_incr_many(**kwargs):
+    """
+    Processes a batch of buffer events.
+    """
+    from sentry import app
+
+    app.buffer.process_many(**kwargs)
+
+
+@task(ignore_result=True)
+def process_pending(**kwargs):
+    """
+    Processes any pending buffer increments.
+    """
+    from sentry import app
+
+    app.buffer.process_pending()
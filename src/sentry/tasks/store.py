@@ -17,3 +17,13 @@ def store_event(data, **kwargs):
     from sentry.models import Group
 
     Group.objects.from_kwargs(**data)
+
+
+@task(ignore_result=True)
+def store_events(data_list, **kwargs):
+    """
+    Saves a batch of events to the database.
+    """
+    from sentry.models import Group
+
+    Group.objects.from_kwargs_bulk(data_list)
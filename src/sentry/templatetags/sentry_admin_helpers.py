@@ -16,9 +16,11 @@ register = template.Library()
 
 @register.filter
 def with_event_counts(project_list):
-    from sentry.models import ProjectCountByMinute
-    results = dict(ProjectCountByMinute.objects.filter(
+    from sentry.models import ProjectCountRollup
+    from sentry.utils.dates import ROLLUP_DAY
+    results = dict(ProjectCountRollup.objects.filter(
         project__in=project_list,
+        rollup=ROLLUP_DAY,
         date__gte=timezone.now() - datetime.timedelta(days=30),
     ).values_list('project').annotate(
         total_events=Sum('times_seen'),
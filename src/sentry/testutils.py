@@ -28,6 +28,7 @@ from django.test import TestCase, TransactionTestCase
 from django.test.client import Client
 from django.utils.importlib import import_module
 
+from sentry.manager import known_tags
 from sentry.models import Project, ProjectOption, Option, Team
 
 
@@ -146,6 +147,7 @@ class BaseTestCase(Exam):
 
     def _pre_setup(self):
         cache.clear()
+        known_tags.clear()
         ProjectOption.objects.clear_cache()
         Option.objects.clear_cache()
         super(BaseTestCase, self)._pre_setup()
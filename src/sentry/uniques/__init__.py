@@ -0,0 +1,9 @@
+"""
+sentry.uniques
+~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from sentry.uniques.base import UniqueUserCounter  # NOQA
@@ -0,0 +1,55 @@
+"""
+sentry.uniques.base
+~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+
+class UniqueUserCounter(object):
+    """
+    Counts the unique users affected by each group, which is kept up to date
+    in ``Group.users_seen``.
+
+    The base backend counts exactly, by recording an ``AffectedUserByGroup``
+    row for each user of each group, and incrementing ``users_seen`` whenever
+    a new row is created.
+    """
+    def __init__(self, **options):
+        pass
+
+    def record(self, group, user_idents, date):
+        """
+        Records the users seen by events of ``group`` at ``date``, where
+        ``user_idents`` maps each user's identifier to the number of events.
+        """
+        from sentry import app
+        from sentry.models import AffectedUserByGroup
+
+        for user_ident, count in user_idents.iteritems():
+            app.buffer.incr(AffectedUserByGroup, {
+                'times_seen': count,
+            }, {
+                'group': group,
+                'project': group.project,
+                'ident': user_ident,
+            }, {
+                'last_seen': date,
+            })
+
+    def get_unique_users(self, group, start, end):
+        """
+        Returns the number of unique users affected by ``group`` between
+        ``start`` and ``end``.
+
+        As only the first and last time each user was seen is known, users
+        seen both before and after the period are counted too.
+        """
+        from sentry.models import AffectedUserByGroup
+
+        return AffectedUserByGroup.objects.filter(
+            group=group,
+            first_seen__lt=end,
+            last_seen__gte=start,
+        ).count()
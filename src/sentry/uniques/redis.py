@@ -0,0 +1,87 @@
+"""
+sentry.uniques.redis
+~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+import calendar
+
+from datetime import timedelta
+from django.utils.encoding import smart_str
+from nydus.db import create_cluster
+from sentry.uniques.base import UniqueUserCounter
+
+
+class RedisUniqueUserCounter(UniqueUserCounter):
+    """
+    Estimates unique users with Redis' HyperLogLogs, which take at most 12KB
+    each and have a standard error of 0.81%.
+
+    Each group has a HyperLogLog covering its whole lifetime, which
+    ``users_seen`` is set from whenever its estimate changes, as well as one
+    for every ``interval`` seconds (an hour by default) which are kept for
+    ``ttl`` seconds, and merged to count the users of any period.
+
+    Requires Redis 2.8.9 or newer.
+    """
+    def __init__(self, hosts=None, router='nydus.db.routers.keyvalue.PartitionRouter',
+                 interval=60 * 60, ttl=30 * 24 * 60 * 60, **options):
+        super(RedisUniqueUserCounter, self).__init__(**options)
+        if hosts is None:
+            hosts = {
+                0: {}  # localhost / default
+            }
+        self.conn = create_cluster({
+            'engine': 'nydus.db.backends.redis.Redis',
+            'router': router,
+            'hosts': hosts,
+        })
+        self.interval = interval
+        self.ttl = ttl
+
+    def _get_conn(self, group):
+        # every key of a group lives on the same host
+        return self.conn.get_conn(self._make_key(group))
+
+    def _make_key(self, group, bucket=None):
+        if bucket is None:
+            return 'uniques:%s' % (group.pk,)
+        return 'uniques:%s:%s' % (group.pk, bucket)
+
+    def _get_bucket(self, date):
+        return calendar.timegm(date.utctimetuple()) // self.interval
+
+    def record(self, group, user_idents, date):
+        from sentry.models import Group
+
+        if not user_idents:
+            return
+
+        idents = [smart_str(i) for i in user_idents]
+        key = self._make_key(group)
+        bucket_key = self._make_key(group, self._get_bucket(date))
+
+        conn = self._get_conn(group)
+        pipe = conn.pipeline(transaction=False)
+        pipe.pfadd(key, *idents)
+        pipe.pfadd(bucket_key, *idents)
+        pipe.expire(bucket_key, self.ttl)
+        changed = pipe.execute()[0]
+
+        if changed:
+            users_seen = conn.pfcount(key)
+            Group.objects.filter(pk=group.pk).update(users_seen=users_seen)
+            group.users_seen = users_seen
+
+    def get_unique_users(self, group, start, end):
+        first = self._get_bucket(start)
+        # end is exclusive
+        last = self._get_bucket(end - timedelta(microseconds=1))
+        keys = [self._make_key(group, b) for b in xrange(first, last + 1)]
+        if not keys:
+            return 0
+        return self._get_conn(group).pfcount(*keys)
@@ -5,12 +5,16 @@ sentry.utils.cache
 :copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
 :license: BSD, see LICENSE for more details.
 """
+import hashlib
 import logging
 import time
 
 from django.core.cache import get_cache, cache
+from django.utils.encoding import smart_str
 
 from sentry.conf import settings
+from sentry.utils import metrics
+from sentry.utils.lrucache import LRUCache
 
 if settings.CACHE_BACKEND != 'default':
     cache = get_cache(settings.CACHE_BACKEND)  # NOQA
@@ -27,43 +31,93 @@ class UnableToGetLock(Exception):
 
 class Lock(object):
     """
-    Uses the defined cache backend to create a lock.
+    Uses the configured lock backend (``SENTRY_LOCK_BACKEND``) to create a lock.
 
     >>> with Lock('key name'):
     >>>     # do something
+
+    If ``cache`` is passed, the lock is instead created within that cache.
     """
-    def __init__(self, lock_key, timeout=10, cache=None):
-        if cache is None:
-            self.cache = _cache
-        else:
-            self.cache = cache
+    def __init__(self, lock_key, timeout=10, cache=None, backend=None):
+        if backend is None:
+            if cache is not None:
+                from sentry.locks.base import CacheLockBackend
+                backend = CacheLockBackend(cache=cache)
+            else:
+                from sentry import app
+                backend = app.locks
+        self.backend = backend
         self.timeout = timeout
         self.lock_key = lock_key
+        self.token = None
 
     def __enter__(self):
         start = time.time()
-        lock_key = self.lock_key
-        cache = self.cache
-
-        delay = 0.1
-        attempt = 0
-        max_attempts = self.timeout / delay
-        got_lock = None
         self.was_locked = False
-        while not got_lock and attempt < max_attempts:
-            got_lock = cache.add(lock_key, '', self.timeout)
-            if not got_lock:
-                self.was_locked = True
-                time.sleep(delay)
-                attempt += 1
+        try:
+            self.token, self.was_locked = self.backend.acquire(self.lock_key, self.timeout)
+        except UnableToGetLock:
+            metrics.incr('lock.timeout')
+            raise
 
-        if not got_lock:
-            raise UnableToGetLock('Unable to fetch lock after %.2fs' % (time.time() - start,))
+        if self.was_locked:
+            metrics.incr('lock.contended')
+            metrics.timing('lock.wait', time.time() - start)
 
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
         try:
-            self.cache.delete(self.lock_key)
+            self.backend.release(self.lock_key, self.token)
         except Exception, e:
             logger.exception(e)
+
+
+class KnownKeyCache(object):
+    """
+    Remembers keys (tuples) which are known to exist, such as rows which have
+    already been created, so that we can skip checking for them again.
+
+    Keys are held in process, where the least recently used are evicted once
+    there are more than ``maxsize``, as well as in the cache so that other
+    processes learn about them. Either forgets a key after ``timeout`` seconds.
+    """
+    def __init__(self, prefix, maxsize=10000, timeout=60 * 60):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.local = LRUCache(maxsize=maxsize)
+
+    def _make_key(self, key):
+        return '%s:%s' % (self.prefix, hashlib.md5('\x00'.join(smart_str(k) for k in key)).hexdigest())
+
+    def __contains__(self, key):
+        expires = self.local.get(key)
+        if expires is not None:
+            if expires > time.time():
+                return True
+            self.local.delete(key)
+
+        if cache.get(self._make_key(key)):
+            self.local.set(key, time.time() + self.timeout)
+            return True
+        return False
+
+    def add(self, key):
+        cache.set(self._make_key(key), 1, self.timeout)
+        self.local.set(key, time.time() + self.timeout)
+
+    def add_many(self, keys):
+        cache.set_many(dict((self._make_key(k), 1) for k in keys), self.timeout)
+        expires = time.time() + self.timeout
+        for key in keys:
+            self.local.set(key, expires)
+
+    def discard(self, key):
+        cache.delete(self._make_key(key))
+        self.local.delete(key)
+
+    def clear(self):
+        """
+        Forgets every key held in this process.
+        """
+        self.local.clear()
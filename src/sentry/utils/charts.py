@@ -0,0 +1,45 @@
+"""
+sentry.utils.charts
+~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import time
+
+
+def build_series(rows, start, step, count, items=()):
+    """
+    Buckets ``rows`` of ``(item, date, value)`` into a series for each item,
+    of ``count`` points which are ``step`` seconds apart, the first being at
+    ``start``. Dates which don't fall on a point are ignored.
+
+    Returns a mapping of each item (including any of ``items`` without
+    rows) to a list of ``(timestamp, value)`` tuples, where timestamps are in
+    milliseconds and points without a value are 0.
+
+    >>> build_series([('a', datetime(2013, 1, 1), 5)], datetime(2013, 1, 1), 60, 2)
+    {'a': [(1356998400000, 5), (1356998460000, 0)]}
+    """
+    values = {}
+    for item in items:
+        values[item] = [0] * count
+
+    for item, date, value in rows:
+        try:
+            series = values[item]
+        except KeyError:
+            series = values[item] = [0] * count
+
+        # bucket by the seconds since the first point
+        delta = date - start
+        idx, remainder = divmod(delta.days * 86400 + delta.seconds, step)
+        if not remainder and not delta.microseconds and 0 <= idx < count:
+            series[idx] = value
+
+    # every series shares the same timestamps
+    first = int(time.mktime(start.timetuple()))
+    timestamps = range(first * 1000, (first + step * count) * 1000, step * 1000)
+
+    return dict((item, zip(timestamps, series)) for item, series in values.iteritems())
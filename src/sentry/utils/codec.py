@@ -0,0 +1,161 @@
+"""
+sentry.utils.codec
+~~~~~~~~~~~~~~~~~~
+
+A small, versioned serialization layer for values we store as opaque blobs
+(event data, buffered values).
+
+Every encoded value starts with a single header byte which identifies the
+codec which produced it, and whether the payload was compressed. Values
+written before the header existed (base64 encoded, zlib compressed pickles)
+are still read transparently.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+import base64
+import marshal
+import zlib
+
+from sentry.utils.compat import pickle
+
+COMPRESSED = 0x80
+
+# Payloads smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 128
+
+
+class Codec(object):
+    """
+    A codec turns a value into a string of bytes, and back.
+
+    ``version`` identifies the codec in the header of every value it encodes,
+    so must never change once values have been stored. Versions must also stay
+    below 0x2b (``+``), which is the lowest character of the base64 alphabet,
+    so that they can never be mistaken for a legacy value.
+    """
+    version = None
+
+    def dumps(self, value):
+        """
+        Returns the encoded value, or raises ``ValueError`` if the value is
+        not supported by this codec.
+        """
+        raise NotImplementedError
+
+    def loads(self, value):
+        raise NotImplementedError
+
+
+class MarshalCodec(Codec):
+    """
+    Handles plain builtin types (dicts, lists, strings, numbers, ...), which
+    covers almost all event data. Roughly an order of magnitude faster than
+    pickle to decode.
+    """
+    version = 0x02
+
+    def dumps(self, value):
+        return marshal.dumps(value)
+
+    def loads(self, value):
+        return marshal.loads(value)
+
+
+class PickleCodec(Codec):
+    """
+    Handles anything which can be pickled (such as datetimes).
+    """
+    version = 0x01
+
+    def dumps(self, value):
+        try:
+            return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError), e:
+            raise ValueError(unicode(e))
+
+    def loads(self, value):
+        return pickle.loads(value)
+
+
+_codecs = {}
+
+# The codecs which are tried, in order, when encoding a value
+_preferred = []
+
+
+def register(codec, preferred=False):
+    """
+    Registers a codec so that values it produced can be decoded. If
+    ``preferred`` is set, it is also tried first when encoding values.
+    """
+    version = codec.version
+    if not 0 < version < 0x2b:
+        raise ValueError('Codec version must be between 0x01 and 0x2a')
+    if version in _codecs and _codecs[version] is not codec:
+        raise ValueError('Codec version %#x is already registered' % (version,))
+
+    _codecs[version] = codec
+    if preferred:
+        _preferred.insert(0, codec)
+    else:
+        _preferred.append(codec)
+
+
+def get_codec(version):
+    return _codecs[version]
+
+
+def encode(value, compress=True):
+    """
+    Encodes ``value`` with the first codec which supports it.
+
+    Unless ``compress`` is disabled, larger payloads are compressed with zlib.
+    """
+    for codec in _preferred:
+        try:
+            data = codec.dumps(value)
+        except ValueError:
+            continue
+        break
+    else:
+        raise ValueError('No codec was able to encode %r' % (type(value),))
+
+    header = codec.version
+    if compress and len(data) >= COMPRESS_MIN_SIZE:
+        data = zlib.compress(data)
+        header |= COMPRESSED
+
+    return chr(header) + data
+
+
+def decode(value):
+    """
+    Decodes a value created by ``encode``, or a legacy (base64 encoded, zlib
+    compressed pickle) value.
+
+    Values which are themselves base64 encoded (for example, when stored in a
+    text column) are also accepted.
+    """
+    if isinstance(value, buffer):
+        value = str(value)
+    elif isinstance(value, unicode):
+        value = value.encode('ascii')
+
+    header = ord(value[0])
+    if header & ~COMPRESSED not in _codecs:
+        value = base64.b64decode(value)
+        header = ord(value[0])
+        if header & ~COMPRESSED not in _codecs:
+            return pickle.loads(zlib.decompress(value))
+
+    codec = _codecs[header & ~COMPRESSED]
+    data = value[1:]
+    if header & COMPRESSED:
+        data = zlib.decompress(data)
+    return codec.loads(data)
+
+
+register(MarshalCodec())
+register(PickleCodec())
@@ -9,6 +9,7 @@ from datetime import datetime
 from dateutil.parser import parse
 from django.db import connections
 
+from sentry.conf import settings
 from sentry.utils.db import get_db_engine
 
 DATE_TRUNC_GROUPERS = {
@@ -21,6 +22,11 @@ DATE_TRUNC_GROUPERS = {
     },
 }
 
+# The intervals (in seconds) which counts are rolled up into
+ROLLUP_HOUR = 60 * 60
+ROLLUP_DAY = 24 * 60 * 60
+ROLLUPS = (ROLLUP_HOUR, ROLLUP_DAY)
+
 
 def get_sql_date_trunc(col, db='default', grouper='hour'):
     conn = connections[db]
@@ -35,6 +41,24 @@ def get_sql_date_trunc(col, db='default', grouper='hour'):
     return conn.ops.date_trunc_sql(method, col)
 
 
+def normalize_datetime(date, rollup=None):
+    """
+    Rounds ``date`` down to the start of its ``MINUTE_NORMALIZATION`` interval,
+    or to the start of its hour or day if ``rollup`` is ``ROLLUP_HOUR`` or
+    ``ROLLUP_DAY``.
+    """
+    if rollup == ROLLUP_DAY:
+        return date.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif rollup == ROLLUP_HOUR:
+        return date.replace(minute=0, second=0, microsecond=0)
+
+    if settings.MINUTE_NORMALIZATION:
+        minutes = (date.minute - (date.minute % settings.MINUTE_NORMALIZATION))
+    else:
+        minutes = date.minute
+    return date.replace(second=0, microsecond=0, minute=minutes)
+
+
 def parse_date(datestr, timestr):
     # format is Y-m-d
     if not (datestr or timestr):
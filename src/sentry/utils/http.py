@@ -10,6 +10,13 @@ from urlparse import urlparse
 
 from sentry.conf import settings
 from sentry.plugins.helpers import get_option
+from sentry.utils.cache import cache
+from sentry.utils.lrucache import LRUCache
+
+ORIGINS_CACHE_TTL = 60 * 60
+
+# compiled matchers, by the set of origins they allow
+_matchers = LRUCache(maxsize=1000)
 
 
 def safe_urlencode(params, doseq=0):
@@ -49,8 +56,24 @@ def is_same_domain(url1, url2):
     return url1.netloc == url2.netloc
 
 
+def get_origins_cache_key(project_id):
+    return 'projectorigins:%s' % (project_id,)
+
+
+def get_project_origins(project):
+    """
+    Returns the ``sentry:origins`` option of ``project``, which is cached until
+    the option changes.
+    """
+    cache_key = get_origins_cache_key(project.pk)
+    result = cache.get(cache_key)
+    if result is None:
+        result = list(get_option('sentry:origins', project) or [])
+        cache.set(cache_key, result, ORIGINS_CACHE_TTL)
+    return result
+
+
 def get_origins(project=None):
-    # TODO: we should cache this
     if settings.ALLOW_ORIGIN == '*':
         return frozenset(['*'])
     elif settings.ALLOW_ORIGIN:
@@ -59,62 +82,89 @@ def get_origins(project=None):
         result = []
 
     if project:
-        optval = get_option('sentry:origins', project)
-        if optval:
-            result.extend(optval)
+        result.extend(get_project_origins(project))
 
     # lowercase and strip the trailing slash from all origin values
     # filter out empty values
     return frozenset(filter(bool, map(lambda x: x.lower().rstrip('/'), result)))
 
 
-def is_valid_origin(origin, project=None):
+class OriginMatcher(object):
     """
-    Given an ``origin`` which matches a base URI (e.g. http://example.com)
-    determine if a valid origin is present in the project settings.
+    Matches origins against a set of allowed origins (as described by
+    ``is_valid_origin``), which are parsed up front so that checking an origin
+    only needs a few lookups.
+    """
+    def __init__(self, allowed):
+        self.allow_all = '*' in allowed
+        self.exact = frozenset(allowed)
+        # partial uris, which may include a path
+        self.prefixes = tuple(v for v in allowed if '://' in v)
+        self.hosts = set()
+        # the labels of wildcard domains, most significant first
+        self.suffixes = set()
+        for valid in allowed:
+            if '://' in valid:
+                continue
+            if valid.startswith('*.'):
+                self.suffixes.add(tuple(reversed(valid[2:].split('.'))))
+            else:
+                self.hosts.add(valid)
+
+    def matches(self, origin):
+        # we always run a case insensitive check
+        origin = origin.lower()
+
+        if self.allow_all:
+            return True
 
-    Origins may be defined in several ways:
+        if not origin:
+            return False
 
-    - http://domain.com[:port]: exact match for base URI (must include port)
-    - *: allow any domain
-    - *.domain.com: matches domain.com and all subdomains, on any port
-    - domain.com: matches domain.com on any port
-    """
-    # we always run a case insensitive check
-    origin = origin.lower()
+        # Fast check
+        if origin in self.exact:
+            return True
 
-    allowed = get_origins(project)
-    if '*' in allowed:
-        return True
+        # XXX: In some cases origin might be localhost (or something similar) which causes a string value
+        # of 'null' to be sent as the origin
+        if origin == 'null':
+            return False
 
-    if not origin:
-        return False
+        if self.prefixes and origin.startswith(self.prefixes):
+            return True
+
+        hostname = urlparse(origin).hostname
+        if not hostname:
+            return False
+
+        if hostname in self.hosts:
+            return True
 
-    # Fast check
-    if origin in allowed:
-        return True
+        if self.suffixes:
+            # check foo.domain.com and domain.com
+            labels = tuple(reversed(hostname.split('.')))
+            for n in xrange(1, len(labels) + 1):
+                if labels[:n] in self.suffixes:
+                    return True
 
-    # XXX: In some cases origin might be localhost (or something similar) which causes a string value
-    # of 'null' to be sent as the origin
-    if origin == 'null':
         return False
 
-    parsed = urlparse(origin)
 
-    for valid in allowed:
-        if '://' in valid:
-            # Support partial uri matches that may include path
-            if origin.startswith(valid):
-                return True
-            continue
+@_matchers.memoize
+def get_origin_matcher(allowed):
+    return OriginMatcher(allowed)
 
-        if valid.startswith('*.'):
-            # check foo.domain.com and domain.com
-            if parsed.hostname.endswith(valid[1:]) or parsed.hostname == valid[2:]:
-                return True
-            continue
 
-        if parsed.hostname == valid:
-            return True
+def is_valid_origin(origin, project=None):
+    """
+    Given an ``origin`` which matches a base URI (e.g. http://example.com)
+    determine if a valid origin is present in the project settings.
 
-    return False
+    Origins may be defined in several ways:
+
+    - http://domain.com[:port]: exact match for base URI (must include port)
+    - *: allow any domain
+    - *.domain.com: matches domain.com and all subdomains, on any port
+    - domain.com: matches domain.com on any port
+    """
+    return get_origin_matcher(frozenset(get_origins(project))).matches(origin)
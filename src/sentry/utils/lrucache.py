@@ -26,6 +26,8 @@ class LRUCache(object):
 
     (Based on functools.lru_cache in Python 3.3)
 
+    Values can also be cached directly with ``get``, ``set`` and ``delete``.
+
     If *maxsize* is set to None, the LRU features are disabled and the cache
     can grow without bound.
 
@@ -48,7 +50,7 @@ class LRUCache(object):
     def __init__(self, maxsize=100, typed=False):
         assert maxsize > 0
 
-        self.maxsize = 100
+        self.maxsize = maxsize
         self.typed = typed
 
         self.cache = dict()
@@ -71,6 +73,74 @@ class LRUCache(object):
                 key += tuple(type(v) for k, v in sorted_items)
         return key
 
+    def _bump(self, link):
+        # record recent use of the link by moving it to the front of the list
+        root = self.nonlocal_root[0]
+        link_prev, link_next = link[PREV], link[NEXT]
+        link_prev[NEXT] = link_next
+        link_next[PREV] = link_prev
+        last = root[PREV]
+        last[NEXT] = root[PREV] = link
+        link[PREV] = last
+        link[NEXT] = root
+
+    def _insert(self, key, result):
+        root = self.nonlocal_root[0]
+        if len(self.cache) < self.maxsize:
+            # put result in a new link at the front of the list
+            last = root[PREV]
+            link = [last, root, key, result]
+            self.cache[key] = last[NEXT] = root[PREV] = link
+        else:
+            # use root to store the new key and result
+            root[KEY] = key
+            root[RESULT] = result
+            self.cache[key] = root
+            # empty the oldest link and make it the new root
+            self.root = self.nonlocal_root[0] = root[NEXT]
+            del self.cache[self.root[KEY]]
+            self.root[KEY] = None
+            self.root[RESULT] = None
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for ``key`` (marking it as the most recently
+        used), or ``default`` if there isn't one.
+        """
+        with self.lock:
+            link = self.cache.get(key)
+            if link is None:
+                return default
+            self._bump(link)
+            return link[RESULT]
+
+    def set(self, key, value):
+        """
+        Caches ``value`` for ``key``, evicting the least recently used key if
+        the cache is full.
+        """
+        with self.lock:
+            link = self.cache.get(key)
+            if link is None:
+                self._insert(key, value)
+            else:
+                link[RESULT] = value
+                self._bump(link)
+
+    def delete(self, key):
+        with self.lock:
+            link = self.cache.pop(key, None)
+            if link is not None:
+                link_prev, link_next = link[PREV], link[NEXT]
+                link_prev[NEXT] = link_next
+                link_next[PREV] = link_prev
+
     def memoize(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):  # NOQA
@@ -79,45 +149,23 @@ class LRUCache(object):
             with self.lock:
                 link = self.cache.get(key)
                 if link is not None:
-                    # record recent use of the key by moving it to the front of the list
-                    self.root, = self.nonlocal_root
-                    link_prev, link_next, key, result = link
-                    link_prev[NEXT] = link_next
-                    link_next[PREV] = link_prev
-                    last = self.root[PREV]
-                    last[NEXT] = self.root[PREV] = link
-                    link[PREV] = last
-                    link[NEXT] = self.root
+                    self._bump(link)
                     self.stats[HITS] += 1
-                    return result
+                    return link[RESULT]
 
             result = func(*args, **kwargs)
             with self.lock:
-                self.root = self.nonlocal_root[0]
-                if len(self.cache) < self.maxsize:
-                    # put result in a new link at the front of the list
-                    last = self.root[PREV]
-                    link = [last, self.root, key, result]
-                    self.cache[key] = last[NEXT] = self.root[PREV] = link
-                else:
-                    # use root to store the new key and result
-                    self.root[KEY] = key
-                    self.root[RESULT] = result
-                    self.cache[key] = self.root
-                    # empty the oldest link and make it the new root
-                    self.root = self.nonlocal_root[0] = self.root[NEXT]
-                    del self.cache[self.root[KEY]]
-                    self.root[KEY] = None
-                    self.root[RESULT] = None
+                # another thread may have cached it in the meantime
+                if key not in self.cache:
+                    self._insert(key, result)
                 self.stats[MISSES] += 1
             return result
 
-        def clear_cache(self, *args, **kwargs):
+        def clear_cache(*args, **kwargs):
             """
             Clear the cache for a specific function signature
             """
-            key = self.make_key(func, args, kwargs)
-            self.cache.pop(key, None)
+            self.delete(self.make_key(func, args, kwargs))
 
         wrapper.clear_cache = clear_cache
         return wrapper
@@ -0,0 +1,61 @@
+"""
+sentry.utils.metrics
+~~~~~~~~~~~~~~~~~~~~
+
+Lightweight, in-process counters and timings for instrumenting hot paths.
+
+:copyright: (c) 2010-2012 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import with_statement
+
+import logging
+import threading
+
+logger = logging.getLogger('sentry.metrics')
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+
+
+def incr(key, amount=1):
+    """
+    Increments the counter ``key`` by ``amount``.
+    """
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def timing(key, value):
+    """
+    Records a duration (in seconds) for ``key``.
+    """
+    with _lock:
+        count, total, maximum = _timings.get(key, (0, 0.0, 0.0))
+        _timings[key] = (count + 1, total + value, max(maximum, value))
+    logger.debug('%s took %.4fs', key, value)
+
+
+def get_counter(key):
+    return _counters.get(key, 0)
+
+
+def get_timing(key):
+    """
+    Returns a dictionary of the count, total and max of all values recorded
+    for ``key``.
+    """
+    count, total, maximum = _timings.get(key, (0, 0.0, 0.0))
+    return {
+        'count': count,
+        'total': total,
+        'max': maximum,
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timings.clear()
@@ -13,7 +13,7 @@ from django.db import models, router
 from django.db.models import signals
 from django.db.models.expressions import ExpressionNode
 
-from sentry.utils.compat import pickle
+from sentry.utils import codec
 from sentry.utils.db import resolve_expression_node
 
 logger = logging.getLogger(__name__)
@@ -88,7 +88,12 @@ class Model(models.Model):
         "Updates a local copy of attributes values"
 
         if self.id:
-            self.__data = dict((f.column, self.__get_field_value(f)) for f in self._meta.fields)
+            # lazy fields aren't tracked, as that would force them to be decoded
+            self.__data = dict(
+                (f.column, self.__get_field_value(f))
+                for f in self._meta.fields
+                if not getattr(f, 'lazy', False)
+            )
         else:
             self.__data = self.__UNSAVED
 
@@ -114,28 +119,39 @@ def __model_post_save(instance, **kwargs):
 signals.post_save.connect(__model_post_save)
 
 
+def decode_dict(value):
+    """
+    Decodes a value stored by ``GzippedDictField`` or ``BinaryDictField``,
+    returning an empty dictionary if there's nothing to decode.
+    """
+    if isinstance(value, (basestring, buffer)) and value:
+        try:
+            value = codec.decode(value)
+        except Exception, e:
+            logger.exception(e)
+            return {}
+    elif not value:
+        return {}
+    return value
+
+
 class GzippedDictField(models.TextField):
     """
     Slightly different from a JSONField in the sense that the default
     value is a dictionary.
+
+    Values are serialized with ``sentry.utils.codec`` and base64 encoded, so
+    that they can be stored in a text column.
     """
     __metaclass__ = models.SubfieldBase
 
     def to_python(self, value):
-        if isinstance(value, basestring) and value:
-            try:
-                value = pickle.loads(base64.b64decode(value).decode('zlib'))
-            except Exception, e:
-                logger.exception(e)
-                return {}
-        elif not value:
-            return {}
-        return value
+        return decode_dict(value)
 
     def get_prep_value(self, value):
         if value is None:
             return
-        return base64.b64encode(pickle.dumps(value).encode('zlib'))
+        return base64.b64encode(codec.encode(value))
 
     def value_to_string(self, obj):
         value = self._get_val_from_obj(obj)
@@ -147,3 +163,89 @@ class GzippedDictField(models.TextField):
         field_class = "django.db.models.fields.TextField"
         args, kwargs = introspector(self)
         return (field_class, args, kwargs)
+
+
+class LazyDecoder(object):
+    """
+    Keeps the value of a field as it was loaded from the database, and only
+    decodes it the first time it's accessed.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            raise AttributeError('Can only be accessed via an instance.')
+        value = obj.__dict__[self.field.name]
+        if not isinstance(value, dict):
+            value = obj.__dict__[self.field.name] = self.field.to_python(value)
+        return value
+
+    def __set__(self, obj, value):
+        if isinstance(value, buffer):
+            # buffers can't be pickled
+            value = str(value)
+        obj.__dict__[self.field.name] = value
+
+
+class BinaryDictField(models.Field):
+    """
+    Similar to ``GzippedDictField``, but stores the encoded value as is in a
+    binary column, avoiding the overhead of base64.
+
+    Values are only decoded when they're first accessed, and are written
+    back untouched if they never were. Existing text values (such as those
+    written by ``GzippedDictField``) are still read transparently.
+    """
+    lazy = True
+
+    def contribute_to_class(self, cls, name):
+        super(BinaryDictField, self).contribute_to_class(cls, name)
+        setattr(cls, self.name, LazyDecoder(self))
+
+    def db_type(self, connection):
+        vendor = getattr(connection, 'vendor', None)
+        if vendor == 'postgresql':
+            return 'bytea'
+        elif vendor == 'mysql':
+            return 'longblob'
+        return 'blob'
+
+    def to_python(self, value):
+        return decode_dict(value)
+
+    def pre_save(self, model_instance, add):
+        # avoid decoding (and re-encoding) a value which was never accessed
+        return model_instance.__dict__.get(self.attname)
+
+    def get_prep_value(self, value):
+        if value is None:
+            return
+        if isinstance(value, unicode):
+            # a legacy (base64 encoded) value, which was never decoded
+            return value.encode('utf-8')
+        elif isinstance(value, str):
+            # still encoded
+            return value
+        return codec.encode(value)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        if value is None or connection.vendor == 'mysql':
+            return value
+        # psycopg2 and sqlite3 both treat buffers as binary data
+        return buffer(value)
+
+    def value_to_string(self, obj):
+        value = self._get_val_from_obj(obj)
+        if value is None:
+            return
+        return base64.b64encode(codec.encode(value))
+
+    def south_field_triple(self):
+        "Returns a suitable description of this field for South."
+        from south.modelsinspector import introspector
+        field_class = "sentry.utils.models.BinaryDictField"
+        args, kwargs = introspector(self)
+        return (field_class, args, kwargs)
@@ -23,7 +23,8 @@ from sentry.conf import settings
 from sentry.constants import MEMBER_USER, STATUS_MUTED, STATUS_UNRESOLVED
 from sentry.coreapi import project_from_auth_vars, \
   decode_and_decompress_data, safely_load_json_string, validate_data, \
-  insert_data_to_database, APIError, APIForbidden, extract_auth_vars
+  insert_data_to_database, APIError, APIForbidden, extract_auth_vars, \
+  safely_load_json_batch, insert_batch_to_database, check_rate_limit, APIRateLimited
 from sentry.exceptions import InvalidData
 from sentry.models import Group, GroupBookmark, Project, ProjectCountByMinute, FilterValue
 from sentry.plugins import plugins
@@ -152,7 +153,7 @@ class APIView(BaseView):
                     }, exc_info=True)
                 return HttpResponse(unicode(error.msg), status=error.http_status)
             else:
-                if user:
+                if user is not None:
                     request.user = user
 
             # Legacy API was /api/store/ and the project ID was only available elsewhere
@@ -171,8 +172,14 @@ class APIView(BaseView):
                     return HttpResponse('Missing required attribute in authentication header: sentry_secret', status=400)
 
             try:
+                # shed load before we spend any time on the payload
+                self._check_rate_limit(project, auth)
                 response = super(APIView, self).dispatch(request, project=project, auth=auth, **kwargs)
 
+            except APIRateLimited, error:
+                response = HttpResponse(unicode(error.msg), status=error.http_status)
+                response['Retry-After'] = str(error.retry_after)
+
             except APIError, error:
                 logger.info('Project %r raised API error: %s', project.slug, error, extra={
                     'request': request,
@@ -184,6 +191,9 @@ class APIView(BaseView):
 
         return response
 
+    def _check_rate_limit(self, project, auth):
+        check_rate_limit(project, auth.public_key)
+
     # XXX: backported from Django 1.5
     def _allowed_methods(self):
         return [m.upper() for m in self.http_method_names if hasattr(self, m)]
@@ -255,6 +265,88 @@ class StoreView(APIView):
         return HttpResponse()
 
 
+class StoreBatchView(APIView):
+    """
+    Stores many events from a single request.
+
+    The payload is encoded the same way as it is for ``StoreView``, except
+    that it contains a list of events rather than a single one. Each event is
+    validated individually, and everything that was accepted is queued as a
+    single chunk.
+
+    The response describes the outcome of every event, in the order they
+    were sent:
+
+    >>> {
+    >>>     "results": [
+    >>>         {"id": "fc6d8c0c43fc4630ad850ee518f1b9d0", "accepted": true},
+    >>>         {"accepted": false, "error": "Invalid data: ..."}
+    >>>     ]
+    >>> }
+
+    Every event in the batch counts against the rate limit, so the batch is
+    only charged once it's been decoded.
+    """
+    def _check_rate_limit(self, project, auth):
+        pass
+
+    @never_cache
+    def post(self, request, project, auth, **kwargs):
+        result = plugins.first('has_perm', request.user, 'create_event', project)
+        if result is False:
+            raise APIForbidden('Creation of this event was blocked')
+
+        data = request.raw_post_data
+        if not data.startswith('['):
+            data = decode_and_decompress_data(data)
+        data_list = safely_load_json_batch(data)
+
+        if len(data_list) > settings.MAX_BATCH_SIZE:
+            raise APIError('Too many events in batch (%d > %d)' % (
+                len(data_list), settings.MAX_BATCH_SIZE))
+
+        check_rate_limit(project, auth.public_key, len(data_list))
+
+        results = []
+        accepted = []
+        for data in data_list:
+            if not isinstance(data, dict):
+                results.append({
+                    'accepted': False,
+                    'error': 'Invalid data: expected a mapping',
+                })
+                continue
+
+            try:
+                validate_data(project, data, auth.client)
+            except InvalidData, e:
+                error = u'Invalid data: %s (%s)' % (unicode(e), type(e))
+            except APIError, e:
+                error = unicode(e.msg)
+            else:
+                accepted.append(data)
+                results.append({
+                    'id': data['event_id'],
+                    'accepted': True,
+                })
+                continue
+
+            results.append({
+                'accepted': False,
+                'error': error,
+            })
+
+        if accepted:
+            insert_batch_to_database(accepted)
+
+        logger.info('New event batch from project %r (accepted=%d, rejected=%d)',
+            project.slug, len(accepted), len(results) - len(accepted))
+
+        response = HttpResponse(json.dumps({'results': results}))
+        response['Content-Type'] = 'application/json'
+        return response
+
+
 @csrf_exempt
 @has_access
 @never_cache
@@ -460,6 +552,23 @@ def chart(request, project=None):
     return response
 
 
+@never_cache
+@csrf_exempt
+@has_access
+def get_group_users(request, project, group_id):
+    days = min(int(request.REQUEST.get('days', '7')), 30)
+    try:
+        group = Group.objects.get(pk=group_id, project=project)
+    except Group.DoesNotExist:
+        return HttpResponseForbidden()
+
+    data = Group.objects.get_unique_user_chart_data(group, max_days=days)
+
+    response = HttpResponse(json.dumps(data))
+    response['Content-Type'] = 'application/json'
+    return response
+
+
 @never_cache
 @csrf_exempt
 @has_access
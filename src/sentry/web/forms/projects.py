@@ -10,6 +10,7 @@ from django import forms
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.utils.translation import ugettext_lazy as _
+from sentry import grouping
 from sentry.constants import EMPTY_PASSWORD_VALUES
 from sentry.models import Project, ProjectOption
 from sentry.permissions import can_set_public_projects
@@ -104,6 +105,8 @@ class EditProjectForm(forms.ModelForm):
     team = forms.TypedChoiceField(choices=(), coerce=int)
     origins = OriginsField(label=_('Allowed Domains'), required=False,
         help_text=_('Separate multiple entries with a newline.'))
+    grouping_strategy = forms.ChoiceField(label=_('Grouping'), choices=(), required=False,
+        help_text=_('Determines which parts of an event are used to group it. Only new events are affected.'))
 
     class Meta:
         fields = ('name', 'platform', 'public', 'team')
@@ -112,6 +115,7 @@ class EditProjectForm(forms.ModelForm):
     def __init__(self, request, team_list, data, instance, *args, **kwargs):
         super(EditProjectForm, self).__init__(data=data, instance=instance, *args, **kwargs)
         self.team_list = dict((t.pk, t) for t in team_list.itervalues())
+        self.fields['grouping_strategy'].choices = grouping.get_choices()
 
         if not can_set_public_projects(request.user):
             del self.fields['public']
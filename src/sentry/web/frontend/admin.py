@@ -24,8 +24,9 @@ from django.views.decorators.csrf import csrf_protect
 
 from sentry import environment
 from sentry.conf import settings
-from sentry.models import Project, MessageCountByMinute
+from sentry.models import Project, MessageCountByMinute, ProjectCountRollup
 from sentry.plugins import plugins
+from sentry.utils.dates import ROLLUP_DAY, normalize_datetime
 from sentry.web.forms import NewUserForm, ChangeUserForm, RemoveUserForm, TestEmailForm
 from sentry.web.decorators import requires_admin
 from sentry.web.helpers import render_to_response, plugin_config, \
@@ -68,9 +69,13 @@ def manage_projects(request):
     elif sort == 'name':
         order_by = 'name'
     elif sort == 'events':
-        project_list = project_list.annotate(
-            events=Sum('projectcountbyminute__times_seen'),
-        ).filter(projectcountbyminute__date__gte=timezone.now() - datetime.timedelta(days=30))
+        project_list = project_list.filter(
+            projectcountrollup__rollup=ROLLUP_DAY,
+            projectcountrollup__date__gte=normalize_datetime(
+                timezone.now() - datetime.timedelta(days=30), ROLLUP_DAY),
+        ).annotate(
+            events=Sum('projectcountrollup__times_seen'),
+        )
         order_by = '-events'
 
     project_list = project_list.order_by(order_by)
@@ -320,7 +325,9 @@ def stats(request):
         ('Projects (24h)', Project.objects.filter(
             date_added__gte=timezone.now() - datetime.timedelta(hours=24),
         ).count()),
-        ('Events', MessageCountByMinute.objects.aggregate(x=Sum('times_seen'))['x'] or 0),
+        ('Events', ProjectCountRollup.objects.filter(
+            rollup=ROLLUP_DAY,
+        ).aggregate(x=Sum('times_seen'))['x'] or 0),
         ('Events (24h)', MessageCountByMinute.objects.filter(
             date__gte=timezone.now() - datetime.timedelta(hours=24),
         ).aggregate(x=Sum('times_seen'))['x'] or 0)
@@ -12,6 +12,8 @@ from django.http import HttpResponseRedirect
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_http_methods
 
+from sentry import grouping
+from sentry.conf import settings
 from sentry.constants import MEMBER_OWNER
 from sentry.models import TeamMember, ProjectKey, Team, FilterKey, Group
 from sentry.permissions import can_create_projects, can_remove_project, can_create_teams, \
@@ -185,12 +187,15 @@ def manage_project(request, project):
 
     form = form_cls(request, team_list, request.POST or None, instance=project, initial={
         'origins': '\n'.join(get_option('sentry:origins', project) or []),
+        'grouping_strategy': get_option(grouping.OPTION_KEY, project) or settings.GROUPING_STRATEGY,
         'owner': project.owner,
     })
 
     if form.is_valid():
         project = form.save()
         set_option('sentry:origins', form.cleaned_data.get('origins') or [], project)
+        if form.cleaned_data.get('grouping_strategy'):
+            set_option(grouping.OPTION_KEY, form.cleaned_data['grouping_strategy'], project)
         return HttpResponseRedirect(request.path + '?success=1')
 
     context = csrf(request)
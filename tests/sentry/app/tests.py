@@ -10,3 +10,7 @@ class AppTest(TestCase):
     def test_buffer_is_a_buffer(self):
         from sentry.buffer.base import Buffer
         self.assertEquals(type(app.buffer), Buffer)
+
+    def test_locks_is_a_cache_lock_backend(self):
+        from sentry.locks.base import CacheLockBackend
+        self.assertEquals(type(app.locks), CacheLockBackend)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+import tempfile
+
+from sentry.benchmarks import BENCHMARKS
+from sentry.benchmarks.base import Benchmark, Result, format_results, percentile
+from sentry.benchmarks.charts import ChartBenchmark
+from sentry.benchmarks.codec import CodecBenchmark
+from sentry.benchmarks.fake_redis import FakeRedis
+from sentry.benchmarks.grouping import GroupingBenchmark
+from sentry.benchmarks.ingest import IngestBenchmark
+from sentry.benchmarks.payloads import PAYLOADS, encode_payload, make_framework_event
+from sentry.buffer.redis import RedisBuffer
+from sentry.coreapi import decode_and_decompress_data, safely_load_json_string, validate_data
+from sentry.models import Event, FilterKey, FilterValue, Group, MessageCountByMinute, \
+  MessageCountRollup, MessageFilterValue, Project, ProjectCountByMinute, ProjectCountRollup
+from sentry.utils import json
+from sentry.utils.imports import import_string
+from sentry.testutils import TestCase
+
+
+class PercentileTest(TestCase):
+    def test_empty(self):
+        self.assertEquals(percentile([], 50), 0)
+
+    def test_nearest_rank(self):
+        samples = range(1, 101)
+        self.assertEquals(percentile(samples, 50), 50)
+        self.assertEquals(percentile(samples, 95), 95)
+        self.assertEquals(percentile(samples, 100), 100)
+        self.assertEquals(percentile([3], 99), 3)
+
+
+class BenchmarkTest(TestCase):
+    def test_time(self):
+        calls = []
+        result = Benchmark(iterations=5).time('foo', lambda: calls.append(1))
+        self.assertEquals(len(calls), 5)
+        self.assertEquals(result.name, 'foo')
+        self.assertEquals(result.summary()['count'], 5)
+
+    def test_format_results(self):
+        output = format_results([Result('foo', [0.001, 0.002])])
+        lines = output.splitlines()
+        self.assertEquals(len(lines), 2)
+        assert lines[0].startswith('case')
+        assert lines[1].startswith('foo')
+
+    def test_registry_is_importable(self):
+        for path in BENCHMARKS.itervalues():
+            assert issubclass(import_string(path), Benchmark)
+
+    def test_format_results_with_size(self):
+        output = format_results([Result('foo', [0.001], size=10), Result('bar', [0.001])])
+        lines = output.splitlines()
+        assert lines[0].endswith('size')
+        assert lines[1].endswith('10')
+        assert lines[2].endswith('-')
+
+    def test_format_results_with_extra(self):
+        output = format_results([Result('foo', [0.001], extra={'groups': 3}), Result('bar', [0.001])])
+        lines = output.splitlines()
+        assert lines[0].endswith('groups')
+        assert lines[1].endswith('3')
+        assert lines[2].endswith('-')
+
+
+class CodecBenchmarkTest(TestCase):
+    def test_run(self):
+        results = CodecBenchmark(iterations=2).run()
+        sizes = dict((r.name, r.size) for r in results if r.size is not None)
+        assert sizes['codec:encode'] < sizes['legacy:encode']
+
+
+class PayloadsTest(TestCase):
+    def test_payloads_are_valid(self):
+        project = Project.objects.get(id=1)
+        for generator in PAYLOADS.itervalues():
+            data = safely_load_json_string(decode_and_decompress_data(encode_payload(generator())))
+            validate_data(project, data)
+
+    def test_framework_event_is_valid(self):
+        data = make_framework_event()
+        frames = data['sentry.interfaces.Stacktrace']['frames']
+        assert not frames[0]['in_app']
+        assert frames[-1]['in_app']
+        validate_data(Project.objects.get(id=1), data)
+
+
+class FakeRedisTest(TestCase):
+    def test_redis_buffer(self):
+        buf = RedisBuffer()
+        buf.conn = FakeRedis()
+        group = Group.objects.create(project_id=1)
+        with self.Settings(SENTRY_USE_QUEUE=True):
+            buf.incr(Group, {'times_seen': 2}, {'pk': group.pk})
+        self.assertEquals(buf.conn.scard(buf.pending_key), 1)
+        buf.process_pending()
+        self.assertEquals(Group.objects.get(pk=group.pk).times_seen, 3)
+        self.assertEquals(buf.conn.data, {buf.pending_key: set()})
+
+
+class IngestBenchmarkTest(TestCase):
+    def test_run(self):
+        results = IngestBenchmark(iterations=3).run()
+        names = [r.name for r in results]
+        for platform in PAYLOADS:
+            for stage in ('decode', 'load', 'validate', 'checksum', 'from_kwargs'):
+                assert '%s:%s' % (platform, stage) in names
+        for name in ('buffer:base', 'buffer:inprocess', 'buffer:redis:flush'):
+            assert name in names
+        assert all(r.objects is not None for r in results)
+        self.assertFalse(Group.objects.filter(logger__startswith='sentry.benchmark.').exists())
+
+    # errors logged by plugins are stored as events of their own
+    @mock.patch('sentry.utils.safe.logging', mock.Mock())
+    def test_removes_everything_it_writes(self):
+        models = (Project, Group, Event, FilterKey, FilterValue, MessageFilterValue, ProjectCountByMinute,
+                  ProjectCountRollup, MessageCountByMinute, MessageCountRollup)
+        counts = [m.objects.count() for m in models]
+        IngestBenchmark(iterations=3).run()
+        self.assertEquals([m.objects.count() for m in models], counts)
+
+
+class GroupingBenchmarkTest(TestCase):
+    def test_run(self):
+        results = GroupingBenchmark(iterations=20).run()
+        groups = dict((r.name, r.extra['groups']) for r in results)
+        assert groups['in_app'] < groups['default']
+
+    def test_corpus(self):
+        with tempfile.NamedTemporaryFile() as fp:
+            for _ in xrange(3):
+                fp.write(json.dumps(make_framework_event()) + '\n')
+            fp.flush()
+            results = GroupingBenchmark(corpus=fp.name).run()
+        assert all(r.summary()['count'] == 3 for r in results)
+
+
+class ChartBenchmarkTest(TestCase):
+    def test_run(self):
+        results = ChartBenchmark(iterations=2, groups=3).run()
+        self.assertEquals([r.name for r in results], [
+            'legacy:1d', 'series:1d', 'legacy:30d', 'series:30d', 'legacy:90d', 'series:90d',
+        ])
+        self.assertEquals(results[0].extra['points'], 75)
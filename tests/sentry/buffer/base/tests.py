@@ -3,13 +3,16 @@
 from __future__ import absolute_import
 
 import mock
+import pytest
 
 from datetime import timedelta
 from django.utils import timezone
 from sentry.buffer.base import Buffer
-from sentry.models import Group, Project
-from sentry.tasks.process_buffer import process_incr
+from django.db import connections
+from sentry.models import Group, Project, MessageFilterValue
+from sentry.tasks.process_buffer import process_incr, process_incr_many
 from sentry.testutils import TestCase
+from sentry.utils.db import get_db_engine
 
 
 class BufferTest(TestCase):
@@ -25,6 +28,13 @@ class BufferTest(TestCase):
         kwargs = dict(model=model, columns=columns, filters=filters, extra=None)
         maybe_async.assert_called_once_with(process_incr, kwargs=kwargs, countdown=5)
 
+    @mock.patch('sentry.buffer.base.maybe_async')
+    def test_incr_many_delays_single_task(self, maybe_async):
+        model = mock.Mock()
+        rows = [({'times_seen': 1}, {'pk': 1}, None), ({'times_seen': 1}, {'pk': 2}, None)]
+        self.buf.incr_many(model, rows)
+        maybe_async.assert_called_once_with(process_incr_many, kwargs=dict(model=model, rows=rows), countdown=5)
+
     def test_process_saves_data(self):
         group = Group.objects.create(project=Project(id=1))
         columns = {'times_seen': 1}
@@ -42,3 +52,121 @@ class BufferTest(TestCase):
         group_ = Group.objects.get(pk=group.pk)
         self.assertEquals(group_.times_seen, group.times_seen + 1)
         self.assertEquals(group_.last_seen.replace(microsecond=0), the_date)
+
+
+class ProcessManyTest(TestCase):
+    def setUp(self):
+        self.buf = Buffer()
+        self.group = Group.objects.create(project=Project(id=1))
+
+    def make_row(self, value, times_seen=1, extra=None):
+        return ({'times_seen': times_seen}, {
+            'group': self.group,
+            'project': self.group.project,
+            'key': 'foo',
+            'value': value,
+        }, extra)
+
+    def test_merges_rows_with_the_same_filters(self):
+        batch = self.buf._merge_rows([
+            self.make_row('bar', 1, {'last_seen': 1}),
+            self.make_row('baz', 1),
+            self.make_row('bar', 2, {'last_seen': 2}),
+        ])
+        self.assertEquals(len(batch), 2)
+        self.assertEquals(batch[0][0], {'times_seen': 3})
+        self.assertEquals(batch[0][2], {'last_seen': 2})
+        self.assertEquals(batch[1][0], {'times_seen': 1})
+        self.assertEquals(batch[1][2], None)
+
+    @mock.patch('sentry.buffer.base.buffer_incr_complete')
+    def test_applies_rows(self, buffer_incr_complete):
+        self.buf.process_many(MessageFilterValue, [
+            self.make_row('bar'),
+            self.make_row('bar'),
+            self.make_row('baz'),
+        ])
+        self.assertEquals(MessageFilterValue.objects.get(value='bar').times_seen, 2)
+        self.assertEquals(MessageFilterValue.objects.get(value='baz').times_seen, 1)
+        self.assertEquals(buffer_incr_complete.send_robust.call_count, 2)
+        for call in buffer_incr_complete.send_robust.call_args_list:
+            self.assertTrue(call[1]['created'])
+
+        buffer_incr_complete.reset_mock()
+        self.buf.process_many(MessageFilterValue, [self.make_row('bar')])
+        self.assertEquals(MessageFilterValue.objects.get(value='bar').times_seen, 3)
+        self.assertFalse(buffer_incr_complete.send_robust.call_args[1]['created'])
+
+    @mock.patch('sentry.buffer.base.get_db_engine', mock.Mock(return_value='postgresql_psycopg2'))
+    @mock.patch.object(Buffer, '_upsert')
+    def test_falls_back_without_on_conflict(self, _upsert):
+        connection = connections['default']
+        with mock.patch.object(type(connection), 'pg_version', 90400, create=True):
+            self.buf.process_many(MessageFilterValue, [self.make_row('bar'), self.make_row('baz')])
+        self.assertFalse(_upsert.called)
+        self.assertEquals(sorted(MessageFilterValue.objects.values_list('value', 'times_seen')),
+            [('bar', 1), ('baz', 1)])
+
+        with mock.patch.object(type(connection), 'pg_version', 90500, create=True):
+            self.buf.process_many(MessageFilterValue, [self.make_row('bar'), self.make_row('baz')])
+        self.assertTrue(_upsert.called)
+
+    @pytest.mark.skipif("not get_db_engine().startswith(('postgres', 'mysql'))")
+    def test_upsert_reports_created_rows(self):
+        self.buf.process_many(MessageFilterValue, [self.make_row('baz')])
+
+        rows = [self.make_row('bar'), self.make_row('baz', 2), self.make_row('qux')]
+        batch = self.buf._merge_rows(rows)
+        fields = self.buf._get_upsert_fields(MessageFilterValue, batch)
+        created = self.buf._upsert(MessageFilterValue, batch, fields, 'default', get_db_engine())
+        self.assertEquals(created, [True, False, True])
+        self.assertEquals(sorted(MessageFilterValue.objects.values_list('value', 'times_seen')),
+            [('bar', 1), ('baz', 3), ('qux', 1)])
+
+    def test_upsert_matches_returned_rows_by_key(self):
+        batch = [self.make_row('bar'), self.make_row('baz')]
+        fields = self.buf._get_upsert_fields(MessageFilterValue, batch)
+        connection = connections['default']
+        with mock.patch.object(connection, 'cursor') as cursor:
+            # rows may come back in any order
+            cursor.return_value.fetchall.return_value = [
+                (self.group.project_id, 'foo', u'baz', self.group.id, False),
+                (self.group.project_id, 'foo', u'bar', self.group.id, True),
+            ]
+            created = self.buf._upsert(MessageFilterValue, batch, fields, 'default', 'postgresql_psycopg2')
+        self.assertEquals(created, [True, False])
+
+    def test_get_upsert_fields(self):
+        fields = self.buf._get_upsert_fields(MessageFilterValue, [self.make_row('bar')])
+        self.assertEquals([f.name for f in fields], ['project', 'key', 'value', 'group'])
+
+        # a primary key lookup isn't covered by a unique constraint
+        fields = self.buf._get_upsert_fields(Group, [({'times_seen': 1}, {'pk': 1}, None)])
+        self.assertEquals(fields, None)
+
+        # nor are query expressions
+        batch = [self.make_row('bar', extra={'times_seen': mock.Mock()})]
+        self.assertEquals(self.buf._get_upsert_fields(MessageFilterValue, batch), None)
+
+    def test_get_upsert_sql_postgres(self):
+        batch = [self.make_row('bar', 2), self.make_row('baz')]
+        fields = self.buf._get_upsert_fields(MessageFilterValue, batch)
+        sql, params = self.buf._get_upsert_sql(MessageFilterValue, batch, fields, connections['default'], 'postgresql_psycopg2')
+        self.assertTrue(sql.startswith('INSERT INTO "sentry_messagefiltervalue"'))
+        self.assertTrue(sql.endswith(
+            'ON CONFLICT ("project_id", "key", "value", "group_id") DO UPDATE SET '
+            '"times_seen" = "sentry_messagefiltervalue"."times_seen" + EXCLUDED."times_seen" '
+            'RETURNING "project_id", "key", "value", "group_id", (xmax = 0)'
+        ))
+        self.assertEquals(sql.count('%s'), len(params))
+        self.assertTrue(2 in params)
+
+    def test_get_upsert_sql_mysql(self):
+        batch = [self.make_row('bar', extra={'last_seen': timezone.now()}), self.make_row('baz', extra={'last_seen': timezone.now()})]
+        fields = self.buf._get_upsert_fields(MessageFilterValue, batch)
+        sql, params = self.buf._get_upsert_sql(MessageFilterValue, batch, fields, connections['default'], 'mysql')
+        self.assertTrue(sql.endswith(
+            'ON DUPLICATE KEY UPDATE "times_seen" = "times_seen" + VALUES("times_seen"), '
+            '"last_seen" = VALUES("last_seen")'
+        ))
+        self.assertEquals(sql.count('%s'), len(params))
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from datetime import timedelta
+from django.utils import timezone
+from sentry.buffer.inprocess import InProcessBuffer
+from sentry.models import Group, Project
+from sentry.testutils import TestCase
+
+
+class InProcessBufferTest(TestCase):
+    def setUp(self):
+        self.buf = InProcessBuffer(interval=60)
+        self.group = Group.objects.create(project=Project(id=1))
+
+    def tearDown(self):
+        self.buf.close()
+
+    @mock.patch('sentry.buffer.inprocess.InProcessBuffer._ensure_thread', mock.Mock())
+    def test_incr_coalesces(self):
+        filters = {'pk': self.group.pk}
+        self.buf.incr(Group, {'times_seen': 1}, filters, {'message': 'foo'})
+        self.buf.incr(Group, {'times_seen': 2}, filters, {'message': 'bar'})
+
+        self.assertEquals(len(self.buf._pending), 1)
+        model, columns, filters_, extra = self.buf._pending.values()[0]
+        self.assertEquals(model, Group)
+        self.assertEquals(columns, {'times_seen': 3})
+        self.assertEquals(extra, {'message': 'bar'})
+
+    def test_uses_the_same_filter_keys_as_redis(self):
+        from sentry.buffer.redis import RedisBuffer
+        filters = {'pk': 1}
+        self.assertEquals(self.buf._make_key(Group, filters), RedisBuffer()._make_key(Group, filters))
+
+    @mock.patch('sentry.buffer.inprocess.InProcessBuffer._ensure_thread', mock.Mock())
+    def test_flush_saves_totals(self):
+        the_date = (timezone.now() + timedelta(days=5)).replace(microsecond=0)
+        filters = {'pk': self.group.pk}
+        self.buf.incr(Group, {'times_seen': 1}, filters)
+        self.buf.incr(Group, {'times_seen': 1}, filters, {'last_seen': the_date})
+
+        self.buf.flush()
+
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEquals(group.times_seen, self.group.times_seen + 2)
+        self.assertEquals(group.last_seen.replace(microsecond=0), the_date)
+        self.assertEquals(len(self.buf._pending), 0)
+
+    @mock.patch('sentry.buffer.inprocess.InProcessBuffer._ensure_thread', mock.Mock())
+    def test_max_keys_wakes_flusher(self):
+        self.buf.max_keys = 2
+        self.buf.incr(Group, {'times_seen': 1}, {'pk': 1})
+        self.assertFalse(self.buf._wakeup.is_set())
+        self.buf.incr(Group, {'times_seen': 1}, {'pk': 2})
+        self.assertTrue(self.buf._wakeup.is_set())
+        self.buf._pending.clear()
+
+    @mock.patch('sentry.buffer.inprocess.InProcessBuffer._ensure_thread', mock.Mock())
+    @mock.patch('sentry.buffer.inprocess.os.getpid')
+    def test_discards_parents_pending_after_fork(self, getpid):
+        getpid.return_value = self.buf._pid
+        self.buf.incr(Group, {'times_seen': 1}, {'pk': 1})
+
+        getpid.return_value = self.buf._pid + 1
+        self.buf.incr(Group, {'times_seen': 1}, {'pk': 2})
+
+        self.assertEquals(len(self.buf._pending), 1)
+        self.buf._pending.clear()
+
+    def test_close_flushes_and_stops_thread(self):
+        self.buf.incr(Group, {'times_seen': 1}, {'pk': self.group.pk})
+        thread = self.buf._thread
+        self.assertTrue(thread.is_alive())
+
+        self.buf.close()
+
+        self.assertFalse(thread.is_alive())
+        self.assertEquals(Group.objects.get(pk=self.group.pk).times_seen, self.group.times_seen + 1)
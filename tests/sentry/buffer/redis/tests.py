@@ -7,9 +7,9 @@ import mock
 from datetime import timedelta
 from django.utils import timezone
 from sentry.buffer.redis import RedisBuffer
-from sentry.models import Group, Project
+from sentry.models import Group, Project, MessageCountByMinute, MessageFilterValue
 from sentry.tasks.process_buffer import process_incr
-from sentry.utils.compat import pickle
+from sentry.utils import codec
 from sentry.testutils import TestCase
 
 
@@ -29,36 +29,45 @@ class RedisBufferTest(TestCase):
         self.assertEquals(self.buf._map_column(Group, 'project', Project(id=1)), 1)
 
     def test_make_key_response(self):
-        column = 'times_seen'
         filters = {'pk': 1}
-        self.assertEquals(self.buf._make_key(Group, filters, column), 'sentry.group:88b48b31b5f100719c64316596b10b0f:times_seen')
+        self.assertEquals(self.buf._make_key(Group, filters), 'sentry.group:88b48b31b5f100719c64316596b10b0f')
 
-    def test_make_extra_key_response(self):
-        filters = {'pk': 1}
-        self.assertEquals(self.buf._make_extra_key(Group, filters), 'sentry.group:extra:88b48b31b5f100719c64316596b10b0f')
-
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.base.maybe_async')
     def test_incr_delays_task(self, maybe_async):
-        model = mock.Mock()
         columns = {'times_seen': 1}
         filters = {'pk': 1}
-        self.buf.incr(model, columns, filters)
-        kwargs = dict(model=model, columns=columns, filters=filters, extra=None)
+        self.buf.incr(Group, columns, filters)
+        kwargs = dict(model=Group, columns=columns, filters=filters, extra=None)
         maybe_async.assert_called_once_with(process_incr, kwargs=kwargs, countdown=5)
 
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.base.maybe_async', mock.Mock())
     def test_incr_does_buffer_to_conn(self):
-        model = mock.Mock()
         columns = {'times_seen': 1}
         filters = {'pk': 1}
-        self.buf.incr(model, columns, filters)
-        self.assertEquals(self.buf.conn.get('foo'), '1')
+        self.buf.incr(Group, columns, filters)
+        self.buf.incr(Group, columns, filters)
+        self.assertEquals(self.buf.conn.hget('foo', 'i+times_seen'), '2')
+        self.assertEquals(self.buf.conn.hget('foo', 'm'), self.buf._dump_filters(Group, filters))
+        assert self.buf.conn.ttl('foo') > 0
+
+    @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
+    @mock.patch('sentry.buffer.base.maybe_async', mock.Mock())
+    def test_incr_writes_filters_with_counters_atomically(self):
+        conn = self.buf.conn.get_conn('foo')
+        with mock.patch.object(conn, 'pipeline', wraps=conn.pipeline) as pipeline:
+            self.buf.incr(Group, {'times_seen': 1}, {'pk': 1})
+        pipeline.assert_called_once_with(transaction=True)
+
+    @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
+    @mock.patch('sentry.buffer.base.maybe_async', mock.Mock())
+    def test_incr_does_buffer_extra_to_conn(self):
+        columns = {'times_seen': 1}
+        filters = {'pk': 1}
+        self.buf.incr(Group, columns, filters, extra={'foo': 'bar'})
+        self.assertEquals(self.buf.conn.hget('foo', 'e+foo'), codec.encode('bar'))
 
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.base.Buffer.process')
     def test_process_does_not_save_empty_results(self, process):
@@ -68,47 +77,118 @@ class RedisBufferTest(TestCase):
         self.buf.process(Group, columns, filters)
         self.assertFalse(process.called)
 
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.base.Buffer.process')
     def test_process_does_save_call_with_results(self, process):
         group = Group.objects.create(project=Project(id=1))
         columns = {'times_seen': 1}
         filters = {'pk': group.pk}
-        self.buf.conn.set('foo', 2)
+        self.buf.conn.hset('foo', 'i+times_seen', 2)
         self.buf.process(Group, columns, filters)
         process.assert_called_once_with(Group, {'times_seen': 2}, filters, None)
 
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
     @mock.patch('sentry.buffer.base.Buffer.process')
     def test_process_does_clear_buffer(self, process):
         group = Group.objects.create(project=Project(id=1))
         columns = {'times_seen': 1}
         filters = {'pk': group.pk}
-        self.buf.conn.set('foo', 2)
+        self.buf.conn.hset('foo', 'i+times_seen', 2)
         self.buf.process(Group, columns, filters)
-        self.assertEquals(self.buf.conn.get('foo'), '0')
-
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
-    @mock.patch('sentry.buffer.base.maybe_async', mock.Mock())
-    def test_incr_does_buffer_extra_to_conn(self):
-        model = mock.Mock()
-        columns = {'times_seen': 1}
-        filters = {'pk': 1}
-        self.buf.incr(model, columns, filters, extra={'foo': 'bar'})
-        self.assertEquals(self.buf.conn.hget('extra', 'foo'), pickle.dumps('bar'))
+        self.assertFalse(self.buf.conn.exists('foo'))
 
     @mock.patch('sentry.buffer.redis.RedisBuffer._make_key', mock.Mock(return_value='foo'))
-    @mock.patch('sentry.buffer.redis.RedisBuffer._make_extra_key', mock.Mock(return_value='extra'))
     def test_process_saves_extra(self):
         group = Group.objects.create(project=Project(id=1))
         columns = {'times_seen': 1}
         filters = {'pk': group.pk}
         the_date = (timezone.now() + timedelta(days=5)).replace(microsecond=0)
-        self.buf.conn.set('foo', 1)
-        self.buf.conn.hset('extra', 'last_seen', pickle.dumps(the_date))
+        self.buf.conn.hset('foo', 'i+times_seen', 1)
+        self.buf.conn.hset('foo', 'e+last_seen', codec.encode(the_date))
         self.buf.process(Group, columns, filters)
         group_ = Group.objects.get(pk=group.pk)
         self.assertEquals(group_.last_seen.replace(microsecond=0), the_date)
+
+    @mock.patch('sentry.buffer.base.maybe_async')
+    def test_incr_with_queue_marks_pending(self, maybe_async):
+        group = Group.objects.create(project=Project(id=1))
+        columns = {'times_seen': 1}
+        filters = {'group': group, 'project': group.project}
+        with self.Settings(SENTRY_USE_QUEUE=True):
+            self.buf.incr(MessageFilterValue, columns, filters)
+            self.buf.incr(MessageFilterValue, columns, filters)
+        self.assertFalse(maybe_async.called)
+        self.assertEquals(self.buf.conn.smembers(self.buf.pending_key), set([
+            self.buf._make_key(MessageFilterValue, filters),
+        ]))
+
+    @mock.patch('sentry.buffer.base.maybe_async')
+    def test_incr_many_with_queue_marks_pending(self, maybe_async):
+        group = Group.objects.create(project=Project(id=1))
+        columns = {'times_seen': 1}
+        filters = [
+            {'group': group, 'project': group.project, 'key': 'foo', 'value': 'bar'},
+            {'group': group, 'project': group.project, 'key': 'foo', 'value': 'baz'},
+        ]
+        with self.Settings(SENTRY_USE_QUEUE=True):
+            self.buf.incr_many(MessageFilterValue, [(columns, f, None) for f in filters])
+        self.assertFalse(maybe_async.called)
+
+        keys = [self.buf._make_key(MessageFilterValue, f) for f in filters]
+        self.assertEquals(self.buf.conn.smembers(self.buf.pending_key), set(keys))
+        for key in keys:
+            self.assertEquals(self.buf.conn.hget(key, 'i+times_seen'), '1')
+
+    def test_load_filters(self):
+        group = Group.objects.create(project=Project(id=1))
+        the_date = timezone.now()
+        value = self.buf._dump_filters(MessageCountByMinute, {
+            'group': group,
+            'project': group.project,
+            'date': the_date,
+        })
+        model, filters = self.buf._load_filters(value)
+        self.assertEquals(model, MessageCountByMinute)
+        self.assertEquals(filters['group'].id, group.id)
+        self.assertEquals(filters['project'].id, 1)
+        self.assertEquals(filters['date'], the_date)
+
+    def test_process_pending(self):
+        group = Group.objects.create(project=Project(id=1))
+        the_date = (timezone.now() + timedelta(days=5)).replace(microsecond=0)
+        columns = {'times_seen': 1}
+        filters = {'group': group, 'project': group.project, 'key': 'foo', 'value': 'bar'}
+        MessageFilterValue.objects.create(times_seen=0, **filters)
+        with self.Settings(SENTRY_USE_QUEUE=True):
+            for _ in xrange(3):
+                self.buf.incr(MessageFilterValue, columns, filters, {'last_seen': the_date})
+
+        self.buf.process_pending()
+
+        self.assertEquals(self.buf.conn.scard(self.buf.pending_key), 0)
+        self.assertFalse(self.buf.conn.exists(self.buf._make_key(MessageFilterValue, filters)))
+        inst = MessageFilterValue.objects.get(group=group, key='foo', value='bar')
+        self.assertEquals(inst.times_seen, 3)
+        self.assertEquals(inst.last_seen.replace(microsecond=0), the_date)
+
+        # a second run has nothing left to do
+        self.buf.process_pending()
+        inst = MessageFilterValue.objects.get(group=group, key='foo', value='bar')
+        self.assertEquals(inst.times_seen, 3)
+
+    @mock.patch('sentry.buffer.redis.RedisBuffer.process_many')
+    def test_process_pending_batches_by_model(self, process_many):
+        group = Group.objects.create(project=Project(id=1))
+        columns = {'times_seen': 1}
+        with self.Settings(SENTRY_USE_QUEUE=True):
+            for value in ('foo', 'bar'):
+                self.buf.incr(MessageFilterValue, columns, {
+                    'group': group, 'project': group.project, 'key': 'foo', 'value': value,
+                })
+
+        self.buf.process_pending()
+
+        self.assertEquals(process_many.call_count, 1)
+        model, rows = process_many.call_args[0]
+        self.assertEquals(model, MessageFilterValue)
+        self.assertEquals(sorted(r[1]['value'] for r in rows), ['bar', 'foo'])
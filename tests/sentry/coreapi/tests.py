@@ -7,15 +7,23 @@ import mock
 
 from django.contrib.auth.models import User
 
-from sentry.models import Project
+from sentry.manager import get_checksum_from_event
+from sentry.models import Event, Project, ProjectCountByMinute, ProjectKey, Team
 from sentry.exceptions import InvalidTimestamp, InvalidInterface, InvalidData
 from sentry.coreapi import project_from_id, project_from_api_key_and_id, \
   extract_auth_vars, project_from_auth_vars, APIUnauthorized, \
   APIForbidden, process_data_timestamp, \
-  insert_data_to_database, validate_data
+  insert_data_to_database, validate_data, safely_load_json_batch, \
+  insert_batch_to_database, check_rate_limit, APIRateLimited, \
+  APIBatchTooLarge
+from sentry.interfaces import Interface, register, unregister
 from sentry.testutils import TestCase
 
 
+class DummyInterface(Interface):
+    pass
+
+
 class BaseAPITest(TestCase):
     def setUp(self):
         self.user = User.objects.create(username='coreapi')
@@ -145,6 +153,102 @@ class ProjectFromAuthVarsTest(BaseAPITest):
         auth_vars = {'sentry_key': self.pk.public_key}
         self.assertRaises(APIUnauthorized, project_from_auth_vars, auth_vars)
 
+    def test_invalid_key(self):
+        self.assertRaises(APIForbidden, project_from_auth_vars, {'sentry_key': 'foo'})
+
+    def test_invalid_secret(self):
+        auth_vars = {'sentry_key': self.pk.public_key, 'sentry_secret': 'foo'}
+        self.assertRaises(APIForbidden, project_from_auth_vars, auth_vars)
+
+    def test_cached(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+        with self.assertNumQueries(0):
+            result = project_from_auth_vars(auth_vars)
+        self.assertEquals(result, (self.project, self.pk.user))
+
+    def test_does_not_cache_user(self):
+        context = ProjectKey.objects.get_auth_context(self.pk.public_key)
+        self.assertEquals(context['user_id'], self.pk.user_id)
+        self.assertTrue(context['is_active'])
+        self.assertFalse(any(isinstance(v, User) for v in context.itervalues()))
+
+    def test_user_is_loaded_lazily(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+        with self.assertNumQueries(0):
+            project, user = project_from_auth_vars(auth_vars)
+        with self.assertNumQueries(1):
+            self.assertEquals(user.id, self.pk.user_id)
+
+    def test_invalidated_by_user(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+
+        user = User.objects.get(id=self.pm.user_id)
+        user.is_active = False
+        user.save()
+        self.assertRaises(APIUnauthorized, project_from_auth_vars, auth_vars)
+
+    def test_invalidated_by_member(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+
+        self.pm.is_active = False
+        self.pm.save()
+        self.assertRaises(APIUnauthorized, project_from_auth_vars, auth_vars)
+
+    def test_invalidated_by_key(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+
+        self.pk.delete()
+        self.assertRaises(APIForbidden, project_from_auth_vars, auth_vars)
+
+    def test_invalidated_by_project(self):
+        auth_vars = {'sentry_key': self.pk.public_key}
+        project_from_auth_vars(auth_vars)
+
+        self.project.team = Team.objects.create(name='Other', owner=User.objects.create(username='other'))
+        self.project.save()
+        self.assertRaises(APIUnauthorized, project_from_auth_vars, auth_vars)
+
+    def test_new_key(self):
+        self.assertRaises(APIForbidden, project_from_auth_vars, {'sentry_key': 'a' * 32})
+
+        ProjectKey.objects.create(project=self.project, public_key='a' * 32)
+        self.assertEquals(project_from_auth_vars({'sentry_key': 'a' * 32}), (self.project, None))
+
+
+class CheckRateLimitTest(BaseAPITest):
+    @mock.patch('sentry.app.quotas.is_rate_limited', mock.Mock(return_value=0))
+    @mock.patch('sentry.app.quotas.record_dropped')
+    def test_within_quota(self, record_dropped):
+        check_rate_limit(self.project, 'foo')
+        self.assertFalse(record_dropped.called)
+
+    @mock.patch('sentry.app.quotas.is_rate_limited')
+    @mock.patch('sentry.app.quotas.record_dropped')
+    def test_over_quota(self, record_dropped, is_rate_limited):
+        is_rate_limited.return_value = 2.5
+        with self.assertRaises(APIRateLimited) as cm:
+            check_rate_limit(self.project, 'foo', 3)
+        self.assertEquals(cm.exception.retry_after, 3)
+        self.assertEquals(cm.exception.http_status, 429)
+
+        is_rate_limited.assert_called_once_with(self.project, 'foo', 3)
+        record_dropped.assert_called_once_with(self.project, 3)
+        # dropped events are only counted once they're flushed
+        self.assertFalse(ProjectCountByMinute.objects.exists())
+
+    @mock.patch('sentry.app.quotas.get_capacity', mock.Mock(return_value=2))
+    @mock.patch('sentry.app.quotas.is_rate_limited')
+    def test_more_than_capacity(self, is_rate_limited):
+        with self.assertRaises(APIBatchTooLarge) as cm:
+            check_rate_limit(self.project, 'foo', 3)
+        self.assertEquals(cm.exception.http_status, 413)
+        self.assertFalse(is_rate_limited.called)
+
 
 class ProcessDataTimestampTest(BaseAPITest):
     def test_iso_timestamp(self):
@@ -186,12 +290,111 @@ class InsertDataToDatabaseTest(BaseAPITest):
     @mock.patch('sentry.models.Group.objects.from_kwargs')
     def test_insert_data_to_database(self, from_kwargs):
         insert_data_to_database({
-            'foo': 'bar'
+            'project': 1,
+            'event_id': 'a' * 32,
         })
-        from_kwargs.assert_called_once_with(foo='bar')
+        from_kwargs.assert_called_once_with(project=1, event_id='a' * 32)
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs')
+    def test_drops_duplicate_event_id(self, from_kwargs):
+        insert_data_to_database({'project': 1, 'event_id': 'a' * 32})
+        insert_data_to_database({'project': 1, 'event_id': 'a' * 32})
+        self.assertEquals(from_kwargs.call_count, 1)
+
+        insert_data_to_database({'project': 2, 'event_id': 'a' * 32})
+        self.assertEquals(from_kwargs.call_count, 2)
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs')
+    def test_dedupe_can_be_disabled(self, from_kwargs):
+        with self.Settings(SENTRY_DEDUPE_TIMEOUT=0):
+            insert_data_to_database({'project': 1, 'event_id': 'a' * 32})
+            insert_data_to_database({'project': 1, 'event_id': 'a' * 32})
+        self.assertEquals(from_kwargs.call_count, 2)
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs')
+    def test_accepts_retry_after_failing_to_queue(self, from_kwargs):
+        with mock.patch('sentry.coreapi.maybe_delay', side_effect=Exception()):
+            self.assertRaises(Exception, insert_data_to_database, {'project': 1, 'event_id': 'a' * 32})
+        insert_data_to_database({'project': 1, 'event_id': 'a' * 32})
+        self.assertEquals(from_kwargs.call_count, 1)
+
+
+class InsertBatchToDatabaseTest(BaseAPITest):
+    @mock.patch('sentry.models.Group.objects.from_kwargs_bulk')
+    def test_insert_batch_to_database(self, from_kwargs_bulk):
+        insert_batch_to_database([{
+            'project': 1,
+            'event_id': 'a' * 32,
+        }])
+        from_kwargs_bulk.assert_called_once_with([{'project': 1, 'event_id': 'a' * 32}])
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs_bulk')
+    def test_drops_duplicate_event_ids(self, from_kwargs_bulk):
+        insert_batch_to_database([
+            {'project': 1, 'event_id': 'a' * 32},
+            {'project': 1, 'event_id': 'a' * 32},
+            {'project': 1, 'event_id': 'b' * 32},
+        ])
+        from_kwargs_bulk.assert_called_once_with([
+            {'project': 1, 'event_id': 'a' * 32},
+            {'project': 1, 'event_id': 'b' * 32},
+        ])
+
+        insert_batch_to_database([{'project': 1, 'event_id': 'b' * 32}])
+        self.assertEquals(from_kwargs_bulk.call_count, 1)
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs_bulk')
+    def test_accepts_retry_after_failing_to_queue(self, from_kwargs_bulk):
+        data_list = [{'project': 1, 'event_id': 'a' * 32}, {'project': 1, 'event_id': 'b' * 32}]
+        with mock.patch('sentry.coreapi.maybe_delay', side_effect=Exception()):
+            self.assertRaises(Exception, insert_batch_to_database, data_list)
+        insert_batch_to_database(data_list)
+        from_kwargs_bulk.assert_called_once_with(data_list)
+
+
+class SafelyLoadJsonBatchTest(BaseAPITest):
+    def test_list(self):
+        result = safely_load_json_batch('[{"message": "foo"}, {"message": "bar"}]')
+        self.assertEquals(result, [{'message': 'foo'}, {'message': 'bar'}])
+
+    def test_coerces_keys(self):
+        result = safely_load_json_batch('[{"message": "foo"}]')
+        self.assertEquals(type(result[0].keys()[0]), str)
+
+    def test_passes_through_invalid_entries(self):
+        result = safely_load_json_batch('[{"message": "foo"}, 1]')
+        self.assertEquals(result, [{'message': 'foo'}, 1])
+
+    def test_requires_list(self):
+        self.assertRaises(APIForbidden, safely_load_json_batch, '{"message": "foo"}')
+
+    def test_invalid_json(self):
+        self.assertRaises(APIForbidden, safely_load_json_batch, '[{')
 
 
 class ValidateDataTest(BaseAPITest):
+    def test_computes_checksum(self):
+        data = validate_data(self.project, {
+            'message': 'foo',
+            'sentry.interfaces.Exception': {'type': 'ValueError', 'value': 'foo'},
+            'sentry.interfaces.Stacktrace': {'frames': [{'filename': 'foo.py'}]},
+        })
+        event = Event(message='foo', data=data)
+        self.assertEquals(data['checksum'], get_checksum_from_event(event))
+
+    def test_computes_checksum_from_message(self):
+        data = validate_data(self.project, {
+            'message': 'foo',
+        })
+        self.assertEquals(data['checksum'], 'acbd18db4cc2f85cedef654fccc4a4d8')
+
+    def test_keeps_client_checksum(self):
+        data = validate_data(self.project, {
+            'message': 'foo',
+            'checksum': 'a' * 32,
+        })
+        self.assertEquals(data['checksum'], 'a' * 32)
+
     def test_missing_project_id(self):
         data = validate_data(self.project, {
             'message': 'foo',
@@ -226,6 +429,19 @@ class ValidateDataTest(BaseAPITest):
             'sentry.interfaces.Exception2': 'bar',
         })
 
+    def test_registered_interface(self):
+        path = '%s.DummyInterface' % (__name__,)
+        register(DummyInterface)
+        try:
+            data = validate_data(self.project, {
+                'project': self.project.id,
+                'message': 'foo',
+                path: {'foo': 'bar'},
+            })
+        finally:
+            unregister(DummyInterface)
+        self.assertEquals(data[path], {'foo': 'bar'})
+
     def test_invalid_interface_args(self):
         self.assertRaises(InvalidData, validate_data, self.project, {
             'project': self.project.id,
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from sentry.grouping import GroupingStrategy, InAppGroupingStrategy, OPTION_KEY, \
+  get_strategy, get_strategy_for_project, register, strategies, unregister
+from sentry.interfaces import InterfaceMap
+from sentry.models import Project, ProjectOption
+from sentry.testutils import TestCase
+
+
+def make_frame(module, context_line, in_app):
+    return {
+        'filename': module.replace('.', '/') + '.py',
+        'module': module,
+        'function': 'foo',
+        'lineno': 1,
+        'context_line': context_line,
+        'in_app': in_app,
+    }
+
+
+def make_interfaces(frames, exc_type='ValueError'):
+    return InterfaceMap({
+        'sentry.interfaces.Stacktrace': {'frames': frames},
+        'sentry.interfaces.Exception': {'type': exc_type, 'value': 'bar'},
+    })
+
+
+class InAppGroupingStrategyTest(TestCase):
+    strategy = InAppGroupingStrategy()
+
+    def test_ignores_framework_frames(self):
+        app_frame = make_frame('app.views', 'foo()', True)
+        one = make_interfaces([make_frame('django.core', 'bar()', False), app_frame])
+        two = make_interfaces([make_frame('django.middleware', 'baz()', False), app_frame])
+        self.assertEquals(self.strategy.get_checksum(one, 'foo'), self.strategy.get_checksum(two, 'foo'))
+        self.assertNotEquals(GroupingStrategy().get_checksum(one, 'foo'), GroupingStrategy().get_checksum(two, 'foo'))
+
+    def test_uses_all_frames_without_app_frames(self):
+        one = make_interfaces([make_frame('django.core', 'bar()', False)])
+        two = make_interfaces([make_frame('django.middleware', 'baz()', False)])
+        self.assertNotEquals(self.strategy.get_checksum(one, 'foo'), self.strategy.get_checksum(two, 'foo'))
+
+    def test_includes_exception_type(self):
+        frames = [make_frame('app.views', 'foo()', True)]
+        self.assertEquals(self.strategy.get_hash(make_interfaces(frames), 'foo'), [
+            'app.views', 'foo()', 'ValueError',
+        ])
+        self.assertNotEquals(
+            self.strategy.get_checksum(make_interfaces(frames, 'ValueError'), 'foo'),
+            self.strategy.get_checksum(make_interfaces(frames, 'TypeError'), 'foo'))
+
+    def test_max_frames(self):
+        frames = [make_frame('app.views', 'foo(%d)' % (n,), True) for n in xrange(20)]
+        result = self.strategy.get_hash(make_interfaces(frames), 'foo')
+        self.assertEquals(result[1], 'foo(10)')
+        self.assertEquals(len(result), self.strategy.max_frames * 2 + 1)
+
+    def test_normalizes_context_line(self):
+        one = make_interfaces([make_frame('app.views', 'foo(<object at 0x7f2d1c0>)', True)])
+        two = make_interfaces([make_frame('app.views', '  foo(<object   at 0x7f2d8e8>)', True)])
+        self.assertEquals(self.strategy.get_checksum(one, 'foo'), self.strategy.get_checksum(two, 'foo'))
+
+    def test_falls_back_to_message(self):
+        interfaces = InterfaceMap({})
+        self.assertEquals(self.strategy.get_hash(interfaces, 'foo'), ['foo'])
+
+
+class GetStrategyTest(TestCase):
+    def test_default(self):
+        assert isinstance(get_strategy(), GroupingStrategy)
+        with self.Settings(SENTRY_GROUPING_STRATEGY='in_app'):
+            assert isinstance(get_strategy(), InAppGroupingStrategy)
+
+    @mock.patch('sentry.grouping.logging')
+    def test_unknown_strategy(self, logging):
+        self.assertEquals(get_strategy('foo'), strategies['default'])
+        assert logging.getLogger.return_value.error.called
+
+    def test_project_option(self):
+        project = Project.objects.get(id=1)
+        assert get_strategy_for_project(project) is strategies['default']
+        ProjectOption.objects.set_value(project, OPTION_KEY, 'in_app')
+        assert get_strategy_for_project(project) is strategies['in_app']
+        ProjectOption.objects.unset_value(project, OPTION_KEY)
+        assert get_strategy_for_project(project) is strategies['default']
+
+    def test_project_option_is_cached(self):
+        project = Project.objects.get(id=1)
+        ProjectOption.objects.set_value(project, OPTION_KEY, 'in_app')
+        assert get_strategy_for_project(project) is strategies['in_app']
+        with mock.patch.object(ProjectOption.objects, 'get_value') as get_value:
+            assert get_strategy_for_project(project) is strategies['in_app']
+        self.assertFalse(get_value.called)
+
+        project = Project.objects.create(name='Other', slug='other')
+        assert get_strategy_for_project(project) is strategies['default']
+        with mock.patch.object(ProjectOption.objects, 'get_value') as get_value:
+            assert get_strategy_for_project(project) is strategies['default']
+        self.assertFalse(get_value.called)
+
+    def test_register(self):
+        class FooStrategy(GroupingStrategy):
+            name = 'foo'
+
+        register(FooStrategy)
+        try:
+            assert isinstance(get_strategy('foo'), FooStrategy)
+        finally:
+            unregister(FooStrategy)
+        assert 'foo' not in strategies
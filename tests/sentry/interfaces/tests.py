@@ -5,7 +5,8 @@ from __future__ import absolute_import
 import mock
 import pickle
 
-from sentry.interfaces import Interface, Message, Query, Stacktrace
+from sentry.interfaces import Interface, InterfaceManager, InterfaceMap, Message, Query, \
+  Stacktrace, registry
 from sentry.models import Event
 from sentry.testutils import TestCase, fixture
 
@@ -18,6 +19,99 @@ class InterfaceBase(TestCase):
         )
 
 
+class DummyInterface(Interface):
+    pass
+
+
+class InterfaceManagerTest(TestCase):
+    @fixture
+    def manager(self):
+        return InterfaceManager(['sentry.interfaces.Message', 'sentry.interfaces.Query'])
+
+    def test_get(self):
+        self.assertEquals(self.manager.get('sentry.interfaces.Message'), Message)
+        self.assertRaises(KeyError, self.manager.get, 'sentry.interfaces.Stacktrace')
+
+    def test_contains(self):
+        assert 'sentry.interfaces.Query' in self.manager
+        assert 'sentry.interfaces.Stacktrace' not in self.manager
+
+    def test_all(self):
+        self.assertEquals(self.manager.all(), [Message, Query])
+
+    @mock.patch('sentry.interfaces.import_string')
+    def test_imports_once(self, import_string):
+        self.manager.get('sentry.interfaces.Message')
+        self.manager.get('sentry.interfaces.Query')
+        self.assertEquals(import_string.call_count, 2)
+
+    def test_ignores_invalid_paths(self):
+        manager = InterfaceManager(['sentry.interfaces.Message', 'sentry.interfaces.DoesNotExist'])
+        self.assertEquals(manager.all(), [Message])
+
+    def test_register(self):
+        self.manager.get('sentry.interfaces.Message')
+        self.manager.register(DummyInterface)
+        path = '%s.DummyInterface' % (__name__,)
+        self.assertEquals(self.manager.get(path), DummyInterface)
+        self.manager.unregister(DummyInterface)
+        assert path not in self.manager
+
+    def test_default_registry(self):
+        self.assertEquals(registry.get('sentry.interfaces.Stacktrace'), Stacktrace)
+
+
+class InterfaceMapTest(TestCase):
+    @fixture
+    def data(self):
+        return {
+            'sentry.interfaces.Message': {'message': 'foo'},
+            'sentry.interfaces.Stacktrace': {'frames': [{'filename': 'foo.py'}]},
+            'extra': {'foo': 'bar'},
+        }
+
+    def test_keys_are_ordered_by_score(self):
+        interfaces = InterfaceMap(self.data)
+        self.assertEquals(interfaces.keys(), ['sentry.interfaces.Stacktrace', 'sentry.interfaces.Message'])
+        self.assertEquals([type(i) for i in interfaces.itervalues()], [Stacktrace, Message])
+
+    def test_contains(self):
+        interfaces = InterfaceMap(self.data)
+        assert 'sentry.interfaces.Message' in interfaces
+        assert 'extra' not in interfaces
+        self.assertEquals(len(interfaces), 2)
+
+    def test_get(self):
+        interfaces = InterfaceMap(self.data)
+        self.assertEquals(interfaces.get('sentry.interfaces.Message').message, 'foo')
+        self.assertEquals(interfaces.get('sentry.interfaces.Http'), None)
+        self.assertRaises(KeyError, interfaces.__getitem__, 'sentry.interfaces.Http')
+
+    def test_instantiates_on_access(self):
+        message = mock.Mock(score=0)
+        stacktrace = mock.Mock(score=1000)
+        interfaces = InterfaceMap(self.data, {
+            'sentry.interfaces.Message': message,
+            'sentry.interfaces.Stacktrace': stacktrace,
+        })
+        interfaces.keys()
+        self.assertFalse(message.called)
+        interfaces['sentry.interfaces.Message']
+        interfaces['sentry.interfaces.Message']
+        message.assert_called_once_with(message='foo')
+        self.assertFalse(stacktrace.called)
+
+
+class EventInterfacesTest(TestCase):
+    def test_skips_unknown_interfaces(self):
+        event = Event(data={
+            'sentry.interfaces.Message': {'message': 'foo'},
+            'sentry.interfaces.DoesNotExist': {'foo': 'bar'},
+            'extra': {'foo': 'bar'},
+        })
+        self.assertEquals(event.interfaces.keys(), ['sentry.interfaces.Message'])
+
+
 class InterfaceTest(InterfaceBase):
     @fixture
     def interface(self):
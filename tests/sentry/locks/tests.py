@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import threading
+import time
+
+import mock
+
+from django.core.cache import get_cache
+from sentry import app
+from sentry.locks.base import CacheLockBackend
+from sentry.locks.redis import RedisLockBackend
+from sentry.utils import metrics
+from sentry.utils.cache import Lock, UnableToGetLock
+from sentry.testutils import TestCase
+
+
+class CacheLockBackendTest(TestCase):
+    def setUp(self):
+        self.backend = CacheLockBackend(cache=get_cache('django.core.cache.backends.locmem.LocMemCache'))
+
+    def test_acquire_and_release(self):
+        token, was_locked = self.backend.acquire('foo', 1)
+        assert token
+        assert not was_locked
+
+        self.backend.release('foo', token)
+
+        token, was_locked = self.backend.acquire('foo', 1)
+        assert not was_locked
+
+    def test_acquire_times_out(self):
+        self.backend.acquire('foo', 1)
+        self.assertRaises(UnableToGetLock, self.backend.acquire, 'foo', 0.05)
+
+    def test_release_ignores_other_tokens(self):
+        self.backend.acquire('foo', 1)
+        self.backend.release('foo', 'bar')
+        self.assertRaises(UnableToGetLock, self.backend.acquire, 'foo', 0.05)
+
+
+class RedisLockBackendTest(TestCase):
+    def setUp(self):
+        self.backend = RedisLockBackend(hosts={
+            0: {'db': 9}
+        })
+        self.backend.conn.flushdb()
+
+    def test_default_host_is_local(self):
+        backend = RedisLockBackend()
+        self.assertEquals(len(backend.conn.hosts), 1)
+        self.assertEquals(backend.conn.hosts[0].host, 'localhost')
+
+    def test_acquire_and_release(self):
+        token, was_locked = self.backend.acquire('foo', 1)
+        assert not was_locked
+        self.assertEquals(self.backend.conn.get('foo'), token)
+
+        self.backend.release('foo', token)
+        self.assertEquals(self.backend.conn.get('foo'), None)
+
+    def test_acquire_times_out(self):
+        self.backend.acquire('foo', 10)
+        self.assertRaises(UnableToGetLock, self.backend.acquire, 'foo', 0.01)
+
+    def test_release_ignores_other_tokens(self):
+        token, _ = self.backend.acquire('foo', 1)
+        self.backend.release('foo', 'bar')
+        self.assertEquals(self.backend.conn.get('foo'), token)
+        self.assertEquals(self.backend.conn.llen('foo:release'), 0)
+
+    def test_waiter_is_woken_on_release(self):
+        token, _ = self.backend.acquire('foo', 10)
+
+        def release():
+            time.sleep(0.05)
+            self.backend.release('foo', token)
+
+        thread = threading.Thread(target=release)
+        thread.start()
+
+        start = time.time()
+        _, was_locked = self.backend.acquire('foo', 10)
+        thread.join()
+
+        assert was_locked
+        # we were woken by the release rather than the polling interval
+        assert time.time() - start < self.backend.poll_interval
+
+
+class LockTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_uses_app_backend_by_default(self):
+        self.assertEquals(Lock('foo').backend, app.locks)
+
+    def test_releases_with_token(self):
+        backend = mock.Mock()
+        backend.acquire.return_value = ('abc', False)
+
+        with Lock('foo', timeout=5, backend=backend) as lock:
+            assert not lock.was_locked
+
+        backend.acquire.assert_called_once_with('foo', 5)
+        backend.release.assert_called_once_with('foo', 'abc')
+        self.assertEquals(metrics.get_counter('lock.contended'), 0)
+
+    def test_records_wait_time(self):
+        backend = mock.Mock()
+        backend.acquire.return_value = ('abc', True)
+
+        with Lock('foo', backend=backend) as lock:
+            assert lock.was_locked
+
+        self.assertEquals(metrics.get_counter('lock.contended'), 1)
+        self.assertEquals(metrics.get_timing('lock.wait')['count'], 1)
+
+    def test_records_timeouts(self):
+        backend = mock.Mock()
+        backend.acquire.side_effect = UnableToGetLock
+
+        with self.assertRaises(UnableToGetLock):
+            with Lock('foo', backend=backend):
+                pass
+
+        self.assertEquals(metrics.get_counter('lock.timeout'), 1)
+        assert not backend.release.called
@@ -6,11 +6,13 @@ import datetime
 import mock
 import pytest
 
+from django.db import IntegrityError, connection
 from django.utils import timezone
 from sentry.interfaces import Interface
 from sentry.manager import get_checksum_from_event
-from sentry.models import Event, Group, Project, MessageCountByMinute, ProjectCountByMinute, \
-  SearchDocument
+from sentry.models import AffectedUserByGroup, Event, Group, Project, MessageCountByMinute, ProjectCountByMinute, \
+  SearchDocument, FilterValue, MessageFilterValue, MessageCountRollup, ProjectCountRollup
+from sentry.utils.dates import ROLLUP_DAY, ROLLUP_HOUR, normalize_datetime
 from sentry.utils.db import has_trending  # NOQA
 from sentry.testutils import TestCase
 
@@ -46,6 +48,13 @@ class SentryManagerTest(TestCase):
         self.assertEquals(event.message, 'foo')
         self.assertEquals(event.project_id, 1)
 
+    @mock.patch('sentry.manager.get_checksum_from_event')
+    def test_uses_precomputed_checksum(self, get_checksum_from_event):
+        event = Group.objects.from_kwargs(1, message='foo', checksum='a' * 32)
+        self.assertEquals(event.checksum, 'a' * 32)
+        self.assertEquals(event.group.checksum, 'a' * 32)
+        self.assertFalse(get_checksum_from_event.called)
+
     def test_records_users_seen(self):
         # TODO: we could lower the level of this test by just testing our signal receiver's logic
         event = Group.objects.from_kwargs(1, message='foo', **{
@@ -206,6 +215,22 @@ class SentryManagerTest(TestCase):
         inst = ProjectCountByMinute.objects.get(project=event.project)
         self.assertEquals(inst.times_seen, 2)
 
+    def test_does_update_rollups(self):
+        date = datetime.datetime(2013, 1, 1, 12, 45, tzinfo=timezone.utc)
+        Group.objects.from_kwargs(1, message='foo', timestamp=date)
+        event = Group.objects.from_kwargs(1, message='foo', timestamp=date + datetime.timedelta(minutes=30))
+
+        results = list(MessageCountRollup.objects.filter(group=event.group).values_list(
+            'rollup', 'date', 'times_seen').order_by('rollup', 'date'))
+        self.assertEquals(results, [
+            (ROLLUP_HOUR, date.replace(minute=0), 1),
+            (ROLLUP_HOUR, date.replace(hour=13, minute=0), 1),
+            (ROLLUP_DAY, date.replace(hour=0, minute=0), 2),
+        ])
+
+        inst = ProjectCountRollup.objects.get(project=event.project, rollup=ROLLUP_DAY)
+        self.assertEquals(inst.times_seen, 2)
+
     def test_updates_group(self):
         Group.objects.from_kwargs(1, message='foo', checksum='a' * 32)
         event = Group.objects.from_kwargs(1, message='foo bar', checksum='a' * 32)
@@ -244,6 +269,239 @@ class SentryManagerTest(TestCase):
         self.assertEquals(res.value, 'boz')
         self.assertEquals(res.times_seen, 1)
 
+    def test_add_tags_skips_known_tags(self):
+        event = Group.objects.from_kwargs(1, message='rrr')
+        group = event.group
+        Group.objects.add_tags(group, tags=(('foo', 'bar'),))
+
+        with mock.patch('sentry.models.FilterValue.objects.get_or_create') as get_or_create:
+            with mock.patch('sentry.models.FilterKey.objects.get_or_create') as get_key_or_create:
+                Group.objects.add_tags(group, tags=(('foo', 'bar'),))
+        self.assertFalse(get_or_create.called)
+        self.assertFalse(get_key_or_create.called)
+
+        res = group.messagefiltervalue_set.get(key='foo', value='bar')
+        self.assertEquals(res.times_seen, 2)
+
+    def test_add_tags_creates_missing_in_one_batch(self):
+        event = Group.objects.from_kwargs(1, message='rrr')
+        group = event.group
+        with mock.patch('sentry.models.FilterValue.objects.get_or_create') as get_or_create:
+            Group.objects.add_tags(group, tags=(('foo', 'bar'), ('foo', 'baz'), ('foo', 'bar')))
+        self.assertFalse(get_or_create.called)
+
+        self.assertEquals(sorted(FilterValue.objects.filter(key='foo').values_list('value', flat=True)), ['bar', 'baz'])
+        self.assertEquals(group.messagefiltervalue_set.get(key='foo', value='bar').times_seen, 2)
+
+    @mock.patch('sentry.manager.GroupManager._get_tag_plugins')
+    def test_collects_tags_from_plugins(self, _get_tag_plugins):
+        plugin = mock.Mock()
+        plugin.get_tags.return_value = [('site', 'foo')]
+        _get_tag_plugins.return_value = [plugin]
+
+        event = Group.objects.from_kwargs(1, message='rrr')
+        plugin.get_tags.assert_called_once_with(event)
+        self.assertEquals(event.group.messagefiltervalue_set.get(key='site').value, 'foo')
+
+
+@mock.patch('sentry.manager.has_charts', mock.Mock(return_value=True))
+class ChartDataTest(TestCase):
+    def setUp(self):
+        self.project = Project.objects.get(id=1)
+        self.group = Group.objects.create(project=self.project)
+        self.now = timezone.now()
+
+    def create_rollup(self, rollup, date, times_seen):
+        date = normalize_datetime(date, rollup)
+        MessageCountRollup.objects.create(
+            project=self.project, group=self.group, rollup=rollup, date=date, times_seen=times_seen)
+        ProjectCountRollup.objects.create(
+            project=self.project, rollup=rollup, date=date, times_seen=times_seen)
+
+    def test_reads_hourly_rollups(self):
+        self.create_rollup(ROLLUP_HOUR, self.now - datetime.timedelta(hours=2), 3)
+        self.create_rollup(ROLLUP_DAY, self.now - datetime.timedelta(hours=2), 5)
+
+        results = Group.objects.get_chart_data(self.group, max_days=1)
+        self.assertEquals(len(results), 25)
+        self.assertEquals(sum(n for _, n in results), 3)
+
+        results = Project.objects.get_chart_data(self.project, max_days=1)
+        self.assertEquals(sum(n for _, n in results), 3)
+
+    def test_reads_daily_rollups(self):
+        self.create_rollup(ROLLUP_HOUR, self.now - datetime.timedelta(days=2), 3)
+        self.create_rollup(ROLLUP_DAY, self.now - datetime.timedelta(days=2), 5)
+
+        results = Group.objects.get_chart_data(self.group, max_days=30)
+        self.assertEquals(len(results), 31)
+        self.assertEquals(sum(n for _, n in results), 5)
+
+    def test_key(self):
+        self.create_rollup(ROLLUP_HOUR, self.now - datetime.timedelta(hours=2), 3)
+
+        results = Group.objects.get_chart_data_for_group([self.group], max_days=1, key='group')
+        self.assertEquals(results.keys(), [self.group.id])
+        self.assertEquals(sum(n for _, n in results[self.group.id]), 3)
+
+    def test_unique_users(self):
+        AffectedUserByGroup.objects.create(
+            project=self.project, group=self.group, ident='foo',
+            first_seen=self.now - datetime.timedelta(days=2), last_seen=self.now - datetime.timedelta(days=1))
+        AffectedUserByGroup.objects.create(
+            project=self.project, group=self.group, ident='bar',
+            first_seen=self.now, last_seen=self.now)
+
+        results = Group.objects.get_unique_user_chart_data(self.group, max_days=7)
+        self.assertEquals(len(results), 7)
+        self.assertEquals([n for _, n in results], [0, 0, 0, 0, 1, 1, 1])
+
+
+class FromKwargsBulkTest(TestCase):
+    def test_groups_identical_events(self):
+        events = Group.objects.from_kwargs_bulk([
+            {'project': 1, 'event_id': 'a' * 32, 'message': 'foo', 'checksum': 'a' * 32},
+            {'project': 1, 'event_id': 'b' * 32, 'message': 'foo', 'checksum': 'a' * 32},
+            {'project': 1, 'event_id': 'c' * 32, 'message': 'bar', 'checksum': 'b' * 32},
+        ])
+        self.assertEquals(len(events), 3)
+        self.assertEquals(Group.objects.count(), 2)
+        self.assertEquals(Event.objects.count(), 3)
+
+        group = Group.objects.get(checksum='a' * 32)
+        self.assertEquals(group.times_seen, 2)
+        self.assertEquals(group.event_set.count(), 2)
+        self.assertEquals(events[0].group, group)
+        self.assertEquals(events[0].id, Event.objects.get(event_id='a' * 32).id)
+
+        inst = MessageCountByMinute.objects.get(group=group)
+        self.assertEquals(inst.times_seen, 2)
+
+        inst = ProjectCountByMinute.objects.get(project=1)
+        self.assertEquals(inst.times_seen, 3)
+
+        res = group.messagefiltervalue_set.get(key='logger')
+        self.assertEquals(res.value, 'root')
+        self.assertEquals(res.times_seen, 2)
+
+    def test_updates_existing_group(self):
+        Group.objects.from_kwargs(1, message='foo', checksum='a' * 32)
+        Group.objects.from_kwargs_bulk([
+            {'project': 1, 'message': 'foo', 'checksum': 'a' * 32},
+            {'project': 1, 'message': 'foo bar', 'checksum': 'a' * 32},
+        ])
+
+        group = Group.objects.get()
+        self.assertEquals(group.times_seen, 3)
+        self.assertEquals(group.message, 'foo bar')
+        self.assertEquals(group.event_set.count(), 3)
+
+    @mock.patch('sentry.manager.send_group_processors')
+    def test_only_first_event_is_new(self, send_group_processors):
+        events = Group.objects.from_kwargs_bulk([
+            {'project': 1, 'message': 'foo'},
+            {'project': 1, 'message': 'foo'},
+        ])
+
+        self.assertEquals(send_group_processors.call_count, 2)
+        send_group_processors.assert_any_call(group=events[0].group, event=events[0], is_new=True, is_sample=False)
+        send_group_processors.assert_any_call(group=events[1].group, event=events[1], is_new=False, is_sample=False)
+
+    def test_dupe_message_id(self):
+        Group.objects.from_kwargs(1, event_id='a' * 32, message='foo')
+
+        events = Group.objects.from_kwargs_bulk([
+            {'project': 1, 'event_id': 'a' * 32, 'message': 'foo'},
+            {'project': 1, 'event_id': 'b' * 32, 'message': 'foo'},
+        ])
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0].event_id, 'b' * 32)
+        self.assertEquals(Event.objects.count(), 2)
+
+    def test_records_users_seen(self):
+        user = {'sentry.interfaces.User': {'email': 'foo@example.com'}}
+        events = Group.objects.from_kwargs_bulk([
+            dict(project=1, message='foo', **user),
+            dict(project=1, message='foo', **user),
+        ])
+        group = Group.objects.get(id=events[0].group_id)
+        assert group.users_seen == 1
+
+    @mock.patch('sentry.manager.logger', mock.Mock())
+    def test_failed_bucket_keeps_the_rest(self):
+        create_group_bulk = Group.objects._create_group_bulk
+
+        def _create_group_bulk(items):
+            if items[0][0].message == 'bad':
+                # fails the way a broken query would, aborting the transaction
+                # on PostgreSQL
+                connection.cursor().execute('SELECT * FROM sentry_doesnotexist')
+            return create_group_bulk(items)
+
+        with mock.patch.object(Group.objects, '_create_group_bulk', side_effect=_create_group_bulk):
+            events = Group.objects.from_kwargs_bulk([
+                {'project': 1, 'message': 'bad', 'checksum': 'a' * 32},
+                {'project': 1, 'message': 'foo', 'checksum': 'b' * 32},
+                {'project': 1, 'message': 'bar', 'checksum': 'c' * 32},
+            ])
+
+        self.assertEquals([e.message for e in events], ['foo', 'bar'])
+        self.assertEquals(sorted(Group.objects.values_list('message', flat=True)), ['bar', 'foo'])
+        self.assertEquals(sorted(Event.objects.values_list('message', flat=True)), ['bar', 'foo'])
+
+
+class LockFreeManagerTest(TestCase):
+    @mock.patch('sentry.manager.Lock')
+    def test_get_or_create_skips_lock(self, Lock):
+        project = Project.objects.get(id=1)
+        inst, created = FilterValue.objects.get_or_create(project=project, key='foo', value='bar')
+        assert created
+        assert not Lock.called
+
+        inst2, created = FilterValue.objects.get_or_create(project=project, key='foo', value='bar')
+        assert not created
+        self.assertEquals(inst.id, inst2.id)
+
+    @mock.patch('sentry.manager.Lock')
+    def test_get_or_create_with_null_lookup_uses_lock(self, Lock):
+        FilterValue.objects.get_or_create(project=None, key='foo', value='bar')
+        assert Lock.called
+
+    def test_get_or_create_lost_race(self):
+        project = Project.objects.get(id=1)
+        inst = FilterValue.objects.create(project=project, key='foo', value='bar')
+
+        # the initial lookup misses, as if another worker created the row right after it
+        with mock.patch.object(FilterValue.objects, 'get', side_effect=FilterValue.DoesNotExist):
+            inst2, created = FilterValue.objects.get_or_create(project=project, key='foo', value='bar')
+
+        assert not created
+        self.assertEquals(inst.id, inst2.id)
+
+    @mock.patch('sentry.manager.Lock')
+    def test_create_or_update_lost_race(self, Lock):
+        from django.db.models import F
+
+        group = Group.objects.from_kwargs(1, message='foo').group
+        Lock.reset_mock()
+        manager = MessageFilterValue.objects
+        lookup = dict(project=group.project, group=group, key='foo', value='bar')
+
+        def create(**kwargs):
+            # another worker inserts the row first
+            manager.get_query_set().create(**lookup)
+            raise IntegrityError
+
+        with mock.patch.object(manager, 'create', side_effect=create):
+            affected, created = manager.create_or_update(defaults={
+                'times_seen': F('times_seen') + 2,
+            }, **lookup)
+
+        assert not created
+        assert not Lock.called
+        self.assertEquals(affected, 1)
+        self.assertEquals(manager.get(**lookup).times_seen, 2)
+
 
 class SearchManagerTest(TestCase):
     def test_search(self):
@@ -6,9 +6,10 @@ from __future__ import absolute_import
 from django.core import mail
 from django.core.urlresolvers import reverse
 from django.contrib.auth.models import User
+from django.utils import timezone
 from sentry.models import Project, ProjectKey, Group, Event, Team, \
-  MessageFilterValue, MessageCountByMinute, FilterValue, PendingTeamMember, \
-  LostPasswordHash
+  MessageFilterValue, MessageCountByMinute, MessageCountRollup, ProjectCountRollup, \
+  FilterValue, PendingTeamMember, LostPasswordHash
 
 from sentry.testutils import TestCase, fixture
 
@@ -36,6 +37,38 @@ class ProjectTest(TestCase):
         self.assertEquals(project2.messagecountbyminute_set.count(), 0)
         self.assertEquals(project2.filtervalue_set.count(), 0)
 
+    def test_merge_to_keeps_counts(self):
+        from sentry.utils.dates import ROLLUP_DAY, ROLLUP_HOUR, normalize_datetime
+
+        project2 = Project.objects.create(name='Test')
+        moved = Group.objects.create(project=self.project, checksum='a' * 32, message='foo')
+        merged = Group.objects.create(project=self.project, checksum='b' * 32, message='bar')
+        other = Group.objects.create(project=project2, checksum='b' * 32, message='bar')
+
+        now = timezone.now()
+        for group in (moved, merged, other):
+            MessageCountByMinute.objects.create(project=group.project, group=group,
+                date=normalize_datetime(now), times_seen=1)
+            for rollup in (ROLLUP_HOUR, ROLLUP_DAY):
+                MessageCountRollup.objects.create(project=group.project, group=group, rollup=rollup,
+                    date=normalize_datetime(now, rollup), times_seen=1)
+        for project in (self.project, project2):
+            ProjectCountRollup.objects.create(project=project, rollup=ROLLUP_DAY,
+                date=normalize_datetime(now, ROLLUP_DAY), times_seen=2, times_dropped=1)
+
+        self.project.merge_to(project2)
+
+        self.assertEquals(MessageCountByMinute.objects.get(group=moved).project, project2)
+        self.assertEquals(MessageCountByMinute.objects.get(group=other).times_seen, 2)
+        self.assertEquals(sorted(MessageCountRollup.objects.filter(group=moved).values_list('project', 'times_seen')),
+            [(project2.id, 1), (project2.id, 1)])
+        self.assertEquals(sorted(MessageCountRollup.objects.filter(group=other).values_list('rollup', 'times_seen')),
+            [(ROLLUP_HOUR, 2), (ROLLUP_DAY, 2)])
+
+        counts = ProjectCountRollup.objects.get(project=project2)
+        self.assertEquals(counts.times_seen, 4)
+        self.assertEquals(counts.times_dropped, 2)
+
 
 class ProjectKeyTest(TestCase):
     fixtures = ['tests/fixtures/views.json']
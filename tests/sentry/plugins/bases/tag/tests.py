@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from sentry.plugins.bases.tag import TagPlugin
+from sentry.testutils import TestCase
+
+
+class TagPluginTest(TestCase):
+    def test_get_tags(self):
+        plugin = TagPlugin()
+        plugin.tag = 'site'
+        plugin.get_tag_values = mock.Mock(return_value=['foo', 'bar'])
+        event = mock.Mock()
+        self.assertEquals(plugin.get_tags(event), [('site', 'foo'), ('site', 'bar')])
+        plugin.get_tag_values.assert_called_once_with(event)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from django.core.cache import get_cache
+from sentry.models import Project, ProjectCountByMinute, ProjectCountRollup, ProjectOption
+from sentry.quotas.base import CacheQuota, Quota, OPTION_KEY, consume_token
+from sentry.quotas.redis import RedisQuota
+from sentry.testutils import TestCase
+from sentry.utils.dates import ROLLUP_DAY, ROLLUP_HOUR
+
+
+class ConsumeTokenTest(TestCase):
+    def test_takes_token(self):
+        self.assertEquals(consume_token(5, 0, 0, 1, 5), (4, 0))
+
+    def test_refills_up_to_capacity(self):
+        self.assertEquals(consume_token(0, 0, 2, 1, 5), (1, 0))
+        self.assertEquals(consume_token(0, 0, 100, 1, 5), (4, 0))
+
+    def test_empty(self):
+        tokens, retry_after = consume_token(0.5, 0, 0, 0.25, 5)
+        self.assertEquals(tokens, 0.5)
+        self.assertEquals(retry_after, 2)
+
+    def test_count(self):
+        self.assertEquals(consume_token(5, 0, 0, 1, 5, 3), (2, 0))
+        self.assertEquals(consume_token(2, 0, 0, 1, 5, 3), (2, 1))
+
+
+class QuotaTest(TestCase):
+    def test_is_never_rate_limited(self):
+        project = Project.objects.get(id=1)
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=1):
+            for _ in xrange(3):
+                self.assertEquals(Quota().is_rate_limited(project), 0)
+
+    def test_project_quota(self):
+        project = Project.objects.get(id=1)
+        quota = Quota()
+        self.assertEquals(quota.get_project_quota(project), 0)
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=10):
+            self.assertEquals(quota.get_project_quota(project), 10)
+            ProjectOption.objects.set_value(project, OPTION_KEY, 0)
+            self.assertEquals(quota.get_project_quota(project), 0)
+            ProjectOption.objects.set_value(project, OPTION_KEY, 20)
+            self.assertEquals(quota.get_project_quota(project), 20)
+
+    def test_record_dropped(self):
+        project = Project.objects.get(id=1)
+        quota = Quota()
+        quota.record_dropped(project)
+        quota.record_dropped(project, 2)
+        self.assertFalse(ProjectCountByMinute.objects.exists())
+
+        quota.flush_dropped()
+        counts = ProjectCountByMinute.objects.get(project=project)
+        self.assertEquals(counts.times_dropped, 3)
+        self.assertEquals(counts.times_seen, 0)
+
+        counts = ProjectCountRollup.objects.filter(project=project)
+        self.assertEquals(sorted(counts.values_list('rollup', 'times_dropped')), [(ROLLUP_HOUR, 3), (ROLLUP_DAY, 3)])
+
+    def test_flushes_dropped_periodically(self):
+        project = Project.objects.get(id=1)
+        quota = Quota()
+        with mock.patch('time.time', mock.Mock(return_value=quota._last_flush + 1)):
+            quota.record_dropped(project)
+        self.assertFalse(ProjectCountByMinute.objects.exists())
+
+        with mock.patch('time.time', mock.Mock(return_value=quota._last_flush + quota.dropped_flush_interval)):
+            quota.maybe_flush_dropped()
+        self.assertEquals(ProjectCountByMinute.objects.get(project=project).times_dropped, 1)
+
+
+class TokenBucketQuotaTestMixin(object):
+    def test_unlimited(self):
+        for _ in xrange(5):
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'foo'), 0)
+
+    @mock.patch('time.time', mock.Mock(return_value=1000.0))
+    def test_project_limit(self):
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=2):
+            self.assertEquals(self.quota.is_rate_limited(self.project), 0)
+            self.assertEquals(self.quota.is_rate_limited(self.project), 0)
+            self.assertAlmostEquals(self.quota.is_rate_limited(self.project), 30)
+
+        # the bucket refills while there's no limit
+        self.assertEquals(self.quota.is_rate_limited(self.project), 0)
+
+    @mock.patch('time.time', mock.Mock(return_value=1000.0))
+    def test_key_limit(self):
+        with self.Settings(SENTRY_KEY_RATE_LIMIT=1):
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'foo'), 0)
+            assert self.quota.is_rate_limited(self.project, 'foo')
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'bar'), 0)
+
+    @mock.patch('time.time', mock.Mock(return_value=1000.0))
+    def test_rejected_key_does_not_spend_project_tokens(self):
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=2, SENTRY_KEY_RATE_LIMIT=1):
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'foo'), 0)
+            for _ in xrange(5):
+                assert self.quota.is_rate_limited(self.project, 'foo')
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'bar'), 0)
+
+    @mock.patch('time.time', mock.Mock(return_value=1000.0))
+    def test_refunds_key_when_project_is_over_quota(self):
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=1, SENTRY_KEY_RATE_LIMIT=2):
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'foo'), 0)
+            assert self.quota.is_rate_limited(self.project, 'foo')
+        with self.Settings(SENTRY_KEY_RATE_LIMIT=2):
+            self.assertEquals(self.quota.is_rate_limited(self.project, 'foo'), 0)
+            assert self.quota.is_rate_limited(self.project, 'foo')
+
+    def test_capacity(self):
+        self.assertEquals(self.quota.get_capacity(self.project, 'foo'), 0)
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=10):
+            self.assertEquals(self.quota.get_capacity(self.project, 'foo'), 10)
+            with self.Settings(SENTRY_KEY_RATE_LIMIT=5):
+                self.assertEquals(self.quota.get_capacity(self.project, 'foo'), 5)
+                self.assertEquals(self.quota.get_capacity(self.project), 10)
+
+    @mock.patch('time.time', mock.Mock(return_value=1000.0))
+    def test_count(self):
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=10):
+            self.assertEquals(self.quota.is_rate_limited(self.project, count=8), 0)
+            self.assertAlmostEquals(self.quota.is_rate_limited(self.project, count=4), 12)
+            self.assertEquals(self.quota.is_rate_limited(self.project, count=2), 0)
+
+    def test_refills(self):
+        with self.Settings(SENTRY_PROJECT_RATE_LIMIT=60):
+            with mock.patch('time.time', mock.Mock(return_value=1000.0)):
+                for _ in xrange(60):
+                    self.assertEquals(self.quota.is_rate_limited(self.project), 0)
+                assert self.quota.is_rate_limited(self.project)
+            with mock.patch('time.time', mock.Mock(return_value=1001.0)):
+                self.assertEquals(self.quota.is_rate_limited(self.project), 0)
+                assert self.quota.is_rate_limited(self.project)
+
+
+class CacheQuotaTest(TokenBucketQuotaTestMixin, TestCase):
+    def setUp(self):
+        self.project = Project.objects.get(id=1)
+        self.quota = CacheQuota(cache=get_cache('django.core.cache.backends.locmem.LocMemCache'))
+        self.quota.cache.clear()
+
+
+class RedisQuotaTest(TokenBucketQuotaTestMixin, TestCase):
+    def setUp(self):
+        self.project = Project.objects.get(id=1)
+        self.quota = RedisQuota(hosts={
+            0: {'db': 9}
+        })
+        self.quota.conn.flushdb()
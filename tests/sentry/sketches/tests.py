@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from sentry.models import Group, Project, ProjectOption
+from sentry.sketches.base import TagSketches, OPTION_KEY
+from sentry.sketches.redis import RedisTagSketches
+from sentry.testutils import TestCase
+
+
+class TagSketchesTest(TestCase):
+    def test_nothing_is_sketched(self):
+        project = Project.objects.get(id=1)
+        sketches = TagSketches()
+        with self.Settings(SENTRY_SKETCHED_TAGS=('url',)):
+            self.assertEquals(sketches.get_sketched_keys(project), frozenset())
+
+
+class RedisTagSketchesTest(TestCase):
+    def setUp(self):
+        self.project = Project.objects.get(id=1)
+        self.group = Group.objects.create(project=self.project)
+        self.sketches = RedisTagSketches(capacity=2, hosts={
+            0: {'db': 9}
+        })
+        self.sketches.conn.flushdb()
+
+    def test_sketched_keys(self):
+        self.assertEquals(self.sketches.get_sketched_keys(self.project), frozenset())
+        with self.Settings(SENTRY_SKETCHED_TAGS=('url',)):
+            self.assertEquals(self.sketches.get_sketched_keys(self.project), frozenset(['url']))
+            ProjectOption.objects.set_value(self.project, OPTION_KEY, ['sentry:user'])
+            self.assertEquals(self.sketches.get_sketched_keys(self.project), frozenset(['sentry:user']))
+
+    def test_counts_values(self):
+        self.sketches.incr(self.group, {('url', 'http://example.com/foo'): 2, ('site', u'b\xe4r'): 1})
+        self.sketches.incr(self.group, {('url', 'http://example.com/foo'): 1, ('url', 'http://example.com/bar'): 1})
+
+        self.assertEquals(self.sketches.get_keys(self.group), ['site', 'url'])
+        self.assertEquals(self.sketches.get_top_values(self.group, 'url'), [
+            ('http://example.com/foo', 3),
+            ('http://example.com/bar', 1),
+        ])
+        self.assertEquals(self.sketches.get_top_values(self.group, 'url', limit=1), [
+            ('http://example.com/foo', 3),
+        ])
+        self.assertEquals(self.sketches.get_top_values(self.group, 'site'), [(u'b\xe4r', 1)])
+
+    def test_replaces_least_common_value(self):
+        self.sketches.incr(self.group, {('url', 'a'): 3, ('url', 'b'): 1})
+        self.sketches.incr(self.group, {('url', 'c'): 1})
+
+        # c takes over b's count, so it may be overestimated
+        self.assertEquals(self.sketches.get_top_values(self.group, 'url'), [('a', 3), ('c', 2)])
+
+    def test_get_unique_tags(self):
+        self.sketches.incr(self.group, {('url', 'a'): 3})
+        with self.Settings(SENTRY_SKETCHED_TAGS=('url',)):
+            with mock.patch('sentry.app.tag_sketches', self.sketches):
+                self.assertEquals(list(self.group.get_unique_tags('url')), [('a', 3, None, None)])
+                self.assertEquals(self.group.get_tags(), ['url'])
+
+    def test_add_tags_skips_exact_rows(self):
+        with self.Settings(SENTRY_SKETCHED_TAGS=('url',)):
+            with mock.patch('sentry.app.tag_sketches', self.sketches):
+                Group.objects.add_tags(self.group, [('url', 'a'), ('url', 'a'), ('site', 'b')])
+
+        self.assertEquals(self.sketches.get_top_values(self.group, 'url'), [('a', 2)])
+        self.assertEquals(list(self.group.messagefiltervalue_set.values_list('key', 'value')), [('site', 'b')])
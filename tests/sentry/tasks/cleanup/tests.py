@@ -2,11 +2,15 @@
 
 from __future__ import absolute_import
 
+import datetime
+
 from celery.task import Task
+from django.utils import timezone
 from sentry.models import (Event, Group, MessageCountByMinute,
-    MessageFilterValue, ProjectCountByMinute, FilterValue, FilterKey)
+    MessageFilterValue, Project, ProjectCountByMinute, ProjectCountRollup, FilterValue, FilterKey)
 from sentry.tasks.cleanup import cleanup
 from sentry.testutils import TestCase
+from sentry.utils.dates import ROLLUP_DAY
 
 ALL_MODELS = (Event, Group, ProjectCountByMinute, MessageCountByMinute, MessageFilterValue,
               FilterValue, FilterKey)
@@ -38,3 +42,25 @@ class SentryCleanupTest(TestCase):
 
         for model in ALL_MODELS:
             assert model.objects.count() == 0
+
+    def test_keeps_minute_counts_for_fewer_days(self):
+        project = Project.objects.get(id=1)
+        now = timezone.now()
+        for days in (3, 10):
+            date = now - datetime.timedelta(days=days)
+            ProjectCountByMinute.objects.create(project=project, date=date)
+            ProjectCountRollup.objects.create(project=project, rollup=ROLLUP_DAY, date=date)
+
+        with self.Settings(SENTRY_MINUTE_COUNT_DAYS=7):
+            cleanup(days=30)
+
+        self.assertEquals(ProjectCountByMinute.objects.filter(date__gte=now - datetime.timedelta(days=11)).count(), 1)
+        self.assertEquals(ProjectCountRollup.objects.count(), 2)
+
+    def test_keeps_minute_counts_by_default(self):
+        project = Project.objects.get(id=1)
+        ProjectCountByMinute.objects.create(project=project, date=timezone.now() - datetime.timedelta(days=10))
+
+        cleanup(days=30)
+
+        self.assertEquals(ProjectCountByMinute.objects.filter(project=project).count(), 1)
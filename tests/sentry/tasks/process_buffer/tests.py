@@ -5,7 +5,7 @@ from __future__ import absolute_import
 import mock
 
 from celery.task import Task
-from sentry.tasks.process_buffer import process_incr
+from sentry.tasks.process_buffer import process_incr, process_pending
 from sentry.testutils import TestCase
 
 
@@ -20,3 +20,13 @@ class ProcessIncrTest(TestCase):
         filters = {'pk': 1}
         process_incr(model=model, columns=columns, filters=filters)
         process.assert_called_once_with(model=model, columns=columns, filters=filters)
+
+
+class ProcessPendingTest(TestCase):
+    def test_is_task(self):
+        self.assertTrue(isinstance(process_pending, Task))
+
+    @mock.patch('sentry.app.buffer.process_pending')
+    def test_calls_process_pending(self, process_pending_func):
+        process_pending()
+        process_pending_func.assert_called_once_with()
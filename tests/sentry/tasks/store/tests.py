@@ -5,7 +5,7 @@ from __future__ import absolute_import
 import mock
 
 from celery.task import Task
-from sentry.tasks.store import store_event
+from sentry.tasks.store import store_event, store_events
 from sentry.testutils import TestCase
 
 
@@ -18,3 +18,14 @@ class StoreEventTest(TestCase):
         data = {'foo': 'bar'}
         store_event(data=data)
         from_kwargs.assert_called_once_with(foo='bar')
+
+
+class StoreEventsTest(TestCase):
+    def test_is_task(self):
+        self.assertTrue(isinstance(store_events, Task))
+
+    @mock.patch('sentry.models.Group.objects.from_kwargs_bulk')
+    def test_calls_from_kwargs_bulk(self, from_kwargs_bulk):
+        data_list = [{'foo': 'bar'}, {'foo': 'baz'}]
+        store_events(data_list=data_list)
+        from_kwargs_bulk.assert_called_once_with(data_list)
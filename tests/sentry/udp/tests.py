@@ -2,10 +2,16 @@
 
 from __future__ import absolute_import
 
+import socket
+
+import mock
+
 from django.contrib.auth.models import User
-from sentry.models import Project
+from sentry.coreapi import APIRateLimited
+from sentry.models import Event, Project
+from sentry.utils import metrics
 from sentry.utils.auth import get_auth_header
-from sentry.services.udp import SentryUDPServer
+from sentry.services.udp import EventBatcher, SentryUDPServer, get_socket_drops
 
 from sentry.testutils import TestCase
 
@@ -28,3 +34,123 @@ class SentryUDPTest(TestCase):
         header = get_auth_header('udpTest', api_key=self.pk.public_key, secret_key=self.pk.secret_key)
         packet = header + '\n\n' + message
         self.assertEquals(None, self.server.handle(packet, self.address))
+
+    @mock.patch('sentry.app.quotas.is_rate_limited', mock.Mock(return_value=1))
+    def test_rate_limited(self):
+        data = {'message': 'hello'}
+        message = self._makeMessage(data)
+        header = get_auth_header('udpTest', api_key=self.pk.public_key, secret_key=self.pk.secret_key)
+        packet = header + '\n\n' + message
+        assert isinstance(self.server.handle(packet, self.address), APIRateLimited)
+        self.assertFalse(Event.objects.exists())
+
+    def test_batches_events(self):
+        server = SentryUDPServer(*self.address, batch_size=2)
+        header = get_auth_header('udpTest', api_key=self.pk.public_key, secret_key=self.pk.secret_key)
+        for message in ('foo', 'bar', 'baz'):
+            packet = header + '\n\n' + self._makeMessage({'message': message})
+            self.assertEquals(None, server.handle(packet, self.address))
+
+        self.assertEquals(sorted(Event.objects.values_list('message', flat=True)), ['bar', 'foo'])
+        server.batcher.flush()
+        self.assertEquals(Event.objects.count(), 3)
+
+    def test_batching_is_disabled_by_default(self):
+        self.assertEquals(self.server.batcher, None)
+        with self.Settings(SENTRY_UDP_BATCH_SIZE=10, SENTRY_UDP_BATCH_INTERVAL=5):
+            server = SentryUDPServer(*self.address)
+        self.assertEquals(server.batcher.size, 10)
+        self.assertEquals(server.batcher.interval, 5)
+
+    def test_recv_buffer(self):
+        server = SentryUDPServer('127.0.0.1', 0, recv_buffer=65536)
+        server.setup()
+        sock = server.make_socket()
+        try:
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) >= 65536
+        finally:
+            sock.close()
+
+    def test_processes_share_port(self):
+        server = SentryUDPServer('127.0.0.1', 0, processes=2)
+        server.setup()
+        sock = server.make_socket()
+        try:
+            server.port = sock.getsockname()[1]
+            server.make_socket().close()
+        finally:
+            sock.close()
+
+    def test_get_socket_drops(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        try:
+            self.assertIn(get_socket_drops(sock), (0, None))
+        finally:
+            sock.close()
+
+    @mock.patch('sentry.services.udp.signal')
+    @mock.patch('sentry.services.udp.os')
+    def test_run_processes(self, os, signal):
+        server = SentryUDPServer('127.0.0.1', 0, processes=2)
+        os.fork.side_effect = [101, 102]
+        os.wait.side_effect = KeyboardInterrupt
+        server.run()
+        self.assertEquals(os.fork.call_count, 2)
+        self.assertEquals(sorted(c[0][0] for c in os.kill.call_args_list), [101, 102])
+        self.assertEquals(os.waitpid.call_count, 2)
+
+    @mock.patch('time.sleep', mock.Mock())
+    @mock.patch('sentry.services.udp.signal')
+    @mock.patch('sentry.services.udp.os')
+    def test_run_processes_restarts(self, os, signal):
+        server = SentryUDPServer('127.0.0.1', 0, processes=2)
+        os.fork.side_effect = [101, 102, 103]
+        os.wait.side_effect = [(101, 256), KeyboardInterrupt]
+        server.run()
+        self.assertEquals(os.fork.call_count, 3)
+        self.assertEquals(sorted(c[0][0] for c in os.kill.call_args_list), [102, 103])
+
+
+class EventBatcherTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    @mock.patch('sentry.coreapi.insert_batch_to_database')
+    def test_flushes_when_full(self, insert_batch_to_database):
+        batcher = EventBatcher(size=2, interval=60)
+        batcher.add({'message': 'foo'})
+        self.assertFalse(insert_batch_to_database.called)
+        batcher.add({'message': 'bar'})
+        insert_batch_to_database.assert_called_once_with([{'message': 'foo'}, {'message': 'bar'}])
+        self.assertEquals(batcher.pending, [])
+        self.assertEquals(metrics.get_counter('udp.batches'), 1)
+
+    @mock.patch('sentry.coreapi.insert_batch_to_database')
+    def test_maybe_flush(self, insert_batch_to_database):
+        batcher = EventBatcher(size=10, interval=60)
+        batcher.add({'message': 'foo'})
+        batcher.maybe_flush()
+        self.assertFalse(insert_batch_to_database.called)
+
+        batcher.last_flush -= 60
+        batcher.maybe_flush()
+        insert_batch_to_database.assert_called_once_with([{'message': 'foo'}])
+
+    @mock.patch('sentry.coreapi.insert_batch_to_database')
+    def test_counts_dropped_events(self, insert_batch_to_database):
+        insert_batch_to_database.side_effect = Exception()
+        batcher = EventBatcher(size=1, interval=60)
+        batcher.add({'message': 'foo'})
+        self.assertEquals(metrics.get_counter('udp.dropped'), 1)
+        self.assertEquals(batcher.pending, [])
+
+    @mock.patch('sentry.coreapi.maybe_delay')
+    def test_forgets_dropped_event_ids(self, maybe_delay):
+        maybe_delay.side_effect = Exception()
+        batcher = EventBatcher(size=1, interval=60)
+        batcher.add({'project': 1, 'event_id': 'a' * 32})
+
+        maybe_delay.side_effect = None
+        batcher.add({'project': 1, 'event_id': 'a' * 32})
+        self.assertEquals(maybe_delay.call_count, 2)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from datetime import datetime, timedelta
+from django.utils import timezone
+from sentry.models import AffectedUserByGroup, Group, Project
+from sentry.testutils import TestCase
+from sentry.uniques.base import UniqueUserCounter
+from sentry.uniques.redis import RedisUniqueUserCounter
+
+
+class UniqueUserCounterTest(TestCase):
+    def test_get_unique_users(self):
+        group = Group.objects.create(project=Project.objects.get(id=1))
+        now = timezone.now()
+        AffectedUserByGroup.objects.create(
+            project=group.project, group=group, ident='foo',
+            first_seen=now - timedelta(hours=3), last_seen=now - timedelta(hours=2))
+        AffectedUserByGroup.objects.create(
+            project=group.project, group=group, ident='bar',
+            first_seen=now - timedelta(hours=1), last_seen=now)
+
+        counter = UniqueUserCounter()
+        self.assertEquals(counter.get_unique_users(group, now - timedelta(hours=4), now + timedelta(hours=1)), 2)
+        self.assertEquals(counter.get_unique_users(group, now - timedelta(minutes=30), now + timedelta(hours=1)), 1)
+
+
+class RedisUniqueUserCounterTest(TestCase):
+    def setUp(self):
+        self.group = Group.objects.create(project=Project.objects.get(id=1))
+        self.counter = RedisUniqueUserCounter(hosts={
+            0: {'db': 9}
+        })
+        self.counter.conn.flushdb()
+        self.date = datetime(2013, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+    def test_record_sets_users_seen(self):
+        self.counter.record(self.group, {'foo': 1, 'bar': 2}, self.date)
+        self.assertEquals(self.group.users_seen, 2)
+        self.assertEquals(Group.objects.get(id=self.group.id).users_seen, 2)
+
+        with mock.patch.object(Group.objects, 'filter') as filter:
+            self.counter.record(self.group, {'foo': 1}, self.date)
+        # the estimate didn't change
+        self.assertFalse(filter.called)
+
+        self.counter.record(self.group, {u'b\xe4z': 1}, self.date)
+        self.assertEquals(Group.objects.get(id=self.group.id).users_seen, 3)
+
+    def test_get_unique_users(self):
+        hour = timedelta(hours=1)
+        self.counter.record(self.group, {'foo': 1, 'bar': 1}, self.date)
+        self.counter.record(self.group, {'foo': 1, 'baz': 1}, self.date + hour)
+        self.counter.record(self.group, {'qux': 1}, self.date + 2 * hour)
+
+        start = self.date.replace(minute=0)
+        self.assertEquals(self.counter.get_unique_users(self.group, start, start + hour), 2)
+        self.assertEquals(self.counter.get_unique_users(self.group, start, start + 2 * hour), 3)
+        self.assertEquals(self.counter.get_unique_users(self.group, start + hour, start + 3 * hour), 3)
+        self.assertEquals(self.counter.get_unique_users(self.group, start, start), 0)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+
+from sentry.testutils import TestCase, fixture
+from sentry.utils.cache import KnownKeyCache
+
+
+class KnownKeyCacheTest(TestCase):
+    @fixture
+    def known(self):
+        return KnownKeyCache('test', maxsize=2, timeout=60)
+
+    def test_add(self):
+        self.assertFalse((1, 'foo') in self.known)
+        self.known.add((1, 'foo'))
+        self.assertTrue((1, 'foo') in self.known)
+        self.assertFalse((1, 'bar') in self.known)
+
+    def test_evicts_least_recently_used(self):
+        self.known.add((1, 'foo'))
+        self.known.add((1, 'bar'))
+        self.assertTrue((1, 'foo') in self.known)
+        self.known.add((1, 'baz'))
+        self.assertTrue((1, 'foo') in self.known.local)
+        self.assertFalse((1, 'bar') in self.known.local)
+        self.assertTrue((1, 'baz') in self.known.local)
+
+    @mock.patch('sentry.utils.cache.cache')
+    @mock.patch('sentry.utils.cache.time')
+    def test_expires(self, time, cache):
+        cache.get.return_value = None
+        time.time.return_value = 1000
+        self.known.add((1, 'foo'))
+        time.time.return_value = 1059
+        self.assertTrue((1, 'foo') in self.known)
+        time.time.return_value = 1061
+        self.assertFalse((1, 'foo') in self.known)
+
+    def test_shared_between_processes(self):
+        self.known.add((1, 'foo'))
+        self.known.clear()
+        self.assertTrue((1, 'foo') in self.known)
+        self.assertTrue((1, 'foo') in self.known.local)
+
+    def test_discard(self):
+        self.known.add((1, 'foo'))
+        self.known.discard((1, 'foo'))
+        self.assertFalse((1, 'foo') in self.known)
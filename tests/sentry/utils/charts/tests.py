@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from datetime import datetime, timedelta
+from django.utils import timezone
+from sentry.benchmarks.charts import legacy_build_series
+from sentry.testutils import TestCase
+from sentry.utils.charts import build_series
+
+
+class BuildSeriesTest(TestCase):
+    def setUp(self):
+        self.start = datetime(2013, 1, 1, tzinfo=timezone.utc)
+
+    def test_fills_points(self):
+        rows = [
+            ('a', self.start, 5),
+            ('a', self.start + timedelta(hours=2), 3),
+            ('b', self.start + timedelta(hours=1), 1),
+        ]
+        results = build_series(rows, self.start, 60 * 60, 3)
+        self.assertEquals([v for _, v in results['a']], [5, 0, 3])
+        self.assertEquals([v for _, v in results['b']], [0, 1, 0])
+
+        timestamps = [t for t, _ in results['a']]
+        self.assertEquals(timestamps, [t for t, _ in results['b']])
+        self.assertEquals(timestamps[1] - timestamps[0], 60 * 60 * 1000)
+
+    def test_ignores_dates_off_the_series(self):
+        rows = [
+            ('a', self.start - timedelta(hours=1), 5),
+            ('a', self.start + timedelta(minutes=30), 5),
+            ('a', self.start + timedelta(hours=3), 5),
+        ]
+        results = build_series(rows, self.start, 60 * 60, 3)
+        self.assertEquals([v for _, v in results['a']], [0, 0, 0])
+
+    def test_items_without_rows(self):
+        results = build_series([], self.start, 60, 2, items=[None])
+        self.assertEquals(results.keys(), [None])
+        self.assertEquals([v for _, v in results[None]], [0, 0])
+
+    def test_matches_legacy(self):
+        today = self.start + timedelta(days=30)
+        rows = [('a', self.start + timedelta(days=n), n) for n in xrange(0, 31, 3)]
+        self.assertEquals(
+            build_series(rows, self.start, 24 * 60 * 60, 31),
+            legacy_build_series(rows, today, 'days', 30),
+        )
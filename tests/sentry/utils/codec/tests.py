@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import base64
+import datetime
+import zlib
+
+from sentry.utils import codec
+from sentry.utils.compat import pickle
+from sentry.testutils import TestCase
+
+
+class EncodeTest(TestCase):
+    def test_prefers_marshal(self):
+        value = codec.encode({'foo': [1, 2.0, u'bar', None]})
+        self.assertEquals(ord(value[0]), codec.MarshalCodec.version)
+
+    def test_falls_back_to_pickle(self):
+        value = codec.encode({'foo': datetime.datetime(2012, 1, 1)})
+        self.assertEquals(ord(value[0]), codec.PickleCodec.version)
+
+    def test_compresses_large_values(self):
+        value = codec.encode({'foo': 'bar' * 100})
+        self.assertEquals(ord(value[0]), codec.MarshalCodec.version | codec.COMPRESSED)
+        assert len(value) < 300
+
+    def test_does_not_compress_when_disabled(self):
+        value = codec.encode({'foo': 'bar' * 100}, compress=False)
+        self.assertEquals(ord(value[0]), codec.MarshalCodec.version)
+
+    def test_unsupported_value(self):
+        with self.assertRaises(ValueError):
+            codec.encode({'foo': lambda: None})
+
+
+class DecodeTest(TestCase):
+    def test_round_trip(self):
+        for value in ({'foo': u'bar☃'}, {'foo': 'bar' * 100}, datetime.datetime(2012, 1, 1), ('a', 1)):
+            self.assertEquals(codec.decode(codec.encode(value)), value)
+
+    def test_legacy_value(self):
+        value = base64.b64encode(zlib.compress(pickle.dumps({'foo': 'bar'})))
+        self.assertEquals(codec.decode(value), {'foo': 'bar'})
+        self.assertEquals(codec.decode(unicode(value)), {'foo': 'bar'})
+
+    def test_base64_value(self):
+        value = base64.b64encode(codec.encode({'foo': 'bar' * 100}))
+        self.assertEquals(codec.decode(value), {'foo': 'bar' * 100})
+
+    def test_buffer(self):
+        value = buffer(codec.encode({'foo': 'bar'}))
+        self.assertEquals(codec.decode(value), {'foo': 'bar'})
+
+
+class RegisterTest(TestCase):
+    def test_rejects_versions_which_overlap_base64(self):
+        class BadCodec(codec.Codec):
+            version = ord('A')
+
+        with self.assertRaises(ValueError):
+            codec.register(BadCodec())
+
+    def test_rejects_duplicate_versions(self):
+        class BadCodec(codec.Codec):
+            version = codec.MarshalCodec.version
+
+        with self.assertRaises(ValueError):
+            codec.register(BadCodec())
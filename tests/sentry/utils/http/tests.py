@@ -6,7 +6,8 @@ import mock
 
 from sentry.models import Project, ProjectOption
 from sentry.testutils import TestCase, fixture
-from sentry.utils.http import is_same_domain, is_valid_origin, get_origins
+from sentry.utils.http import is_same_domain, is_valid_origin, get_origins, \
+  get_project_origins
 
 
 class SameDomainTestCase(TestCase):
@@ -143,3 +144,34 @@ class IsValidOriginTestCase(TestCase):
     def test_null_invalid_graceful_with_domains(self):
         result = self.isValidOrigin('null', ['http://example.com'])
         self.assertEquals(result, False)
+
+    def test_domain_wildcard_does_not_match_suffix(self):
+        result = self.isValidOrigin('http://badexample.com', ['*.example.com'])
+        self.assertEquals(result, False)
+
+    def test_no_hostname_invalid_with_domains(self):
+        result = self.isValidOrigin('http://', ['example.com'])
+        self.assertEquals(result, False)
+
+
+class GetProjectOriginsTestCase(TestCase):
+    @fixture
+    def project(self):
+        return Project.objects.get()
+
+    def test_is_cached(self):
+        ProjectOption.objects.set_value(self.project, 'sentry:origins', ['http://foo.example'])
+        self.assertEquals(get_project_origins(self.project), ['http://foo.example'])
+
+        with self.assertNumQueries(0):
+            self.assertEquals(get_project_origins(self.project), ['http://foo.example'])
+
+    def test_cleared_when_option_changes(self):
+        ProjectOption.objects.set_value(self.project, 'sentry:origins', ['http://foo.example'])
+        self.assertEquals(get_project_origins(self.project), ['http://foo.example'])
+
+        ProjectOption.objects.set_value(self.project, 'sentry:origins', ['http://bar.example'])
+        self.assertEquals(get_project_origins(self.project), ['http://bar.example'])
+
+        ProjectOption.objects.unset_value(self.project, 'sentry:origins')
+        self.assertEquals(get_project_origins(self.project), [])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from sentry.testutils import TestCase
+from sentry.utils.lrucache import LRUCache
+
+
+class LRUCacheTest(TestCase):
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        self.assertEquals(cache.get('foo'), None)
+        self.assertEquals(cache.get('foo', 1), 1)
+        cache.set('foo', 2)
+        self.assertEquals(cache.get('foo'), 2)
+        cache.set('foo', 3)
+        self.assertEquals(cache.get('foo'), 3)
+        self.assertEquals(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('foo', 1)
+        cache.set('bar', 2)
+        cache.get('foo')
+        cache.set('baz', 3)
+        self.assertTrue('foo' in cache)
+        self.assertFalse('bar' in cache)
+        self.assertTrue('baz' in cache)
+
+        cache.set('qux', 4)
+        self.assertFalse('foo' in cache)
+        self.assertEquals(len(cache), 2)
+
+    def test_delete(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('foo', 1)
+        cache.set('bar', 2)
+        cache.delete('foo')
+        cache.delete('foo')
+        self.assertFalse('foo' in cache)
+        cache.set('baz', 3)
+        cache.set('qux', 4)
+        self.assertEquals(len(cache), 2)
+        self.assertFalse('bar' in cache)
+
+    def test_memoize(self):
+        cache = LRUCache(maxsize=2)
+        calls = []
+
+        @cache.memoize
+        def double(value):
+            calls.append(value)
+            return value * 2
+
+        self.assertEquals(double(1), 2)
+        self.assertEquals(double(1), 2)
+        self.assertEquals(calls, [1])
+
+        double.clear_cache(1)
+        self.assertEquals(double(1), 2)
+        self.assertEquals(calls, [1, 1])
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from sentry.utils import metrics
+from sentry.testutils import TestCase
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_incr(self):
+        metrics.incr('foo')
+        metrics.incr('foo', 2)
+        self.assertEquals(metrics.get_counter('foo'), 3)
+        self.assertEquals(metrics.get_counter('bar'), 0)
+
+    def test_timing(self):
+        metrics.timing('foo', 0.5)
+        metrics.timing('foo', 1.5)
+        self.assertEquals(metrics.get_timing('foo'), {
+            'count': 2,
+            'total': 2.0,
+            'max': 1.5,
+        })
+
+    def test_reset(self):
+        metrics.incr('foo')
+        metrics.timing('bar', 1)
+        metrics.reset()
+        self.assertEquals(metrics.get_counter('foo'), 0)
+        self.assertEquals(metrics.get_timing('bar')['count'], 0)
@@ -1,6 +1,13 @@
 from __future__ import absolute_import
 
-from django.db import models
+import base64
+import mock
+import zlib
+
+from django.db import connection, models
+from sentry.models import Event
+from sentry.utils import codec
+from sentry.utils.compat import pickle
 from sentry.utils.models import Model
 from sentry.testutils import TestCase
 
@@ -29,3 +36,49 @@ class ModelTest(TestCase):
         self.assertEquals(inst.old_value('foo'), 'bar')
         models.signals.post_save.send(instance=inst, sender=type(inst), created=False)
         self.assertFalse(inst.has_changed('foo'))
+
+
+class BinaryDictFieldTest(TestCase):
+    def test_stores_encoded_value(self):
+        event = Event.objects.create(project_id=1, message='foo', data={'foo': 'bar'})
+        self.assertEquals(Event.objects.get(pk=event.pk).data, {'foo': 'bar'})
+        cursor = connection.cursor()
+        cursor.execute('SELECT data FROM sentry_message WHERE id = %s', [event.pk])
+        raw = cursor.fetchone()[0]
+        self.assertEquals(str(raw), codec.encode({'foo': 'bar'}))
+
+    def test_reads_legacy_value(self):
+        event = Event.objects.create(project_id=1, message='foo')
+        legacy = base64.b64encode(zlib.compress(pickle.dumps({'foo': 'bar'})))
+        connection.cursor().execute('UPDATE sentry_message SET data = %s WHERE id = %s', [legacy, event.pk])
+        self.assertEquals(Event.objects.get(pk=event.pk).data, {'foo': 'bar'})
+        # and is written back untouched
+        Event.objects.get(pk=event.pk).save()
+        self.assertEquals(Event.objects.get(pk=event.pk).data, {'foo': 'bar'})
+
+    def test_empty_value(self):
+        event = Event.objects.create(project_id=1, message='foo', data=None)
+        self.assertEquals(Event.objects.get(pk=event.pk).data, {})
+
+    def test_decodes_on_access(self):
+        event = Event.objects.create(project_id=1, message='foo', data={'foo': 'bar'})
+        with mock.patch('sentry.utils.codec.decode') as decode:
+            event = Event.objects.get(pk=event.pk)
+            self.assertFalse(decode.called)
+            event.data
+            self.assertEquals(decode.call_count, 1)
+            event.data
+            self.assertEquals(decode.call_count, 1)
+
+    def test_saves_untouched_value(self):
+        event = Event.objects.create(project_id=1, message='foo', data={'foo': 'bar'})
+        event = Event.objects.get(pk=event.pk)
+        with mock.patch('sentry.utils.codec.encode') as encode:
+            event.save()
+            self.assertFalse(encode.called)
+        self.assertEquals(Event.objects.get(pk=event.pk).data, {'foo': 'bar'})
+
+    def test_loaded_instance_can_be_pickled(self):
+        event = Event.objects.create(project_id=1, message='foo', data={'foo': 'bar'})
+        event = pickle.loads(pickle.dumps(Event.objects.get(pk=event.pk)))
+        self.assertEquals(event.data, {'foo': 'bar'})
@@ -4,8 +4,10 @@ from __future__ import absolute_import
 
 import mock
 from django.core.urlresolvers import reverse
-from sentry.models import Project
+from sentry.models import AffectedUserByGroup, Group, Project, Event
 from sentry.testutils import TestCase, fixture
+from sentry.utils import json
+from sentry.utils.auth import get_auth_header
 
 
 class StoreViewTest(TestCase):
@@ -68,6 +70,101 @@ class StoreViewTest(TestCase):
         self.assertEquals(resp['Access-Control-Allow-Origin'], 'http://foo.com')
 
 
+class StoreBatchViewTest(TestCase):
+    @fixture
+    def path(self):
+        return reverse('sentry-api-store-batch', kwargs={'project_id': self.project.id})
+
+    def _postBatch(self, data_list):
+        return self.client.post(self.path, self._makeMessage(data_list),
+            content_type='application/octet-stream',
+            HTTP_X_SENTRY_AUTH=get_auth_header('_postBatch',
+                self.projectkey.public_key, self.projectkey.secret_key),
+        )
+
+    def test_stores_all_events(self):
+        resp = self._postBatch([
+            {'message': 'foo', 'event_id': 'a' * 32},
+            {'message': 'bar', 'event_id': 'b' * 32},
+        ])
+        self.assertEquals(resp.status_code, 200, resp.content)
+        self.assertEquals(resp['Content-Type'], 'application/json')
+        self.assertEquals(json.loads(resp.content), {'results': [
+            {'id': 'a' * 32, 'accepted': True},
+            {'id': 'b' * 32, 'accepted': True},
+        ]})
+        self.assertEquals(sorted(Event.objects.values_list('message', flat=True)), ['bar', 'foo'])
+
+    @mock.patch('sentry.web.api.insert_batch_to_database')
+    def test_rejects_invalid_events_individually(self, insert_batch_to_database):
+        resp = self._postBatch([
+            {'message': 'foo', 'event_id': 'a' * 32},
+            {'message': 'bar', 'sentry.interfaces.Stacktrace': {}},
+            {'message': 'baz', 'project': self.project.id + 1},
+            'biz',
+        ])
+        self.assertEquals(resp.status_code, 200, resp.content)
+        results = json.loads(resp.content)['results']
+        self.assertEquals(len(results), 4)
+        self.assertEquals(results[0], {'id': 'a' * 32, 'accepted': True})
+        for result in results[1:]:
+            self.assertFalse(result['accepted'])
+            self.assertIn('error', result)
+        self.assertEquals(insert_batch_to_database.call_count, 1)
+        data_list = insert_batch_to_database.call_args[0][0]
+        self.assertEquals([d['message'] for d in data_list], ['foo'])
+
+    @mock.patch('sentry.web.api.insert_batch_to_database')
+    def test_does_not_queue_empty_batch(self, insert_batch_to_database):
+        resp = self._postBatch(['foo'])
+        self.assertEquals(resp.status_code, 200, resp.content)
+        self.assertFalse(insert_batch_to_database.called)
+
+    def test_requires_list(self):
+        resp = self._postBatch({'message': 'foo'})
+        self.assertEquals(resp.status_code, 403)
+
+    @mock.patch('sentry.app.quotas.is_rate_limited', mock.Mock(return_value=10))
+    def test_rate_limited(self):
+        resp = self._postBatch([{'message': 'foo'}])
+        self.assertEquals(resp.status_code, 429)
+        self.assertEquals(resp['Retry-After'], '10')
+        self.assertFalse(Event.objects.exists())
+
+    @mock.patch('sentry.app.quotas.is_rate_limited')
+    @mock.patch('sentry.web.api.insert_batch_to_database')
+    def test_charges_every_event(self, insert_batch_to_database, is_rate_limited):
+        is_rate_limited.return_value = 0
+        resp = self._postBatch([{'message': 'foo'}, {'message': 'bar'}, {'message': 'baz'}])
+        self.assertEquals(resp.status_code, 200)
+        is_rate_limited.assert_called_once_with(self.project, self.projectkey.public_key, 3)
+
+    @mock.patch('sentry.app.quotas.is_rate_limited', mock.Mock(return_value=10))
+    @mock.patch('sentry.app.quotas.record_dropped')
+    @mock.patch('sentry.web.api.insert_batch_to_database')
+    def test_rate_limited_by_batch_size(self, insert_batch_to_database, record_dropped):
+        resp = self._postBatch([{'message': 'foo'}, {'message': 'bar'}])
+        self.assertEquals(resp.status_code, 429)
+        self.assertEquals(resp['Retry-After'], '10')
+        self.assertFalse(insert_batch_to_database.called)
+        record_dropped.assert_called_once_with(self.project, 2)
+
+    @mock.patch('sentry.app.quotas.get_capacity', mock.Mock(return_value=1))
+    @mock.patch('sentry.app.quotas.is_rate_limited')
+    def test_batch_larger_than_quota(self, is_rate_limited):
+        resp = self._postBatch([{'message': 'foo'}, {'message': 'bar'}])
+        # retrying wouldn't help, so it isn't a 429
+        self.assertEquals(resp.status_code, 413)
+        self.assertFalse(is_rate_limited.called)
+        self.assertFalse(Event.objects.exists())
+
+    def test_batch_size_limit(self):
+        with self.Settings(SENTRY_MAX_BATCH_SIZE=1):
+            resp = self._postBatch([{'message': 'foo'}, {'message': 'bar'}])
+        self.assertEquals(resp.status_code, 400)
+        self.assertFalse(Event.objects.exists())
+
+
 class CrossDomainXmlTest(TestCase):
     @fixture
     def project(self):
@@ -126,3 +223,29 @@ class CrossDomainXmlIndexTest(TestCase):
         self.assertEquals(resp.status_code, 200)
         self.assertEquals(resp['Content-Type'], 'application/xml')
         self.assertIn('<site-control permitted-cross-domain-policies="all"></site-control>', resp.content)
+
+
+class GroupUsersTest(TestCase):
+    @fixture
+    def group(self):
+        return Group.objects.create(project=self.project)
+
+    @fixture
+    def path(self):
+        return reverse('sentry-api-group-users', args=[self.project.slug, self.group.id])
+
+    def test_returns_daily_counts(self):
+        AffectedUserByGroup.objects.create(
+            project=self.project, group=self.group, ident='foo')
+        self.login_as(self.user)
+        resp = self.client.get(self.path, {'days': 3})
+        self.assertEquals(resp.status_code, 200)
+        self.assertEquals(resp['Content-Type'], 'application/json')
+        data = json.loads(resp.content)
+        self.assertEquals([n for _, n in data], [0, 0, 1])
+
+    def test_group_must_belong_to_project(self):
+        group = Group.objects.create(project=Project.objects.get(id=1))
+        self.login_as(self.user)
+        resp = self.client.get(reverse('sentry-api-group-users', args=[self.project.slug, group.id]))
+        self.assertEquals(resp.status_code, 403)
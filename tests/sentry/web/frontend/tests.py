@@ -2,16 +2,19 @@
 
 from __future__ import absolute_import
 
+import datetime
 import logging
 import json
 
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 
 from sentry.conf import settings
 from sentry.constants import MEMBER_USER
-from sentry.models import Group, Project, TeamMember, Team
+from sentry.models import Group, Project, ProjectCountRollup, TeamMember, Team
 from sentry.testutils import TestCase, fixture, before
+from sentry.utils.dates import ROLLUP_DAY, ROLLUP_HOUR, normalize_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +118,39 @@ class StatsTest(BaseViewTest):
         self.assertTemplateUsed(resp, 'sentry/admin/stats.html')
 
 
+class ManageProjectsTest(BaseViewTest):
+    @fixture
+    def path(self):
+        return reverse('sentry-admin-projects')
+
+    def test_requires_auth(self):
+        resp = self.client.get(self.path)
+        self.assertEquals(resp.status_code, 302)
+
+    def test_sorts_by_daily_event_counts(self):
+        now = timezone.now()
+        project = Project.objects.get(id=1)
+        other = Project.objects.create(name='Other', slug='other')
+        for days, times_seen in ((2, 3), (20, 4)):
+            ProjectCountRollup.objects.create(
+                project=project, rollup=ROLLUP_DAY, times_seen=times_seen,
+                date=normalize_datetime(now - datetime.timedelta(days=days), ROLLUP_DAY))
+        ProjectCountRollup.objects.create(
+            project=other, rollup=ROLLUP_DAY, times_seen=5,
+            date=normalize_datetime(now - datetime.timedelta(days=1), ROLLUP_DAY))
+        ProjectCountRollup.objects.create(
+            project=other, rollup=ROLLUP_HOUR, times_seen=5,
+            date=normalize_datetime(now - datetime.timedelta(days=1), ROLLUP_HOUR))
+        self.login()
+
+        resp = self.client.get(self.path, {'sort': 'events'})
+        self.assertEquals(resp.status_code, 200)
+        self.assertTemplateUsed(resp, 'sentry/admin/projects/list.html')
+        project_list = list(resp.context['project_list'])
+        self.assertEquals(project_list, [project, other])
+        self.assertEquals([p.events for p in project_list], [7, 5])
+
+
 class SentryViewsTest(BaseViewTest):
     fixtures = ['tests/fixtures/views.json']
 